@@ -0,0 +1,101 @@
+#!/usr/bin/python3
+"""
+Benchmarks the all command on the places: the memory it holds and how
+long the first byte takes.
+
+"list" is the former `all Place`, which built the list of the strings of
+every place before printing it as one string. "stream" is `all Place`
+now, which writes each string as it's built, and "projected" is
+`all Place name price_by_night`. "offset" and "after" time a page of 20
+places halfway through the class, read after an offset or a cursor from
+the sorted index of the keys.
+
+Usage: ./benchmarks/bench_all.py [places ...]
+"""
+import sys
+import time
+import tracemalloc
+import common
+from console import HBNBCommand
+from models import storage
+from models.place import Place
+
+
+class Sink:
+    """Discards what's written, noting when the first write happened"""
+
+    def __init__(self):
+        self.first = None
+
+    def write(self, text):
+        if self.first is None:
+            self.first = time.perf_counter()
+        return len(text)
+
+    def flush(self):
+        pass
+
+
+def list_all():
+    """Prints the places the way the all command used to"""
+    print([obj.__str__() for obj in storage.all(Place).values()])
+
+
+def measured(func, *args):
+    """
+    Returns the time to the first byte and the total time (in seconds) of
+    func(*args), and the peak memory (in bytes) it allocated.
+    """
+    stdout, sys.stdout = sys.stdout, Sink()
+    tracemalloc.start()
+    start = time.perf_counter()
+    try:
+        func(*args)
+        total = time.perf_counter() - start
+        peak = tracemalloc.get_traced_memory()[1]
+        first = sys.stdout.first - start
+    finally:
+        tracemalloc.stop()
+        sys.stdout = stdout
+    return first, total, peak
+
+
+def run(size):
+    """Returns the measures of each way of listing the places"""
+    common.reset(storage)
+    for i in range(size):
+        place = Place()
+        place.name = f"place {i}"
+        place.price_by_night = i % 500
+    console = HBNBCommand()
+    middle = sorted(storage.all(Place))[size // 2].partition('.')[2]
+    results = [measured(list_all),
+               measured(console.onecmd, "all Place"),
+               measured(console.onecmd, "all Place name price_by_night")]
+    stdout, sys.stdout = sys.stdout, Sink()
+    try:
+        # the first page builds the index of the keys
+        console.onecmd("all Place limit 0")
+        pages = [common.timed(console.onecmd, line, repeat=5) for line in (
+            f"all Place limit 20 offset {size // 2}",
+            f"all Place limit 20 after {middle}",
+        )]
+    finally:
+        sys.stdout = stdout
+    return results, pages
+
+
+if __name__ == "__main__":
+    sizes = [int(n) for n in sys.argv[1:]] or [10000, 100000, 1000000]
+    rows = []
+    for size in sizes:
+        results, pages = run(size)
+        for name, (first, total, peak) in zip(
+                ("list", "stream", "projected"), results):
+            rows.append([size, name, f"{first * 1000:.1f}",
+                         f"{total * 1000:.0f}", f"{peak / 2 ** 20:.1f}"])
+        offset_ms, after_ms = (t * 1000 for t in pages)
+        rows.append([size, "page (offset/after)", f"{offset_ms:.2f}",
+                     f"{after_ms:.2f}", "-"])
+    common.table(["places", "path", "first byte (ms)", "total (ms)",
+                  "peak (MiB)"], rows)
@@ -0,0 +1,76 @@
+#!/usr/bin/python3
+"""
+Benchmarks how many commands per second a script runs through the
+console.
+
+The script creates states and renames them, one command per line.
+"commands" runs it one command at a time, the way piped commands used to
+run, which saves the storage file after every create and update.
+"batch" runs it with `run_batch()`, saved once at the end, and
+"checkpoint" with a save every 1000 commands.
+
+Usage: ./benchmarks/bench_batch.py [commands ...]
+"""
+import sys
+import common
+from console import HBNBCommand
+from models import storage
+from models.state import State
+
+# the commands path saves once per command, it's only timed up to this
+COMMANDS_LIMIT = 2000
+CHECKPOINT = 1000
+
+
+def script(size):
+    """Returns `size` commands, half creating states and half renaming"""
+    states = [State() for _ in range(size // 2)]
+    storage.save()
+    lines = []
+    for i, state in enumerate(states):
+        lines.append("create State")
+        lines.append(f'update State {state.id} name "state {i}"')
+    return lines
+
+
+def commands(console, lines):
+    """Runs each line on its own, as the loop does"""
+    for line in lines:
+        console.onecmd(console.precmd(line))
+
+
+def batch(console, lines, checkpoint=0):
+    """Runs the lines in batch mode"""
+    console.run_batch(lines, checkpoint)
+
+
+def run(size):
+    """Returns the commands per second of each path (None when skipped)"""
+    common.reset(storage)
+    lines = script(size)
+    console = HBNBCommand()
+    rates = []
+    paths = ((commands, ()), (batch, ()), (batch, (CHECKPOINT,)))
+    stdout, stderr = sys.stdout, sys.stderr
+    sys.stdout = sys.stderr = open("output.txt", "w")
+    try:
+        for func, args in paths:
+            if func is commands and size > COMMANDS_LIMIT:
+                rates.append(None)
+                continue
+            seconds = common.timed(func, console, lines, *args, repeat=1)
+            rates.append(len(lines) / seconds)
+    finally:
+        sys.stdout.close()
+        sys.stdout, sys.stderr = stdout, stderr
+    return rates
+
+
+if __name__ == "__main__":
+    sizes = [int(n) for n in sys.argv[1:]] or [1000, 10000, 100000]
+    rows = []
+    for size in sizes:
+        rows.append([size] + ["-" if n is None else f"{n:,.0f}"
+                              for n in run(size)])
+    common.table(["commands", "commands (/s)", "batch (/s)",
+                  "checkpoint (/s)"], rows)
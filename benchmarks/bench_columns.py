@@ -0,0 +1,73 @@
+#!/usr/bin/python3
+"""
+Benchmarks the aggregates of storage.place_columns() against loops over
+the places.
+
+The columns are typed arrays grouped by city, so the mean price per
+city and the histogram of the guest capacity are computed by C functions
+over contiguous arrays, instead of reading the attributes of each place.
+
+Usage: ./benchmarks/bench_columns.py [places ...]
+"""
+import random
+import sys
+from collections import Counter
+import common
+from models import storage
+from models.place import Place
+
+CITIES = 1000
+
+
+def loop_mean_price():
+    """Returns the mean price per city, place by place"""
+    sums, counts = {}, {}
+    for place in storage.all(Place).values():
+        sums[place.city_id] = sums.get(place.city_id, 0) + \
+            place.price_by_night
+        counts[place.city_id] = counts.get(place.city_id, 0) + 1
+    return {city: sums[city] / counts[city] for city in sums}
+
+
+def loop_guests():
+    """Returns the number of places by guest capacity, place by place"""
+    return Counter(place.max_guest for place in storage.all(Place).values())
+
+
+def run(size):
+    """Returns the timings of the loops, the build and the aggregates"""
+    common.reset(storage)
+    rand = random.Random(size)
+    places = []
+    for _ in range(size):
+        place = Place()
+        place.city_id = f"city-{rand.randrange(CITIES)}"
+        place.max_guest = rand.randrange(1, 11)
+        place.price_by_night = rand.randrange(20, 1000)
+        places.append(place)
+    build_s = common.timed(storage.place_columns, repeat=1)
+
+    def mean_price():
+        storage.place_columns().aggregate('price_by_night', 'mean',
+                                          by_group=True)
+
+    def guests():
+        storage.place_columns().histogram('max_guest', 10, 1, 11)
+
+    def update_and_mean():
+        rand.choice(places).price_by_night = rand.randrange(20, 1000)
+        mean_price()
+
+    return (common.timed(loop_mean_price), common.timed(loop_guests),
+            build_s, common.timed(mean_price), common.timed(guests),
+            common.timed(update_and_mean))
+
+
+if __name__ == "__main__":
+    sizes = [int(n) for n in sys.argv[1:]] or [10000, 100000, 1000000]
+    rows = []
+    for size in sizes:
+        rows.append([size] + [f"{s * 1000:.3f}" for s in run(size)])
+    common.table(["places", "loop mean/city (ms)", "loop guests (ms)",
+                  "build (ms)", "mean/city (ms)", "guests (ms)",
+                  "update + mean/city (ms)"], rows)
@@ -0,0 +1,78 @@
+#!/usr/bin/python3
+"""
+Benchmarks the memory of reloaded places, as model instances and as
+compact (slotted) instances (HBNB_COMPACT_MODELS=1).
+
+Each place sets 10 attributes (id, created_at, updated_at, name,
+city_id, user_id, max_guest, price_by_night, latitude and longitude).
+"bytes/object" is what tracemalloc sees allocated by the reload divided
+by the number of places: it includes the attribute values and the
+storage's own dictionaries, which are the same in both modes. The
+reload is timed in another run, without tracemalloc. Each measure runs
+in a fresh interpreter.
+
+Usage: ./benchmarks/bench_compact.py [places]
+"""
+import json
+import os
+import subprocess
+import sys
+import common
+
+MEASURE = """
+import os, sys, time, tracemalloc
+sys.path.insert(0, {root!r})
+from models import storage
+if {trace!r}:
+    tracemalloc.start()
+start = time.perf_counter()
+storage.reload()
+elapsed = time.perf_counter() - start
+size = tracemalloc.get_traced_memory()[0]
+obj = next(iter(storage.all().values()))
+attrs = 0 if type(obj.__dict__) is not dict else sys.getsizeof(obj.__dict__)
+print(elapsed, size / len(storage.all()), sys.getsizeof(obj) + attrs)
+"""
+
+
+def measure(compact, trace):
+    """Returns the output of MEASURE in a fresh interpreter"""
+    return subprocess.run(
+        [sys.executable, "-c", MEASURE.format(root=common.ROOT, trace=trace)],
+        capture_output=True, text=True, check=True,
+        env={**os.environ, "HBNB_COMPACT_MODELS": compact}
+    ).stdout.split()
+
+
+def write_file(size):
+    """Writes a storage file of `size` places"""
+    with open("hbnb.json", "w") as f:
+        f.write("{")
+        for i in range(size):
+            val = {
+                "id": f"{i:036d}", "__class__": "Place",
+                "created_at": "2024-01-01T00:00:00.000000",
+                "updated_at": "2024-01-01T00:00:00.000000",
+                "name": f"place {i}", "city_id": f"{i % 100:036d}",
+                "user_id": f"{i % 1000:036d}", "max_guest": i % 10,
+                "price_by_night": i % 500, "latitude": 37.7 + i / 1e6,
+                "longitude": -122.4 - i / 1e6,
+            }
+            f.write(("" if i == 0 else ", ")
+                    + json.dumps(f"Place.{val['id']}") + ": ")
+            f.write(json.dumps(val))
+        f.write("}")
+
+
+if __name__ == "__main__":
+    size = int(sys.argv[1]) if len(sys.argv) > 1 else 200000
+    write_file(size)
+    rows = []
+    for compact in ("0", "1"):
+        elapsed = measure(compact, False)[0]
+        _, per_object, instance = measure(compact, True)
+        rows.append(["compact" if compact == "1" else "model",
+                     f"{float(elapsed):.2f}", f"{float(per_object):.0f}",
+                     instance])
+    common.table(["instances", "reload (s)", "bytes/object",
+                  "instance + __dict__ (bytes)"], rows)
@@ -0,0 +1,67 @@
+#!/usr/bin/python3
+"""
+Compares the storage formats: file size, full save time, parse time (the
+entries decoded, no object built) and reload time.
+
+Usage: ./benchmarks/bench_formats.py [objects]
+"""
+import os
+import sys
+import common
+from models import storage
+from models.engine.file_storage import FileStorage
+from models.engine.serializers import serializers
+from models.place import Place
+
+
+def populate(size):
+    """Stores `size` places with typed attributes"""
+    for i in range(size):
+        place = Place()
+        place.name = f"place {i}"
+        place.city_id = "0d9b4f0a-2c1d-4d9e-9a8b-6f1d2c3b4a5e"
+        place.number_rooms = i % 5
+        place.max_guest = i % 8
+        place.price_by_night = i % 500
+        place.latitude = 37.7 + i / 1e6
+        place.longitude = -122.4 - i / 1e6
+
+
+def full_save():
+    """Encodes every object again and writes the snapshot"""
+    storage._FileStorage__cache.clear()
+    storage.compact()
+
+
+def parse(serializer, path):
+    """Decodes every entry of the snapshot without building objects"""
+    with open(path, 'r' + serializer.file_mode) as f:
+        for _ in serializer.read(f, 1 << 16):
+            pass
+
+
+def reload():
+    """Reloads every object from the snapshot"""
+    storage.all().clear()
+    storage.reload()
+
+
+if __name__ == "__main__":
+    size = int(sys.argv[1]) if len(sys.argv) > 1 else 50000
+    common.reset(storage)
+    populate(size)
+    rows = []
+    for name, serializer in serializers.items():
+        FileStorage._FileStorage__serializer = serializer
+        save = common.timed(full_save)
+        path = "hbnb" + serializer.extension
+        mb = os.path.getsize(path) / 2 ** 20
+        read = common.timed(parse, serializer, path)
+        load = common.timed(reload, repeat=1)
+        rows.append([
+            name, f"{mb:.2f}", f"{save:.3f}", f"{read:.3f}", f"{load:.3f}"
+        ])
+    print(f"{size} places")
+    common.table(
+        ["format", "size (MiB)", "save (s)", "parse (s)", "reload (s)"], rows
+    )
@@ -0,0 +1,60 @@
+#!/usr/bin/python3
+"""
+Benchmarks storage.places_near() against a scan computing every distance.
+
+The places are spread over a box the size of the contiguous United
+States. A query only visits the grid cells overlapping the bounding box
+of its circle, so its cost follows the number of nearby places rather
+than the size of the store.
+
+Usage: ./benchmarks/bench_geo.py [places ...]
+"""
+import random
+import sys
+import common
+from models import storage
+from models.engine.indexes import haversine
+from models.place import Place
+
+SOUTH, NORTH, WEST, EAST = 25.0, 49.0, -125.0, -67.0
+
+
+def scan(lat, lon, km):
+    """Returns the places within km of (lat, lon) found by a full scan"""
+    return sorted(
+        (haversine(lat, lon, p.latitude, p.longitude), p.id)
+        for p in storage.all(Place).values()
+        if haversine(lat, lon, p.latitude, p.longitude) <= km
+    )
+
+
+def run(size):
+    """Returns the timings of the scan, index build and queries"""
+    common.reset(storage)
+    rand = random.Random(size)
+    for _ in range(size):
+        place = Place()
+        place.latitude = rand.uniform(SOUTH, NORTH)
+        place.longitude = rand.uniform(WEST, EAST)
+    center = (39.7392, -104.9903)
+    scan_s = common.timed(scan, *center, 5, repeat=1)
+    build_s = common.timed(storage.places_near, *center, 5, repeat=1)
+    points = [(rand.uniform(SOUTH, NORTH), rand.uniform(WEST, EAST))
+              for _ in range(1000)]
+
+    def queries(km, limit=None):
+        for lat, lon in points:
+            storage.places_near(lat, lon, km, limit)
+
+    return [scan_s * 1000, build_s * 1000,
+            common.timed(queries, 5) * 1000 / len(points),
+            common.timed(queries, 50, 10) * 1000 / len(points)]
+
+
+if __name__ == "__main__":
+    sizes = [int(n) for n in sys.argv[1:]] or [10000, 100000, 1000000]
+    rows = []
+    for size in sizes:
+        rows.append([size] + [f"{ms:.3f}" for ms in run(size)])
+    common.table(["places", "scan (ms)", "build (ms)", "5 km (ms)",
+                  "50 km top 10 (ms)"], rows)
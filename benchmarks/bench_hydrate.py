@@ -0,0 +1,93 @@
+#!/usr/bin/python3
+"""
+Benchmarks how many places per second are built from their stored
+dictionaries, the way FileStorage.reload() does.
+
+"setattr" is the per-attribute path `BaseModel(**record)` used to take
+(each attribute set through __setattr__, which asks the storage whether
+the instance is dirty, and both timestamps parsed). "kwargs" is
+`Place(**record)` now, "from_records" is `Place.from_records(records)`,
+the path of the reload, which doesn't copy each record and parses
+updated_at only when it differs from created_at. "reload" times a whole
+FileStorage.reload() of the same places.
+
+Usage: ./benchmarks/bench_hydrate.py [places ...]
+"""
+import json
+import sys
+from datetime import datetime
+import common
+from models import storage
+from models.place import Place
+
+
+def records(size, updated):
+    """
+    Returns the dictionaries of `size` places, `updated` of which (a
+    ratio) have been updated since their creation.
+    """
+    result = []
+    for i in range(size):
+        created = f"2024-01-01T00:00:{i % 60:02d}.{i % 1000000:06d}"
+        result.append({
+            "id": f"{i:036d}", "__class__": "Place",
+            "created_at": created,
+            "updated_at": (f"2024-06-01T00:00:00.{i % 1000000:06d}"
+                           if i < size * updated else created),
+            "name": f"place {i}", "city_id": f"{i % 100:036d}",
+            "user_id": f"{i % 1000:036d}", "max_guest": i % 10,
+            "price_by_night": i % 500, "latitude": 37.7 + i / 1e6,
+            "longitude": -122.4 - i / 1e6,
+        })
+    return result
+
+
+def setattr_path(records):
+    """Builds the places the way BaseModel.__init__ used to"""
+    objs = []
+    for record in records:
+        obj = Place.__new__(Place)
+        for key, value in record.items():
+            if key == "__class__":
+                continue
+            if key == "created_at" or key == "updated_at":
+                if isinstance(value, str):
+                    value = datetime.fromisoformat(value)
+            setattr(obj, key, value)
+        objs.append(obj)
+    return objs
+
+
+def kwargs_path(records):
+    """Builds the places with Place(**record)"""
+    return [Place(**record) for record in records]
+
+
+def from_records_path(records):
+    """Builds the places with Place.from_records()"""
+    return list(Place.from_records(records))
+
+
+def run(size, updated=0.2):
+    """Returns the places per second of each path"""
+    common.reset(storage)
+    data = records(size, updated)
+    with open("hbnb.json", "w") as f:
+        json.dump({f"Place.{r['id']}": r for r in data}, f)
+
+    def reload():
+        storage.all().clear()
+        storage.reload()
+
+    return [size / common.timed(path, data)
+            for path in (setattr_path, kwargs_path, from_records_path)] + \
+        [size / common.timed(reload)]
+
+
+if __name__ == "__main__":
+    sizes = [int(n) for n in sys.argv[1:]] or [10000, 100000, 1000000]
+    rows = []
+    for size in sizes:
+        rows.append([size] + [f"{n:,.0f}" for n in run(size)])
+    common.table(["places", "setattr (/s)", "kwargs (/s)",
+                  "from_records (/s)", "reload (/s)"], rows)
@@ -0,0 +1,51 @@
+#!/usr/bin/python3
+"""
+Benchmarks the creation of places with random (uuid4) and time-ordered
+(uuid7) ids: the ids generated per second, the places created per
+second, and the time to insert the ids into a sorted list (as an
+ordered index of the keys would), where the random ids land anywhere
+and the time-ordered ones are appended.
+
+Usage: ./benchmarks/bench_ids.py [places ...]
+"""
+import sys
+from bisect import insort
+from unittest.mock import patch
+import common
+from models import ids, storage
+from models.place import Place
+
+
+def run(size, generator):
+    """Returns the ids/s, places/s and sorted insert time of generator"""
+    common.reset(storage)
+
+    def generate():
+        for _ in range(size):
+            generator()
+
+    def create():
+        common.reset(storage)
+        with patch.object(ids, 'new_id', generator):
+            for _ in range(size):
+                Place()
+
+    def insert():
+        keys = []
+        for _ in range(size):
+            insort(keys, generator())
+
+    return (size / common.timed(generate), size / common.timed(create),
+            common.timed(insert, repeat=1))
+
+
+if __name__ == "__main__":
+    sizes = [int(n) for n in sys.argv[1:]] or [10000, 100000, 1000000]
+    rows = []
+    for size in sizes:
+        for name in ('uuid4', 'uuid7'):
+            ids_s, places_s, insert_s = run(size, ids.get_generator(name))
+            rows.append([size, name, f"{ids_s:,.0f}", f"{places_s:,.0f}",
+                         f"{insert_s * 1000:.1f}"])
+    common.table(["places", "ids", "ids/s", "places/s",
+                  "sorted insert (ms)"], rows)
@@ -0,0 +1,85 @@
+#!/usr/bin/python3
+"""
+Benchmarks how many places per second are imported from a Json Lines
+file.
+
+"commands" creates each place the way a script of console commands
+does, `create` then `update` of each attribute, which saves the storage
+file after every command. "loop" does the same inside one batch, saved
+once. "bulk_load" streams the file into `storage.bulk_load()`, which
+hydrates the records in batches and saves once.
+
+Usage: ./benchmarks/bench_import.py [places ...]
+"""
+import json
+import sys
+import common
+from models import storage
+from models.engine.importers import read_records
+from models.place import Place
+
+# the commands path saves once per command, it's only timed up to this
+COMMANDS_LIMIT = 2000
+
+
+def write(size):
+    """Writes `size` places to "places.jsonl", returns its path"""
+    with open("places.jsonl", "w") as f:
+        for i in range(size):
+            f.write(json.dumps({
+                "name": f"place {i}", "city_id": f"{i % 100:036d}",
+                "max_guest": str(i % 10), "price_by_night": str(i % 500),
+                "latitude": str(37.7 + i / 1e6),
+            }) + "\n")
+    return "places.jsonl"
+
+
+def commands(path, batched=False):
+    """Creates then updates a place per line, as the console would"""
+    with open(path) as f:
+        for record in read_records(f, 'jsonl'):
+            obj = Place()
+            obj.save()
+            for name, value in record.items():
+                setattr(obj, name, value)
+                if not batched:
+                    obj.save()
+
+
+def loop(path):
+    """The commands path inside one batch"""
+    with storage.batch():
+        commands(path, batched=True)
+
+
+def bulk_load(path):
+    """Streams the file into storage.bulk_load()"""
+    with open(path) as f:
+        storage.bulk_load(Place, read_records(f, 'jsonl'))
+
+
+def run(size):
+    """Returns the places per second of each path (None when skipped)"""
+    common.reset(storage)
+    path = write(size)
+    rates = []
+    for func in (commands, loop, bulk_load):
+        if func is commands and size > COMMANDS_LIMIT:
+            rates.append(None)
+            continue
+
+        def imported():
+            storage.all().clear()
+            func(path)
+        rates.append(size / common.timed(imported, repeat=1))
+    return rates
+
+
+if __name__ == "__main__":
+    sizes = [int(n) for n in sys.argv[1:]] or [1000, 10000, 100000]
+    rows = []
+    for size in sizes:
+        rows.append([size] + ["-" if n is None else f"{n:,.0f}"
+                              for n in run(size)])
+    common.table(["places", "commands (/s)", "loop (/s)",
+                  "bulk_load (/s)"], rows)
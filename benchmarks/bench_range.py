@@ -0,0 +1,52 @@
+#!/usr/bin/python3
+"""
+Benchmarks storage.ids_in_range() against a scan of the places.
+
+The sorted index is built once, then a change only moves the changed
+place, so a range query costs a bisection plus the size of its result.
+
+Usage: ./benchmarks/bench_range.py [places ...]
+"""
+import random
+import sys
+import common
+from models import storage
+from models.place import Place
+
+
+def scan(low, high):
+    """Returns the ids of the places in the price range, by price"""
+    return [p.id for p in sorted(
+        (p for p in storage.all(Place).values()
+         if low <= p.price_by_night <= high),
+        key=lambda p: (p.price_by_night, p.id)
+    )]
+
+
+def run(size):
+    """Returns the timings of the scan, index build and range queries"""
+    common.reset(storage)
+    rand = random.Random(size)
+    places = []
+    for _ in range(size):
+        place = Place()
+        place.price_by_night = rand.randrange(20, 1000)
+        places.append(place)
+    scan_s = common.timed(scan, 100, 110)
+    build_s = common.timed(storage.ids_in_range, Place, 'price_by_night',
+                           repeat=1)
+
+    def update_and_query():
+        rand.choice(places).price_by_night = rand.randrange(20, 1000)
+        storage.ids_in_range(Place, 'price_by_night', 100, 110)
+
+    return scan_s, build_s, common.timed(update_and_query)
+
+
+if __name__ == "__main__":
+    sizes = [int(n) for n in sys.argv[1:]] or [10000, 100000, 1000000]
+    rows = []
+    for size in sizes:
+        rows.append([size] + [f"{s * 1000:.3f}" for s in run(size)])
+    common.table(["places", "scan (ms)", "build (ms)",
+                  "update + 1% range (ms)"], rows)
@@ -0,0 +1,53 @@
+#!/usr/bin/python3
+"""
+Benchmarks storage.related() against a scan of storage.all().
+
+The reverse index is built on the first lookup, then only the changed
+objects are indexed again, so a lookup costs the number of results
+rather than the size of the store.
+
+Usage: ./benchmarks/bench_related.py [places ...]
+"""
+import sys
+import common
+from models import storage
+from models.city import City
+from models.place import Place
+
+
+def scan(city):
+    """Returns the places of city found by a full scan"""
+    return [
+        obj for obj in storage.all().values()
+        if type(obj) is Place and obj.city_id == city.id
+    ]
+
+
+def run(size):
+    """Returns the scan time, first lookup time and indexed lookup time"""
+    common.reset(storage)
+    cities = [City() for _ in range(100)]
+    for i in range(size):
+        Place().city_id = cities[i % len(cities)].id
+    city = cities[0]
+    first = common.timed(storage.related, city, Place, repeat=1)
+    # one change between lookups, like an update between two listings
+    places = list(storage.all(Place).values())
+
+    def lookup():
+        places[0].city_id = city.id
+        storage.related(city, Place)
+
+    return common.timed(scan, city), first, common.timed(lookup)
+
+
+if __name__ == "__main__":
+    sizes = [int(n) for n in sys.argv[1:]] or [1000, 10000, 100000]
+    rows = []
+    for size in sizes:
+        scan_s, first_s, lookup_s = run(size)
+        rows.append([size, f"{scan_s * 1000:.2f}", f"{first_s * 1000:.2f}",
+                     f"{lookup_s * 1000:.3f}"])
+    common.table(
+        ["places", "scan (ms)", "first lookup (ms)", "lookup (ms)"], rows
+    )
@@ -0,0 +1,78 @@
+#!/usr/bin/python3
+"""
+Benchmarks the peak memory and the time of FileStorage.reload().
+
+The storage file is streamed one entry at a time, so the peak RSS stays
+close to the final working set (the reloaded objects) instead of holding
+the whole parsed document next to them, as `json.load()` does.
+Each measure runs in a fresh interpreter so peaks don't add up.
+
+Usage: ./benchmarks/bench_reload_memory.py [objects]
+       (10000000 objects make a file of about 2.5 GB)
+"""
+import json
+import os
+import subprocess
+import sys
+import common
+
+MEASURE = """
+import json, os, resource, sys, time
+sys.path.insert(0, {root!r})
+os.mkdir("empty")
+os.chdir("empty")
+from models import storage
+os.chdir("..")
+os.rmdir("empty")
+base = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+start = time.perf_counter()
+if {method!r} == "json.load":
+    with open("hbnb.json") as f:
+        _dict = json.load(f)
+    for key, val in _dict.items():
+        storage.new(storage._FileStorage__model_classes()["Place"](**val))
+    del _dict
+else:
+    storage.reload()
+elapsed = time.perf_counter() - start
+final = len(storage.all())
+peak = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+print(elapsed, base, peak, final)
+"""
+
+
+def write_file(size):
+    """Writes a storage file of `size` places, one entry at a time"""
+    with open("hbnb.json", "w") as f:
+        f.write("{")
+        for i in range(size):
+            key = f"Place.{i:036d}"
+            val = {
+                "id": f"{i:036d}", "__class__": "Place",
+                "created_at": "2024-01-01T00:00:00.000000",
+                "updated_at": "2024-01-01T00:00:00.000000",
+                "name": f"place {i}", "price_by_night": i % 500,
+                "latitude": 37.7, "longitude": -122.4,
+            }
+            f.write(("" if i == 0 else ", ") + json.dumps(key) + ": ")
+            f.write(json.dumps(val))
+        f.write("}")
+
+
+if __name__ == "__main__":
+    size = int(sys.argv[1]) if len(sys.argv) > 1 else 200000
+    write_file(size)
+    mb = os.path.getsize("hbnb.json") / 2 ** 20
+    print(f"{size} objects, {mb:.1f} MiB on disk")
+    rows = []
+    for method in ("json.load", "streaming reload"):
+        code = MEASURE.format(root=common.ROOT, method=method)
+        out = subprocess.run(
+            [sys.executable, "-c", code], capture_output=True, text=True,
+            check=True
+        ).stdout.split()
+        elapsed, base, peak = float(out[0]), int(out[1]), int(out[2])
+        rows.append([
+            method, f"{elapsed:.2f}", f"{(peak - base) / 1024:.1f}"
+        ])
+    common.table(["method", "time (s)", "peak RSS growth (MiB)"], rows)
@@ -0,0 +1,44 @@
+#!/usr/bin/python3
+"""
+Benchmarks FileStorage.save() against the number of changed objects.
+
+Only dirty objects are re-serialized, so the cost of a save follows the
+number of changes rather than the size of the store. Snapshot mode still
+rewrites the file (cached Json text of the clean objects), journal mode
+only appends the changes.
+
+Usage: ./benchmarks/bench_save.py [store_size ...]
+"""
+import sys
+import common
+from models import storage
+from models.engine.file_storage import FileStorage
+from models.place import Place
+
+
+def run(mode, size, changes):
+    """Returns the best save time after changing `changes` objects"""
+    FileStorage._FileStorage__mode = mode
+    common.reset(storage)
+    places = [Place() for _ in range(size)]
+    storage.compact()
+
+    def change_and_save():
+        for place in places[:changes]:
+            place.name = "changed"
+        storage.save()
+
+    return common.timed(change_and_save)
+
+
+if __name__ == "__main__":
+    sizes = [int(n) for n in sys.argv[1:]] or [1000, 10000, 100000]
+    FileStorage._FileStorage__journal_limit = 1 << 40
+    rows = []
+    for mode in ("snapshot", "journal"):
+        for size in sizes:
+            for changes in (1, 100, 1000):
+                if changes <= size:
+                    ms = run(mode, size, changes) * 1000
+                    rows.append([mode, size, changes, f"{ms:.2f}"])
+    common.table(["mode", "objects", "changed", "save (ms)"], rows)
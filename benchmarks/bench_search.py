@@ -0,0 +1,71 @@
+#!/usr/bin/python3
+"""
+Benchmarks storage.search() against a substring scan of the places, and
+the first search after a reload, with the index built from the objects
+or read from the file saved next to the snapshot.
+
+The words follow a Zipf-like distribution over a 5000 word vocabulary,
+with 60 word descriptions.
+
+Usage: ./benchmarks/bench_search.py [places ...]
+"""
+import os
+import random
+import sys
+import common
+from models import storage
+from models.place import Place
+
+VOCABULARY = [f"word{i}" for i in range(5000)]
+WEIGHTS = [1 / (i + 1) for i in range(len(VOCABULARY))]
+QUERY = "word100 word200"
+
+
+def scan(words):
+    """Returns the places holding every word, found by a substring scan"""
+    return [
+        p for p in storage.all(Place).values()
+        if all(w in f"{p.name} {p.description}".split() for w in words)
+    ]
+
+
+def first_search(keep_index):
+    """
+    Returns the reload time and the first search time, with the saved
+    index removed first unless keep_index.
+    """
+    storage.all().clear()
+    storage._FileStorage__indexes.clear()
+    if not keep_index:
+        os.remove('hbnb.Place.search.json')
+    reload_s = common.timed(storage.reload, repeat=1)
+    return reload_s, common.timed(storage.search, Place, QUERY, repeat=1)
+
+
+def run(size):
+    """Returns the timings of the scan, search and first searches"""
+    common.reset(storage)
+    storage._FileStorage__indexes.clear()
+    rand = random.Random(size)
+    for _ in range(size):
+        place = Place()
+        place.name = " ".join(rand.choices(VOCABULARY, WEIGHTS, k=3))
+        place.description = " ".join(rand.choices(VOCABULARY, WEIGHTS, k=60))
+    scan_s = common.timed(scan, QUERY.split())
+    storage.search(Place, QUERY)
+    search_s = common.timed(storage.search, Place, QUERY)
+    storage.save()
+    saved = first_search(True)
+    built = first_search(False)
+    # the saved index is read by reload(), the extra time is its loading
+    return [scan_s, search_s, built[1], saved[0] - built[0] + saved[1]]
+
+
+if __name__ == "__main__":
+    sizes = [int(n) for n in sys.argv[1:]] or [10000, 100000]
+    rows = []
+    for size in sizes:
+        rows.append([size] + [f"{s * 1000:.1f}" for s in run(size)])
+    common.table(["places", "scan (ms)", "search (ms)",
+                  "first search, built (ms)", "first search, saved (ms)"],
+                 rows)
@@ -0,0 +1,90 @@
+#!/usr/bin/python3
+"""
+Benchmarks the aggregate views of storage.aggregate() against scans of
+the places.
+
+A view is built once, then each change moves one place between groups,
+so reading the places per city or the mean price per state after an
+update doesn't scan the places again.
+
+Usage: ./benchmarks/bench_stats.py [places ...]
+"""
+import random
+import sys
+import common
+from models import storage
+from models.city import City
+from models.place import Place
+from models.state import State
+
+STATES = 50
+CITIES = 1000
+
+
+def scan_places_per_city():
+    """Returns the number of places per city, place by place"""
+    counts = {}
+    for place in storage.all(Place).values():
+        counts[place.city_id] = counts.get(place.city_id, 0) + 1
+    return counts
+
+
+def scan_price_per_state():
+    """Returns the mean price per state, place by place"""
+    states = {city.id: city.state_id
+              for city in storage.all(City).values()}
+    sums, counts = {}, {}
+    for place in storage.all(Place).values():
+        state = states[place.city_id]
+        sums[state] = sums.get(state, 0) + place.price_by_night
+        counts[state] = counts.get(state, 0) + 1
+    return {state: sums[state] / counts[state] for state in sums}
+
+
+def run(size):
+    """Returns the timings of the scans, the builds and the views"""
+    common.reset(storage)
+    rand = random.Random(size)
+    states = [State() for _ in range(STATES)]
+    cities = []
+    for _ in range(CITIES):
+        city = City()
+        city.state_id = rand.choice(states).id
+        cities.append(city)
+    places = []
+    for _ in range(size):
+        place = Place()
+        place.city_id = rand.choice(cities).id
+        place.price_by_night = rand.randrange(20, 1000)
+        places.append(place)
+    build_s = (common.timed(storage.aggregate, 'places_per_city', repeat=1)
+               + common.timed(storage.aggregate, 'price_per_state',
+                              repeat=1))
+
+    def update():
+        place = rand.choice(places)
+        place.city_id = rand.choice(cities).id
+        place.price_by_night = rand.randrange(20, 1000)
+
+    def update_and_count():
+        update()
+        storage.aggregate('places_per_city')
+
+    def update_and_price():
+        update()
+        storage.aggregate('price_per_state')
+
+    return (common.timed(scan_places_per_city),
+            common.timed(scan_price_per_state), build_s,
+            common.timed(update_and_count), common.timed(update_and_price))
+
+
+if __name__ == "__main__":
+    sizes = [int(n) for n in sys.argv[1:]] or [10000, 100000, 1000000]
+    rows = []
+    for size in sizes:
+        rows.append([size] + [f"{s * 1000:.3f}" for s in run(size)])
+    common.table(["places", "scan places/city (ms)",
+                  "scan price/state (ms)", "build (ms)",
+                  "update + places/city (ms)", "update + price/state (ms)"],
+                 rows)
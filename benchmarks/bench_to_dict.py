@@ -0,0 +1,57 @@
+#!/usr/bin/python3
+"""
+Benchmarks BaseModel.to_dict() on places whose timestamps haven't
+changed since the previous call (the formatted timestamps are reused),
+on places updated between calls (two assignments and a formatting),
+and on places never memoized.
+
+Usage: ./benchmarks/bench_to_dict.py [places ...]
+"""
+import sys
+from datetime import datetime, timedelta
+import common
+from models import storage
+from models.place import Place
+
+
+def run(size):
+    """Returns the microseconds per to_dict() call of each case"""
+    common.reset(storage)
+    places = []
+    for i in range(size * 2):
+        place = Place()
+        place.name = f"place {i}"
+        place.city_id = f"{i % 100:036d}"
+        place.max_guest = i % 10
+        place.price_by_night = i % 500
+        places.append(place)
+    places, fresh = places[:size], places[size:]
+    for place in places:
+        place.to_dict()
+    later = datetime.now() + timedelta(days=1)
+
+    def unchanged():
+        for place in places:
+            place.to_dict()
+
+    def updated():
+        for place in places:
+            place.updated_at = later
+            place.to_dict()
+            place.updated_at = place.created_at
+
+    def no_memo():
+        for place in fresh:
+            place.to_dict(memoize=False)
+
+    return [common.timed(case) / size * 1e6
+            for case in (no_memo, unchanged, updated)]
+
+
+if __name__ == "__main__":
+    sizes = [int(n) for n in sys.argv[1:]] or [10000, 100000]
+    rows = []
+    for size in sizes:
+        rows.append([size] + [f"{us:.2f}" for us in run(size)])
+    common.table(["places", "no memo (us)", "unchanged (us)",
+                  "updated (us)"], rows)
@@ -0,0 +1,88 @@
+#!/usr/bin/python3
+"""
+Benchmarks storage.top_k() against sorting every instance.
+
+"sort" is what a client of the all command does: read every place (or
+review) and sort them all, then keep the first ones. top_k() reads the
+sorted index of a numeric field in order, or keeps the k best instances
+of the candidates in a heap. Each query runs once the indexes are built.
+
+- cheapest: the 10 cheapest places (the sorted index of the price).
+- in city: the 10 cheapest places of one city (the hash index of
+    city_id, then a heap).
+- latest: the 50 latest reviews (the sorted index of created_at).
+- by name: the 10 first places by name (a heap over every place).
+
+Usage: ./benchmarks/bench_top_k.py [places ...]
+"""
+import random
+import sys
+import common
+from models import storage
+from models.place import Place
+from models.review import Review
+
+CITIES = 1000
+
+
+def sort_cheapest(city_id=None):
+    """The 10 cheapest places (of a city), sorting every place"""
+    places = [place for place in storage.all(Place).values()
+              if city_id is None or place.city_id == city_id]
+    places.sort(key=lambda place: place.price_by_night)
+    return places[:10]
+
+
+def sort_names():
+    """The 10 first places by name, sorting every place"""
+    places = list(storage.all(Place).values())
+    places.sort(key=lambda place: place.name)
+    return places[:10]
+
+
+def sort_latest():
+    """The 50 latest reviews, sorting every review"""
+    reviews = list(storage.all(Review).values())
+    reviews.sort(key=lambda review: review.created_at, reverse=True)
+    return reviews[:50]
+
+
+def run(size):
+    """Returns the (sort, top_k) timings in seconds of each query"""
+    common.reset(storage)
+    rand = random.Random(size)
+    cities = [f"city-{i}" for i in range(CITIES)]
+    for _ in range(size):
+        place = Place()
+        place.city_id = rand.choice(cities)
+        place.price_by_night = rand.randrange(20, 1000)
+        place.name = f"place {rand.random()}"
+    for _ in range(size // 10):
+        Review()
+    city = cities[0]
+    queries = [
+        (sort_cheapest, (), storage.top_k, (Place, 'price_by_night', 10)),
+        (sort_cheapest, (city,), storage.top_k,
+         (Place, 'price_by_night', 10, False, [('city_id', '==', city)])),
+        (sort_latest, (), storage.top_k, (Review, 'created_at', 50, True)),
+        (sort_names, (), storage.top_k, (Place, 'name', 10)),
+    ]
+    timings = []
+    for sort, sort_args, top, top_args in queries:
+        top(*top_args)  # builds the indexes
+        timings.append((common.timed(sort, *sort_args),
+                        common.timed(top, *top_args)))
+    return timings
+
+
+if __name__ == "__main__":
+    sizes = [int(n) for n in sys.argv[1:]] or [10000, 100000, 1000000]
+    rows = []
+    for size in sizes:
+        for name, (sort_s, top_s) in zip(("cheapest", "in city", "latest",
+                                          "by name"),
+                                         run(size)):
+            rows.append([size, name, f"{sort_s * 1000:.2f}",
+                         f"{top_s * 1000:.2f}", f"{sort_s / top_s:.0f}x"])
+    common.table(["places", "query", "sort (ms)", "top_k (ms)", "speedup"],
+                 rows)
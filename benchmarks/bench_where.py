@@ -0,0 +1,53 @@
+#!/usr/bin/python3
+"""
+Benchmarks storage.where() against a scan of the places with the same
+filter.
+
+The planner reads the candidates from the most selective index (here
+the city, then a narrow price range) and only checks those.
+
+Usage: ./benchmarks/bench_where.py [places ...]
+"""
+import random
+import sys
+import common
+from models import storage
+from models.engine.query import matches
+from models.place import Place
+
+CITIES = 100
+BY_CITY = [('city_id', '==', 'city-7'), ('max_guest', '>=', 4)]
+BY_PRICE = [('price_by_night', '>=', 100), ('price_by_night', '<', 110),
+            ('max_guest', '>=', 4)]
+
+
+def scan(conditions):
+    """Returns the places meeting conditions, checking every place"""
+    return {key: obj for key, obj in storage.all(Place).items()
+            if matches(obj, conditions)}
+
+
+def run(size):
+    """Returns the timings of the scans and filtered queries"""
+    common.reset(storage)
+    rand = random.Random(size)
+    for _ in range(size):
+        place = Place()
+        place.city_id = f"city-{rand.randrange(CITIES)}"
+        place.max_guest = rand.randrange(1, 10)
+        place.price_by_night = rand.randrange(20, 1000)
+    storage.where(Place, BY_CITY)
+    storage.where(Place, BY_PRICE)
+    return (common.timed(scan, BY_CITY),
+            common.timed(storage.where, Place, BY_CITY),
+            common.timed(scan, BY_PRICE),
+            common.timed(storage.where, Place, BY_PRICE))
+
+
+if __name__ == "__main__":
+    sizes = [int(n) for n in sys.argv[1:]] or [10000, 100000, 1000000]
+    rows = []
+    for size in sizes:
+        rows.append([size] + [f"{s * 1000:.3f}" for s in run(size)])
+    common.table(["places", "scan city (ms)", "where city (ms)",
+                  "scan price (ms)", "where price (ms)"], rows)
@@ -0,0 +1,49 @@
+#!/usr/bin/python3
+"""
+Shared helpers for the benchmark scripts.
+
+Importing this module puts the project root on `sys.path` and moves into a
+fresh temporary directory, so the files written by a benchmark never touch
+the "hbnb.json" of the project. It must be imported before `models`.
+"""
+import os
+import sys
+import tempfile
+import time
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, ROOT)
+os.chdir(tempfile.mkdtemp(prefix="hbnb-bench-"))
+
+
+def timed(func, *args, repeat=3):
+    """
+    Runs func(*args) `repeat` times.
+
+    Returns:
+    -   float: The best wall time in seconds.
+    """
+    best = float("inf")
+    for _ in range(repeat):
+        start = time.perf_counter()
+        func(*args)
+        best = min(best, time.perf_counter() - start)
+    return best
+
+
+def reset(storage):
+    """Empties the storage and drops its files"""
+    storage.all().clear()
+    storage._FileStorage__pending.clear()
+    for name in os.listdir('.'):
+        os.remove(name)
+
+
+def table(header, rows):
+    """Prints rows of values as an aligned table"""
+    widths = [
+        max(len(str(cell)) for cell in column)
+        for column in zip(header, *rows)
+    ]
+    for row in [header] + rows:
+        print("  ".join(str(c).rjust(w) for c, w in zip(row, widths)))
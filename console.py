@@ -12,18 +12,35 @@ The console offers the following functionalities:
 - Updating existing instances by adding or modifying their attributes.
 - Deleting existing instances from the storage.
 - Counting the number of instances for each class.
+- Grouping changes in a transaction saved once on commit.
+- Listing the instances referencing another one (i.e the cities of a state).
+- Finding the places near a point.
+- Searching the text of places and reviews.
+- Filtering instances on their attributes, and explaining how it's done.
+- Listing the first instances in the order of an attribute (top-k).
+- Reading aggregates kept up to date by every change (i.e places per city).
+- Importing instances in bulk from Json Lines or CSV files.
+- Running scripts of commands in batch mode, saving once at the end.
 """
+import argparse
 import cmd
 import sys
+import time
 from typing import TypedDict
 from models.base_model import BaseModel
-from models.__init__ import storage
+from models import storage
 from models.user import User
 from models.place import Place
 from models.state import State
 from models.city import City
 from models.amenity import Amenity
 from models.review import Review
+from models.compact import HBNB_COMPACT_MODELS, compact
+from models.engine.importers import (
+    ATTRIBUTE_TYPES, file_format, read_records
+)
+from models.engine.indexes import AGGREGATES, foreign_key
+from models.engine.query import parse_conditions, parse_order
 
 
 # for auto-completion
@@ -36,6 +53,15 @@ class ErrorMessages(TypedDict):
     no_attr_name: str
     no_attr_val: str
     no_json: str
+    no_batch: str
+    no_num: str
+    no_cond: str
+    no_view: str
+    no_file_name: str
+    no_file: str
+    no_format: str
+    no_record: str
+    no_order: str
 
 
 error_messages: ErrorMessages = {
@@ -47,8 +73,22 @@ error_messages: ErrorMessages = {
     "no_attr_name": "** attribute name missing **",
     "no_attr_val": "** value missing **",
     "no_json": "** invalid json object **",
+    "no_batch": "** no transaction in progress **",
+    "no_num": "** invalid number **",
+    "no_cond": "** invalid condition **",
+    "no_view": "** aggregate doesn't exist **",
+    "no_file_name": "** file name missing **",
+    "no_file": "** file doesn't exist **",
+    "no_format": "** unknown file format **",
+    "no_record": "** invalid record: {} **",
+    "no_order": "** invalid order **",
 }
 
+# the options of a page of the all command
+PAGE_OPTIONS = ('limit', 'offset', 'after')
+# the commands handling the transactions, left to the scripts in batch mode
+TRANSACTION_COMMANDS = ('begin', 'commit', 'rollback')
+
 classes = {
     'BaseModel': BaseModel,
     'User': User,
@@ -58,6 +98,8 @@ classes = {
     'Amenity': Amenity,
     'Review': Review,
 }
+if HBNB_COMPACT_MODELS:
+    classes = {name: compact(cls) for name, cls in classes.items()}
 
 
 class HBNBCommand(cmd.Cmd):
@@ -106,6 +148,14 @@ class HBNBCommand(cmd.Cmd):
             'show',
             'destroy',
             'update',
+            'by_state',
+            'by_city',
+            'by_user',
+            'by_place',
+            'near',
+            'search',
+            'where',
+            'explain',
         ]
 
         _cmd = _cls = _id = _args = ''
@@ -122,6 +172,9 @@ class HBNBCommand(cmd.Cmd):
         if _cmd not in allowed_methods:
             print(f"{error_messages['no_method']}: {_cmd} **")
             return ''
+        if _cmd in ('where', 'explain'):  # conditions are kept as written
+            pline = pline[pline.find('(') + 1:pline.rfind(')')]
+            return ' '.join([_cmd, _cls, pline])
 
         try:
             args_starting_idx = pline.find('(') + 1
@@ -173,6 +226,75 @@ class HBNBCommand(cmd.Cmd):
         """Overrides the emptyline method of CMD"""
         pass
 
+    def run_batch(self, lines, checkpoint=0, prompt=False):
+        """
+        Runs the commands of a script against the storage kept in memory:
+        their changes are saved once at the end (or every checkpoint
+        commands) instead of after each command. The time taken by each
+        command is reported on stderr at the end.
+
+        The transaction commands keep their meaning: the changes made
+        before them are saved first, so a rollback only discards the
+        changes made since its begin. Blank lines and the lines starting
+        with "#" are skipped.
+
+        Args:
+        -   lines (iterable): The commands, one per line.
+        -   checkpoint (int): The number of commands between two saves
+                (defaults to 0, saving only at the end).
+        -   prompt (bool): If True, prints the intro and the prompts like
+                the loop does when reading a pipe (defaults to False).
+        """
+        timings = {}
+        checkpoints = 0
+        # whether the open batch is the script's, and its commands
+        owned = False
+        pending = 0
+        if prompt:
+            self.preloop()
+            self.stdout.write(str(self.intro) + "\n")
+        start = time.perf_counter()
+        try:
+            for line in lines:
+                line = self.precmd(line.rstrip('\r\n'))
+                name = line.strip().partition(' ')[0]
+                if not name or name.startswith('#'):
+                    if prompt:
+                        self.postcmd(False, line)
+                    continue
+                if name in TRANSACTION_COMMANDS:
+                    if owned:
+                        storage.commit()
+                        checkpoints += pending > 0
+                        owned = False
+                        pending = 0
+                elif not storage.in_batch():
+                    storage.begin()
+                    owned = True
+                began = time.perf_counter()
+                stop = self.onecmd(line)
+                entry = timings.setdefault(name, [0, 0.0])
+                entry[0] += 1
+                entry[1] += time.perf_counter() - began
+                if prompt:
+                    stop = self.postcmd(stop, line)
+                if stop:
+                    return
+                if owned:
+                    pending += 1
+                    if checkpoint and pending >= checkpoint:
+                        storage.commit()
+                        checkpoints += 1
+                        owned = False
+                        pending = 0
+            if prompt:
+                self.postcmd(self.onecmd('EOF'), 'EOF')
+        finally:
+            if owned:
+                storage.commit()
+                checkpoints += pending > 0
+            print_report(timings, time.perf_counter() - start, checkpoints)
+
     def do_create(self, arg):
         """
         Creates a new instance, and saves it a JSON file.
@@ -221,12 +343,7 @@ class HBNBCommand(cmd.Cmd):
         if not args:
             return
 
-        cls_name = args["cls_name"]
-        obj_id = args["obj_id"]
-        all_objs = storage.all()
-        key = f"{cls_name}.{obj_id}"
-        obj = all_objs.get(key)
-
+        obj = storage.get(args["cls_name"], args["obj_id"])
         if obj is None:
             print(error_messages["no_obj"])
             return
@@ -251,12 +368,8 @@ class HBNBCommand(cmd.Cmd):
         if not args:
             return
 
-        cls_name = args["cls_name"]
-        obj_id = args["obj_id"]
-
-        all_objs = storage.all()
-        key = f"{cls_name}.{obj_id}"
-        removed_obj = all_objs.pop(key, None)
+        obj = storage.get(args["cls_name"], args["obj_id"])
+        removed_obj = storage.delete(obj)
         if removed_obj is None:
             print(error_messages["no_obj"])
             return
@@ -270,7 +383,14 @@ class HBNBCommand(cmd.Cmd):
 
     def do_all(self, arg):
         """
-        Prints a string representation of all instances.
+        Prints a string representation of all instances, or of the
+        instances of a class, written one at a time as they're read.
+
+        The attributes listed after the class name narrow each instance
+        to them (`all Place name price_by_night`). "limit <n>",
+        "offset <n>" and "after <id>" print a page of the instances,
+        ordered by id (by "<className>.<id>" without a class): "after"
+        continues from the last id of the previous page.
 
         Args:
         -   arg (str): The user input argument (command to be interpreted).
@@ -282,24 +402,48 @@ class HBNBCommand(cmd.Cmd):
         -   None (prints error messages to the console).
         """
         args = arg.split()
-        cls_name = args[0].strip("'\"") if args else ""
+        cls_name = ""
+        if args and args[0] not in PAGE_OPTIONS:
+            cls_name = args.pop(0).strip("'\"")
 
         if cls_name and cls_name not in classes:
             print("** class doesn't exist **")
             return
 
-        all_objs = storage.all()
-        obj_list = [
-            obj.__str__()
-            for obj in all_objs.values()
-            if not cls_name or obj.__class__.__name__ == cls_name
-        ]
-        print(obj_list)
+        fields = []
+        options = {}
+        while args:
+            name = args.pop(0).strip("'\",")
+            if name not in PAGE_OPTIONS:
+                fields.append(name)
+                continue
+            if not args:
+                print(error_messages["no_attr_val"])
+                return
+            value = args.pop(0).strip("'\",")
+            if name != 'after':
+                if not value.isdigit():
+                    print(error_messages["no_num"])
+                    return
+                value = int(value)
+            elif cls_name:
+                value = f"{cls_name}.{value}"
+            options[name] = value
+
+        if options:
+            objs = storage.page(cls_name or None, **options)
+        else:
+            objs = storage.all(cls_name or None).values()
+        print_list(obj.__str__() if not fields else
+                   f"[{obj.__class__.__name__}] ({obj.id}) "
+                   f"{project(obj, fields)}" for obj in objs)
 
     def help_all(self):
         """Help information for the all command"""
-        print("Shows all objects, or all of a class")
-        print("[Usage]: all <className>\n")
+        print("Shows all objects, or all of a class, optionally narrowed to")
+        print("some attributes, or a page of them ordered by id")
+        print("[Usage]: all [<className>] [<attrName> ...] [limit <n>] "
+              "[offset <n>] [after <id>]\n")
 
     def do_count(self, arg):
         """
@@ -312,15 +456,8 @@ class HBNBCommand(cmd.Cmd):
         if not args:
             return
 
-        nm_instances = 0
-        all_objs = storage.all()
-        for obj in all_objs.values():
-            nm_instances += (
-                1
-                if arg == "all" or obj.__class__.__name__ == args["cls_name"]
-                else 0
-            )
-        print(nm_instances)
+        cls_name = args["cls_name"]
+        print(storage.count(None if cls_name == "all" else cls_name))
 
     def help_count(self):
         """ """
@@ -345,15 +482,6 @@ class HBNBCommand(cmd.Cmd):
         Raises:
         -   None (prints error messages to the console).
         """
-        types = {
-            'number_rooms': int,
-            'number_bathrooms': int,
-            'max_guest': int,
-            'price_by_night': int,
-            'latitude': float,
-            'longitude': float,
-        }
-
         args = validate(arg, check_id=True)
         if args is None:
             return
@@ -362,9 +490,8 @@ class HBNBCommand(cmd.Cmd):
         c_name = args["cls_name"]
         args = args["attributes"]
 
-        key = f"{c_name}.{c_id}"
-
-        if key not in storage.all():
+        new_obj = storage.get(c_name, c_id)
+        if new_obj is None:
             print(error_messages["no_obj"])
             return
 
@@ -390,8 +517,6 @@ class HBNBCommand(cmd.Cmd):
                 if attr_name not in new_args or attr_value not in new_args:
                     new_args.extend([attr_name, attr_value])
             args = ["", ""] if len(new_args) == 0 else new_args
-        # get the target object with its key
-        new_obj = storage.all()[key]
         # iterate through each attr name and value
         for i, attr_name in enumerate(args):
             if i % 2 == 0:
@@ -403,10 +528,10 @@ class HBNBCommand(cmd.Cmd):
                     print(error_messages["no_attr_val"])
                     return
                 # type cast some special attributes
-                if attr_name in types:
-                    attr_val = types[attr_name](attr_val)
-                # update the object dictionary
-                new_obj.__dict__.update({attr_name: attr_val})
+                if attr_name in ATTRIBUTE_TYPES:
+                    attr_val = ATTRIBUTE_TYPES[attr_name](attr_val)
+                # update the object (marks it as changed in the storage)
+                setattr(new_obj, attr_name, attr_val)
         # save to storage
         new_obj.save()
 
@@ -415,6 +540,366 @@ class HBNBCommand(cmd.Cmd):
         print("Updates an object with new information")
         print("Usage: update <className> <id> <attrName> <attrValue>\n")
 
+    def do_begin(self, arg):
+        """
+        Starts a transaction: changes are kept in memory and saved
+        all at once on commit.
+
+        Args:
+        -   arg (str): The user input argument (ignored).
+        """
+        storage.begin()
+
+    def help_begin(self):
+        """Help information for the begin command"""
+        print("Starts a transaction, changes are saved on commit")
+        print("[Usage]: begin\n")
+
+    def do_commit(self, arg):
+        """
+        Saves every change made since the transaction started.
+
+        Args:
+        -   arg (str): The user input argument (ignored).
+        """
+        if not storage.in_batch():
+            print(error_messages["no_batch"])
+            return
+        storage.commit()
+
+    def help_commit(self):
+        """Help information for the commit command"""
+        print("Saves the changes of the current transaction")
+        print("[Usage]: commit\n")
+
+    def do_rollback(self, arg):
+        """
+        Discards every change made since the transaction started.
+
+        Args:
+        -   arg (str): The user input argument (ignored).
+        """
+        if not storage.in_batch():
+            print(error_messages["no_batch"])
+            return
+        storage.rollback()
+
+    def help_rollback(self):
+        """Help information for the rollback command"""
+        print("Discards the changes of the current transaction")
+        print("[Usage]: rollback\n")
+
+    def do_by_state(self, arg):
+        """
+        Prints the instances referencing a state (i.e City.by_state(<id>)).
+
+        Args:
+        -   arg (str): The user input argument (command to be interpreted).
+        """
+        self.print_related('State', arg)
+
+    def help_by_state(self):
+        """Help information for the by_state command"""
+        print("Shows the instances of a class referencing a state")
+        print("[Usage]: <className>.by_state(<stateId>)\n")
+
+    def do_by_city(self, arg):
+        """
+        Prints the instances referencing a city (i.e Place.by_city(<id>)).
+
+        Args:
+        -   arg (str): The user input argument (command to be interpreted).
+        """
+        self.print_related('City', arg)
+
+    def help_by_city(self):
+        """Help information for the by_city command"""
+        print("Shows the instances of a class referencing a city")
+        print("[Usage]: <className>.by_city(<cityId>)\n")
+
+    def do_by_user(self, arg):
+        """
+        Prints the instances referencing a user (i.e Place.by_user(<id>)).
+
+        Args:
+        -   arg (str): The user input argument (command to be interpreted).
+        """
+        self.print_related('User', arg)
+
+    def help_by_user(self):
+        """Help information for the by_user command"""
+        print("Shows the instances of a class referencing a user")
+        print("[Usage]: <className>.by_user(<userId>)\n")
+
+    def do_by_place(self, arg):
+        """
+        Prints the instances referencing a place (i.e Review.by_place(<id>)).
+
+        Args:
+        -   arg (str): The user input argument (command to be interpreted).
+        """
+        self.print_related('Place', arg)
+
+    def help_by_place(self):
+        """Help information for the by_place command"""
+        print("Shows the instances of a class referencing a place")
+        print("[Usage]: <className>.by_place(<placeId>)\n")
+
+    def print_related(self, parent, arg):
+        """
+        Prints the instances of a class referencing an instance of parent.
+
+        Args:
+        -   parent (str): The class name of the referenced instance.
+        -   arg (str): The class name of the listed instances followed by
+                the id of the referenced instance.
+
+        Raises:
+        -   None (prints error messages to the console).
+        """
+        args = validate(arg, check_id=True)
+        if not args:
+            return
+
+        cls_name = args["cls_name"]
+        if cls_name not in classes:
+            print(error_messages["no_cls"])
+            return
+        try:
+            foreign_key(classes[cls_name], classes[parent])
+        except ValueError:
+            print(f"{error_messages['no_method']}: by_{parent.lower()} **")
+            return
+
+        obj = storage.get(parent, args["obj_id"])
+        if obj is None:
+            print(error_messages["no_obj"])
+            return
+        objs = storage.related(obj, cls_name)
+        print([obj.__str__() for obj in objs.values()])
+
+    def do_near(self, arg):
+        """
+        Prints the places within a distance (in km) of a point, nearest
+        first (i.e Place.near(<latitude>, <longitude>, <km>)).
+
+        Args:
+        -   arg (str): The user input argument (command to be interpreted).
+
+        Raises:
+        -   None (prints error messages to the console).
+        """
+        args = arg.split()
+        if not args:
+            print(error_messages["no_cls_name"])
+            return
+        if args[0] not in classes:
+            print(error_messages["no_cls"])
+            return
+        if args[0] != "Place":
+            print(f"{error_messages['no_method']}: near **")
+            return
+
+        try:
+            lat, lon, km = (float(n.strip("\"'")) for n in args[1:4])
+            limit = int(args[4]) if len(args) > 4 else None
+        except ValueError:
+            print(error_messages["no_num"])
+            return
+        places = storage.places_near(lat, lon, km, limit)
+        print([obj.__str__() for obj in places.values()])
+
+    def help_near(self):
+        """Help information for the near command"""
+        print("Shows the places within a distance (km) of a point")
+        print("[Usage]: Place.near(<lat>, <lon>, <km>[, <limit>])\n")
+
+    def do_search(self, arg):
+        """
+        Prints the instances holding every word of the terms in their text
+        (or any word if the terms are joined by OR), best matches first.
+
+        Args:
+        -   arg (str): The user input argument (command to be interpreted).
+
+        Raises:
+        -   None (prints error messages to the console).
+        """
+        args = validate(arg)
+        if not args:
+            return
+
+        cls_name = args["cls_name"]
+        if cls_name not in classes:
+            print(error_messages["no_cls"])
+            return
+        words = f"{args['obj_id']} {args['attributes'][0]}".split()
+        mode = "or" if "OR" in words else "and"
+        text = " ".join(w for w in words if w not in ("AND", "OR"))
+        try:
+            objs = storage.search(cls_name, text, mode)
+        except ValueError:
+            print(f"{error_messages['no_method']}: search **")
+            return
+        print([obj.__str__() for obj in objs.values()])
+
+    def help_search(self):
+        """Help information for the search command"""
+        print("Shows the places or reviews holding words, best matches first")
+        print("[Usage]: search <className> <word> [[AND|OR] <word> ...]\n")
+
+    def do_where(self, arg):
+        """
+        Prints the instances meeting every condition, i.e
+        Place.where(max_guest >= 4, city_id in [<id>, <id>]), or the first
+        k of them in the order of an attribute when the conditions end
+        with "order by <attrName> [asc|desc] limit <k>".
+
+        Args:
+        -   arg (str): The user input argument (command to be interpreted).
+
+        Raises:
+        -   None (prints error messages to the console).
+        """
+        arg, order = parse_order(arg)
+        args = self.parse_where(arg)
+        if not args:
+            return
+        if order is None:
+            objs = storage.where(*args)
+        else:
+            field, descending, k = order
+            try:
+                objs = storage.top_k(args[0], field, k, descending, args[1])
+            except ValueError:
+                print(error_messages["no_order"])
+                return
+        print_list(obj.__str__() for obj in objs.values())
+
+    def help_where(self):
+        """Help information for the where command"""
+        print("Shows the instances of a class meeting every condition")
+        print("Operators: ==, !=, <, <=, >, >=, in [<value>, ...], "
+              "has [<value>, ...]")
+        print("[Usage]: <className>.where(<attr> <op> <value>, ...)")
+        print("[Usage]: <className>.where(<attr> <op> <value>, ... "
+              "order by <attr> [asc|desc] limit <k>)\n")
+
+    def do_explain(self, arg):
+        """
+        Prints how the where command finds the instances meeting the
+        conditions: the index read, or a scan, and the estimated number
+        of candidates.
+
+        Args:
+        -   arg (str): The user input argument (command to be interpreted).
+
+        Raises:
+        -   None (prints error messages to the console).
+        """
+        args = self.parse_where(arg)
+        if not args:
+            return
+        print(storage.explain(*args))
+
+    def help_explain(self):
+        """Help information for the explain command"""
+        print("Shows how the instances meeting the conditions are found")
+        print("[Usage]: <className>.explain(<attr> <op> <value>, ...)\n")
+
+    def do_stats(self, arg):
+        """
+        Prints an aggregate view ({group: value}), or its value for one
+        group, or the names of the views when none is given.
+
+        Args:
+        -   arg (str): The view name, optionally followed by a group.
+
+        Raises:
+        -   None (prints error messages to the console).
+        """
+        name, _, group = arg.strip().partition(" ")
+        if not name:
+            print(list(AGGREGATES))
+            return
+        try:
+            view = storage.aggregate(name)
+        except ValueError:
+            print(error_messages["no_view"])
+            return
+        group = group.strip().strip("\"'")
+        print(view.get(group, 0 if AGGREGATES[name][2] == 'count' else None)
+              if group else view)
+
+    def help_stats(self):
+        """Help information for the stats command"""
+        print("Shows an aggregate kept up to date by every change, or the")
+        print("names of the aggregates when none is given")
+        print("[Usage]: stats [<aggregate> [<group id>]]\n")
+
+    def do_import(self, arg):
+        """
+        Creates an instance of a class for each record of a Json Lines or
+        CSV file, and prints their number. The file is streamed and saved
+        once at the end, nothing is created if a record is invalid.
+
+        Args:
+        -   arg (str): The class name followed by the file path.
+
+        Raises:
+        -   None (prints error messages to the console).
+        """
+        args = validate(arg)
+        if not args:
+            return
+        if args["cls_name"] not in classes:
+            print(error_messages["no_cls"])
+            return
+        path = arg.partition(" ")[2].strip().strip("\"'")
+        if not path:
+            print(error_messages["no_file_name"])
+            return
+        try:
+            fmt = file_format(path)
+        except ValueError:
+            print(error_messages["no_format"])
+            return
+        try:
+            with open(path, newline='', encoding='utf-8') as f:
+                print(storage.bulk_load(args["cls_name"],
+                                        read_records(f, fmt)))
+        except OSError:
+            print(error_messages["no_file"])
+        except ValueError as e:
+            print(error_messages["no_record"].format(e))
+
+    def help_import(self):
+        """Help information for the import command"""
+        print("Creates the instances of a class from a Json Lines (.jsonl)")
+        print("or CSV (.csv) file, and shows how many were created")
+        print("[Usage]: import <className> <file>\n")
+
+    def parse_where(self, arg):
+        """
+        Returns the class name and the conditions of a where or explain
+        command, or None after printing an error message.
+
+        Args:
+        -   arg (str): The class name followed by the conditions.
+        """
+        args = validate(arg)
+        if not args:
+            return None
+        cls_name = args["cls_name"]
+        if cls_name not in classes:
+            print(error_messages["no_cls"])
+            return None
+        try:
+            return cls_name, parse_conditions(arg.partition(" ")[2])
+        except ValueError:
+            print(error_messages["no_cond"])
+            return None
+
 
 def validate(arg="", **kwargs):
     """
@@ -455,5 +940,86 @@ def validate(arg="", **kwargs):
     return {"obj_id": obj_id, "cls_name": cls_name, "attributes": args[2:]}
 
 
+def project(obj, fields):
+    """
+    Returns the dictionary of the attributes of obj named in fields,
+    leaving out the ones it doesn't have.
+    """
+    missing = object()
+    values = {}
+    for name in fields:
+        value = getattr(obj, name, missing)
+        if value is not missing:
+            values[name] = value
+    return values
+
+
+def print_list(strings):
+    """
+    Prints strings like `print(list(strings))` does, one string at a
+    time, so nothing waits for the whole list to be built.
+
+    Args:
+    -   strings (iterable): The strings to print.
+    """
+    write = sys.stdout.write
+    separator = '['
+    for string in strings:
+        write(separator)
+        write(repr(string))
+        separator = ', '
+    write('[]\n' if separator == '[' else ']\n')
+
+
+def print_report(timings, elapsed, checkpoints, file=None):
+    """
+    Prints the report of a script run in batch mode: the count and the
+    time of each command, slowest first, then the throughput.
+
+    Args:
+    -   timings (dict): The [count, seconds] of each command name.
+    -   elapsed (float): The seconds taken by the whole script.
+    -   checkpoints (int): The number of times the changes were saved.
+    -   file (file): Where to print (defaults to sys.stderr).
+    """
+    file = sys.stderr if file is None else file
+    print(f"{'command':<12} {'count':>8} {'total (ms)':>11} "
+          f"{'mean (ms)':>10}", file=file)
+    for name, (count, seconds) in sorted(
+            timings.items(), key=lambda item: -item[1][1]):
+        print(f"{name:<12} {count:>8} {seconds * 1000:>11.1f} "
+              f"{seconds * 1000 / count:>10.3f}", file=file)
+    total = sum(count for count, seconds in timings.values())
+    rate = total / elapsed if elapsed else 0
+    print(f"{total} commands in {elapsed:.3f} s ({rate:,.0f} commands/s), "
+          f"{checkpoints} checkpoint(s)", file=file)
+
+
+def main(argv=None):
+    """
+    Runs the console: interactively on a terminal, or in batch mode on a
+    script (--batch) or on commands piped to stdin.
+
+    Args:
+    -   argv (list): The command-line arguments (defaults to sys.argv).
+    """
+    parser = argparse.ArgumentParser(description="The AirBnB console.")
+    parser.add_argument('--batch', metavar='FILE',
+                        help="runs the commands of FILE, saving once")
+    parser.add_argument('--checkpoint', metavar='N', type=int, default=0,
+                        help="saves every N commands in batch mode")
+    args = parser.parse_args(argv)
+    if args.checkpoint < 0:
+        parser.error("--checkpoint can't be negative")
+    console = HBNBCommand()
+    if args.batch:
+        with open(args.batch, encoding='utf-8') as f:
+            console.run_batch(f, args.checkpoint)
+    elif not sys.stdin.isatty():
+        console.run_batch(sys.stdin, args.checkpoint, prompt=True)
+    else:
+        console.cmdloop()
+
+
 if __name__ == "__main__":
-    HBNBCommand().cmdloop()
+    main()
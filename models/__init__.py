@@ -1,7 +1,10 @@
 #!/usr/bin/python3
-"""This module instantiates an object of class FileStorage"""
-from models.engine.file_storage import FileStorage
+"""This module instantiates the storage engine selected by HBNB_TYPE_STORAGE"""
+from models.engine.file_storage import FileStorage, HBNB_TYPE_STORAGE
 
-
-storage = FileStorage()
+if HBNB_TYPE_STORAGE == "db":
+    from models.engine.db_storage import DBStorage
+    storage = DBStorage()
+else:
+    storage = FileStorage()
 storage.reload()
@@ -1,8 +1,7 @@
 #!/usr/bin/python3
 """This module defines a base class for all models in our hbnb clone"""
-import uuid
 from datetime import datetime
-from models import storage
+from models import ids, storage
 
 
 class BaseModel:
@@ -13,34 +12,96 @@ class BaseModel:
     -   id (str): A unique identifier for the model instance.
     -   created_at (datetime): Timestamp representing the creation date.
     -   updated_at (datetime): Timestamp representing the last update date.
+    -   _isoformats (tuple): The created_at and updated_at datetimes last
+            formatted by `to_dict()`, with their isoformat() (a slot, so
+            it's never part of the attributes).
     """
 
+    __slots__ = ('__dict__', '__weakref__', '_isoformats')
+
     def __init__(self, *args, **kwargs):
         """
         Initializes a new BaseModel instance. If keyword arguments are provided
         it populates the instance attributes with the values.
-        If no arguments, it generates a new unique id and sets the
-        created_at and updated_at timestamps,
-        finally it save the instances in the storage file.
+        If no arguments, it generates a new unique id (see `models.ids`)
+        and sets the created_at and updated_at timestamps, finally it
+        adds the instance to the storage.
 
         Args:
         -   *args: Variable length argument list.
         -   **kwargs: Arbitrary keyword arguments.
         """
         if kwargs:
-            for key, value in kwargs.items():
-                if key == "__class__":
-                    continue
-                if key == "created_at" or key == "updated_at":
-                    value = datetime.fromisoformat(value)
-                setattr(self, key, value)
+            self._fill(kwargs)
             del kwargs['__class__']
         else:
-            self.id = str(uuid.uuid4())
-            self.created_at = datetime.now()
-            self.updated_at = datetime.now()
+            # not stored yet, there's nothing to mark as dirty
+            set_attr = object.__setattr__
+            created_at = datetime.now()
+            set_attr(self, 'id', ids.new_id())
+            set_attr(self, 'created_at', created_at)
+            set_attr(self, 'updated_at', created_at)
             storage.new(self)
 
+    @classmethod
+    def from_record(cls, record):
+        """
+        Returns an instance of cls built from record, the dictionary of a
+        stored instance (see `to_dict()`), without adding it to the
+        storage. It's the reload path of the storages, faster than
+        `cls(**record)` which copies record first.
+
+        Args:
+        -   record (dict): The attributes of the instance.
+        """
+        obj = cls.__new__(cls)
+        obj._fill(record)
+        return obj
+
+    @classmethod
+    def from_records(cls, records):
+        """
+        Yields an instance of cls built from each record (see
+        `from_record()`).
+
+        Args:
+        -   records (iterable): The dictionaries of stored instances.
+        """
+        return map(cls.from_record, records)
+
+    def _fill(self, record, set_attr=object.__setattr__):
+        """
+        Sets the attributes of record on a new instance with set_attr,
+        bypassing __setattr__ (a new instance has nothing to mark as
+        dirty), and parses its timestamps: updated_at reuses the
+        created_at datetime when they're written the same.
+
+        Args:
+        -   record (dict): The attributes, "__class__" is skipped.
+        -   set_attr (function): Sets an attribute of the instance.
+        """
+        for key, value in record.items():
+            if key != "__class__":
+                set_attr(self, key, value)
+        created_at = record.get("created_at")
+        if isinstance(created_at, str):
+            set_attr(self, "created_at", datetime.fromisoformat(created_at))
+        updated_at = record.get("updated_at")
+        if isinstance(updated_at, str):
+            if updated_at == created_at:
+                set_attr(self, "updated_at", self.created_at)
+            else:
+                set_attr(self, "updated_at",
+                         datetime.fromisoformat(updated_at))
+
+    def __setattr__(self, name, value):
+        """
+        Marks the instance as dirty in the storage and sets an attribute,
+        so the next save only re-serializes the objects that changed.
+        """
+        storage.touch(self)
+        super().__setattr__(name, value)
+
     def __str__(self):
         """
         A string representation of the BaseModel instance.
@@ -58,15 +119,38 @@ class BaseModel:
         self.updated_at = datetime.now()
         storage.save()
 
-    def to_dict(self):
+    def to_dict(self, memoize=True):
         """
         A dictionary representation of the BaseModel instance.
 
+        Formatting the timestamps is most of the cost, so their isoformat()
+        is memoized with the datetimes it was made from: it's reused for
+        as long as the instance holds those same (immutable) datetimes,
+        however the attributes were changed since, including through
+        `__dict__`. The other attributes are always copied afresh.
+
+        Args:
+        -   memoize (bool): Whether to keep the formatted timestamps, the
+                storage passes False for the entries it caches itself.
+
         Returns:
         -   _dict: A dictionary representation of the model instance.
         """
         _dict = self.__dict__.copy()
         _dict["__class__"] = self.__class__.__name__
-        _dict['created_at'] = _dict['created_at'].isoformat()
-        _dict['updated_at'] = _dict['updated_at'].isoformat()
+        created_at, updated_at = _dict['created_at'], _dict['updated_at']
+        try:
+            memo = self._isoformats
+        except AttributeError:
+            memo = None
+        if (memo is None or memo[0] is not created_at
+                or memo[1] is not updated_at):
+            created = created_at.isoformat()
+            updated = (created if updated_at is created_at
+                       else updated_at.isoformat())
+            memo = (created_at, updated_at, created, updated)
+            if memoize:
+                object.__setattr__(self, '_isoformats', memo)
+        _dict['created_at'] = memo[2]
+        _dict['updated_at'] = memo[3]
         return _dict
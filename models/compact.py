@@ -0,0 +1,338 @@
+#!/usr/bin/python3
+"""
+This module defines the compact versions of the models, for storages
+holding millions of instances.
+
+`compact(Place)` returns a class named Place whose instances keep the
+attributes declared on Place (plus id, created_at and updated_at) in
+slots instead of a per-instance __dict__:
+
+- An unset attribute reads as the class default, like on the model,
+    except that list defaults read as a new empty list instead of the
+    list shared by every instance.
+- The attributes added at runtime (e.g. by the console's update) are
+    kept in a small dictionary created on the first one.
+- `__dict__` is a live view of the attributes set on the instance, so
+    `to_dict()`, `__str__` and the storages work unchanged.
+- The values are shared when possible: the "<class>_id" references are
+    interned, and updated_at reuses created_at while they're equal.
+
+The storages and the console build compact instances when the
+HBNB_COMPACT_MODELS environment variable is "1". A compact instance
+isn't an instance of its model class (the model's __dict__ can't be
+removed from its subclasses), `obj.__class__.__name__` is the same.
+
+Memory per Place reloaded with 10 attributes set (id, created_at,
+updated_at, name, city_id, user_id, max_guest, price_by_night, latitude
+and longitude, for 100 cities and 1000 users), measured over 200k places
+by benchmarks/bench_compact.py on Python 3.11:
+
+    instances  bytes/object  instance + __dict__  reload
+    model               569            208 bytes  4.1 s
+    compact             351            152 bytes  6.1 s
+
+Most of the gain comes from the shared values, the slots themselves save
+little over the key-sharing dictionaries of Python 3.11. Building and
+setting compact instances is slower (their descriptors are Python code).
+"""
+import os
+import sys
+from collections.abc import MutableMapping
+import models.base_model as base_model
+
+# "1" builds compact (slotted) instances instead of the model classes
+HBNB_COMPACT_MODELS = os.getenv("HBNB_COMPACT_MODELS", "0") == "1"
+
+MISSING = object()
+# the attributes of every instance, set by BaseModel.__init__
+BASE_FIELDS = ('id', 'created_at', 'updated_at')
+_classes = {}
+
+
+def declared_fields(model):
+    """
+    Returns the attributes declared on model (and its bases) with their
+    defaults, i.e {'name': '', 'max_guest': 0, ...} for Place.
+    """
+    fields = {}
+    for base in reversed(model.__mro__):
+        for name, value in vars(base).items():
+            if (not name.startswith('_')
+                    and type(value) in (str, int, float, list)):
+                fields[name] = value
+    return fields
+
+
+def compact(model):
+    """
+    Returns the compact class of model (a BaseModel subclass), generated
+    on the first call.
+    """
+    cls = _classes.get(model)
+    if cls is not None:
+        return cls
+    defaults = declared_fields(model)
+    fields = BASE_FIELDS + tuple(name for name in defaults
+                                 if name not in BASE_FIELDS)
+    cls = type(model.__name__, (CompactModel,), {
+        '__slots__': tuple(f"_{name}" for name in fields),
+        '__module__': model.__module__,
+        '__qualname__': model.__qualname__,
+        '__doc__': model.__doc__,
+        '_model': model,
+    })
+    cls._slots = {name: vars(cls)[f"_{name}"] for name in fields}
+    for name in fields:
+        if name.endswith('_id'):
+            kind = ReferenceField
+        elif name == 'updated_at':
+            kind = UpdatedAtField
+        else:
+            kind = Field
+        setattr(cls, name,
+                kind(name, cls._slots[name], defaults.get(name, MISSING)))
+    _classes[model] = cls
+    return cls
+
+
+class Field:
+    """
+    A declared attribute of a compact class, kept in a slot. Read on the
+    class it's the model's default, like the model's class attribute.
+
+    Attributes:
+    -   name (str): The attribute name.
+    -   slot: The descriptor of the slot holding the value.
+    -   default: The model's default (MISSING for id and the dates).
+    """
+
+    __slots__ = ('name', 'slot', 'default')
+
+    def __init__(self, name, slot, default):
+        """Sets the attributes (see the class docstring)"""
+        self.name = name
+        self.slot = slot
+        self.default = default
+
+    def __get__(self, obj, owner=None):
+        """Returns the value of the slot, or the default if it's unset"""
+        if obj is not None:
+            try:
+                return self.slot.__get__(obj, owner)
+            except AttributeError:
+                pass
+        default = self.default
+        if default is MISSING:
+            raise AttributeError(self.name)
+        if obj is not None and type(default) is list:
+            return []
+        return default
+
+    def __set__(self, obj, value):
+        """Sets the slot"""
+        self.slot.__set__(obj, value)
+
+    def __delete__(self, obj):
+        """Empties the slot"""
+        self.slot.__delete__(obj)
+
+
+class ReferenceField(Field):
+    """
+    A field holding the id of another instance ("<class>_id"). The ids are
+    interned, so the instances referencing the same one share its string
+    instead of each holding the copy read from the file.
+    """
+
+    __slots__ = ()
+
+    def __set__(self, obj, value):
+        """Sets the slot to the interned value"""
+        if type(value) is str:
+            value = sys.intern(value)
+        self.slot.__set__(obj, value)
+
+
+class UpdatedAtField(Field):
+    """
+    The updated_at field, which shares the created_at datetime while
+    they're equal (e.g. for instances never updated since).
+    """
+
+    __slots__ = ()
+
+    def __set__(self, obj, value):
+        """Sets the slot, to the created_at datetime if it's equal"""
+        created_at = getattr(obj, 'created_at', None)
+        if value == created_at:
+            value = created_at
+        self.slot.__set__(obj, value)
+
+
+class CompactModel:
+    """
+    The base class of the compact classes (see `compact()`), with the
+    methods of BaseModel.
+
+    Attributes:
+    -   _model (type): The model class (set on each compact class).
+    -   _slots (dict): The slot descriptor of each declared attribute,
+            in order (set on each compact class).
+    -   _extra (dict): The attributes added at runtime (unset until the
+            first one).
+    -   _isoformats (tuple): The timestamps memoized by `to_dict()`.
+    """
+
+    __slots__ = ('_extra', '_isoformats')
+    _model = None
+    _slots = {}
+
+    __init__ = base_model.BaseModel.__init__
+    from_record = classmethod(base_model.BaseModel.from_record.__func__)
+    from_records = classmethod(base_model.BaseModel.from_records.__func__)
+    __str__ = base_model.BaseModel.__str__
+    save = base_model.BaseModel.save
+    to_dict = base_model.BaseModel.to_dict
+
+    def _fill(self, record):
+        """
+        Sets the attributes of record on a new instance, like
+        `BaseModel._fill()` but through the slots and extra attributes.
+        """
+        base_model.BaseModel._fill(self, record, _set)
+
+    @property
+    def __dict__(self):
+        """The attributes set on the instance, as a live dictionary"""
+        return Attributes(self)
+
+    def __setattr__(self, name, value):
+        """
+        Marks the instance as dirty in the storage and sets an attribute,
+        in its slot or in the extra attributes.
+        """
+        base_model.storage.touch(self)
+        if name in self._slots:
+            object.__setattr__(self, name, value)
+        else:
+            Attributes(self)[name] = value
+
+    def __getattr__(self, name):
+        """Returns an attribute added at runtime"""
+        try:
+            return _EXTRA.__get__(self)[name]
+        except (AttributeError, KeyError):
+            raise AttributeError(f"'{type(self).__name__}' object has no "
+                                 f"attribute '{name}'") from None
+
+    def __delattr__(self, name):
+        """Marks the instance as dirty and removes an attribute"""
+        base_model.storage.touch(self)
+        try:
+            del Attributes(self)[name]
+        except KeyError:
+            raise AttributeError(name) from None
+
+
+_EXTRA = CompactModel._extra
+
+
+def _set(obj, name, value):
+    """
+    Sets an attribute of a compact instance without marking it dirty,
+    through the Field of a declared attribute (which interns the ids).
+    """
+    if name in type(obj)._slots:
+        object.__setattr__(obj, name, value)
+    else:
+        Attributes(obj)[name] = value
+
+
+class Attributes(MutableMapping):
+    """
+    The attributes set on a compact instance, as a dictionary: the
+    declared ones in order, then the ones added at runtime. Changes
+    don't mark the instance as dirty, like changes of a __dict__.
+    """
+
+    __slots__ = ('obj',)
+
+    def __init__(self, obj):
+        """
+        Args:
+        -   obj (CompactModel): The compact instance.
+        """
+        self.obj = obj
+
+    def __getitem__(self, name):
+        """Returns the value of an attribute set on the instance"""
+        slot = type(self.obj)._slots.get(name)
+        try:
+            if slot is not None:
+                return slot.__get__(self.obj)
+            return _EXTRA.__get__(self.obj)[name]
+        except AttributeError:
+            raise KeyError(name) from None
+
+    def __setitem__(self, name, value):
+        """Sets an attribute of the instance"""
+        slot = type(self.obj)._slots.get(name)
+        if slot is not None:
+            slot.__set__(self.obj, value)
+            return
+        try:
+            extra = _EXTRA.__get__(self.obj)
+        except AttributeError:
+            extra = {}
+            _EXTRA.__set__(self.obj, extra)
+        extra[name] = value
+
+    def __delitem__(self, name):
+        """Removes an attribute from the instance"""
+        slot = type(self.obj)._slots.get(name)
+        try:
+            if slot is not None:
+                slot.__delete__(self.obj)
+            else:
+                del _EXTRA.__get__(self.obj)[name]
+        except AttributeError:
+            raise KeyError(name) from None
+
+    def __iter__(self):
+        """Yields the names of the attributes set on the instance"""
+        obj = self.obj
+        for name, slot in type(obj)._slots.items():
+            try:
+                slot.__get__(obj)
+            except AttributeError:
+                continue
+            yield name
+        try:
+            yield from list(_EXTRA.__get__(obj))
+        except AttributeError:
+            pass
+
+    def __len__(self):
+        """Returns how many attributes are set on the instance"""
+        return sum(1 for _ in self)
+
+    def copy(self):
+        """Returns the attributes as a dict"""
+        return dict(self.items())
+
+    def clear(self):
+        """Removes every attribute from the instance"""
+        obj = self.obj
+        for slot in type(obj)._slots.values():
+            try:
+                slot.__delete__(obj)
+            except AttributeError:
+                pass
+        try:
+            _EXTRA.__delete__(obj)
+        except AttributeError:
+            pass
+
+    def __repr__(self):
+        """Returns the attributes printed as a dict"""
+        return repr(self.copy())
@@ -0,0 +1,948 @@
+#!/usr/bin/python3
+"""This module defines a class to manage database storage for hbnb clone"""
+import heapq
+import json
+import os
+import re
+import sqlite3
+from contextlib import contextmanager
+from models.engine.file_storage import HBNB_ENV
+from models.engine.importers import batches, prepare
+from models.engine.indexes import (
+    PLACE_COLUMNS, AggregateIndex, ColumnIndex, aggregate_view,
+    bounding_box, foreign_key, haversine, numeric_field, rank, text_fields,
+    tokenize
+)
+from models.engine.query import (
+    OPERATORS, Plan, check_conditions, matches, top_k
+)
+
+# path of the SQLite database file
+HBNB_SQLITE_PATH = os.getenv("HBNB_SQLITE_PATH", "hbnb.db")
+
+SQL_TYPES = {str: 'TEXT', int: 'INTEGER', float: 'REAL', list: 'TEXT'}
+
+
+class DBStorage:
+    """
+    Manage the class instances in a SQLite database.
+
+    Each model has its own table, with a column per attribute declared on
+    the class, an `extra` Json column for the attributes added at runtime,
+    an index on every foreign key (`*_id`) and integer column, and one on
+    the coordinates of places. Rows are only read
+    when they are asked for, and turned into instances once: an instance
+    stays the same object for as long as the storage lives.
+
+    Changes are written to the database (flushed) before any query, and
+    committed on `save()`.
+
+    Attributes:
+    -   __path (str): The path to the database file.
+    -   __connection (sqlite3.Connection): The database connection.
+    -   __objects (dict): The instances read or added so far, keyed by
+            "<className>.id".
+    -   __pending (dict): Keys changed since the last flush, mapped to the
+            object to write or None for a deletion.
+    -   __batch_depth (int): How many batches are open, commits are
+            deferred until the outermost one is committed.
+    -   __undo (dict): The stored object and a copy of its attributes from
+            before its first change inside the open batch (or None for
+            objects added by the batch).
+    -   __saved_pending (dict): __pending as it was when the batch began.
+    -   __classes (dict): The model classes by name, imported once.
+    -   __declared (dict): The declared attributes of each class, with
+            their defaults (see `__columns()`).
+    -   __readers (dict): The `from_record()` of each class name, and the
+            names of its list columns (decoded from Json).
+    """
+
+    __path = None
+    __connection = None
+    __classes = None
+    __declared = {}
+    __readers = {}
+
+    def __init__(self, path=None):
+        """
+        Opens the database, dropping every table in the test environment.
+
+        Args:
+        -   path (str): The database file (defaults to $HBNB_SQLITE_PATH).
+        """
+        self.__path = path or HBNB_SQLITE_PATH
+        self.__connection = sqlite3.connect(self.__path, isolation_level=None)
+        self.__connection.row_factory = sqlite3.Row
+        self.__objects = {}
+        self.__pending = {}
+        self.__batch_depth = 0
+        self.__undo = {}
+        self.__saved_pending = {}
+        if HBNB_ENV == "test":
+            for name in self.__model_classes():
+                self.__connection.execute(f'DROP TABLE IF EXISTS "{name}"')
+
+    def all(self, cls=None):
+        """
+        Returns A dictionary containing all instances, or only the
+        instances of cls (none if it isn't a model class).
+
+        Args:
+        -   cls (type | str): The class (or class name) to filter on.
+        """
+        self.__flush()
+        objs = {}
+        for name in self.__names(cls):
+            for row in self.__connection.execute(f'SELECT * FROM "{name}"'):
+                obj = self.__instance(name, row)
+                objs[f"{name}.{obj.id}"] = obj
+        return objs
+
+    def page(self, cls=None, limit=None, offset=0, after=None):
+        """
+        Yields the instances of cls (or every instance) in the order of
+        their keys, so by class name then id, read a row at a time with
+        the primary key index of each table.
+
+        Args:
+        -   cls (type | str): The class (or class name) to list.
+        -   limit (int): The maximum number of instances (None for all).
+        -   offset (int): How many instances are skipped.
+        -   after (str): The key ("<className>.id") of the last instance of
+                the previous page, the page starts after it (a cursor).
+        """
+        if cls is None:
+            names = sorted(self.__model_classes())
+        else:
+            names = [self.__cls_name(cls)]
+            self.__model(names[0])
+        after_name, _, after_id = (after or '').partition('.')
+        self.__flush()
+        for name in names:
+            if limit is not None and limit <= 0:
+                return
+            if after and name < after_name:
+                continue
+            where, params = ('WHERE id > ?', [after_id]) \
+                if after and name == after_name else ('', [])
+            skipped = 0
+            if offset:
+                skipped = min(offset, self.__connection.execute(
+                    f'SELECT COUNT(*) FROM "{name}" {where}', params
+                ).fetchone()[0])
+                offset -= skipped
+            rows = self.__connection.execute(
+                f'SELECT * FROM "{name}" {where} ORDER BY id '
+                'LIMIT ? OFFSET ?',
+                params + [-1 if limit is None else limit, skipped]
+            )
+            for row in rows:
+                if limit is not None:
+                    limit -= 1
+                yield self.__instance(name, row)
+
+    def get(self, cls, id):
+        """
+        Returns the instance of cls with the given id, or None.
+
+        Args:
+        -   cls (type | str): The class (or class name) of the instance.
+        -   id (str): The instance id.
+        """
+        name = self.__cls_name(cls)
+        key = f"{name}.{id}"
+        if key in self.__objects:
+            return self.__objects[key]
+        if key in self.__pending or name not in self.__model_classes():
+            return None
+        row = self.__connection.execute(
+            f'SELECT * FROM "{name}" WHERE id = ?', (id,)
+        ).fetchone()
+        return None if row is None else self.__instance(name, row)
+
+    def count(self, cls=None):
+        """
+        Returns the number of stored instances, or of instances of cls (0
+        if it isn't a model class).
+
+        Args:
+        -   cls (type | str): The class (or class name) to count.
+        """
+        self.__flush()
+        return sum(
+            self.__connection.execute(
+                f'SELECT COUNT(*) FROM "{name}"'
+            ).fetchone()[0]
+            for name in self.__names(cls)
+        )
+
+    def related(self, obj, cls):
+        """
+        Returns the instances of cls referencing obj through their
+        "<obj class>_id" attribute (e.g. the cities of a state), found
+        with the index of that column.
+
+        Args:
+        -   obj (BaseModel): The referenced object.
+        -   cls (type | str): The class (or class name) of the instances.
+
+        Raises:
+        -   ValueError: If cls has no attribute referencing obj's class.
+        """
+        name = self.__cls_name(cls)
+        field = foreign_key(self.__model(name), obj.__class__)
+        self.__flush()
+        objs = {}
+        for row in self.__connection.execute(
+            f'SELECT * FROM "{name}" WHERE "{field}" = ?', (obj.id,)
+        ):
+            objs[f"{name}.{row['id']}"] = self.__instance(name, row)
+        return objs
+
+    def ids_in_range(self, cls, field, low=None, high=None):
+        """
+        Returns the ids of the instances of cls whose field is between low
+        and high, ordered by that field (then by id). Unset fields hold
+        the class default.
+
+        Args:
+        -   cls (type | str): The class (or class name) of the instances.
+        -   field (str): A numeric attribute (i.e "price_by_night").
+        -   low (int | float): The lowest value (None for no bound).
+        -   high (int | float): The highest value (None for no bound).
+
+        Raises:
+        -   ValueError: If field isn't a numeric attribute of cls.
+        """
+        name = self.__cls_name(cls)
+        model = self.__model(name)
+        numeric_field(model, field)
+        default = getattr(model, field)
+        where = [f"typeof(\"{field}\") IN ('integer', 'real')"]
+        params = []
+        if low is not None:
+            where.append(f'"{field}" >= ?')
+            params.append(low)
+        if high is not None:
+            where.append(f'"{field}" <= ?')
+            params.append(high)
+        where = ' AND '.join(where)
+        if ((low is None or low <= default)
+                and (high is None or default <= high)):
+            where = f'({where}) OR "{field}" IS NULL'
+        self.__flush()
+        return [row['id'] for row in self.__connection.execute(
+            f'SELECT id FROM "{name}" WHERE {where} '
+            f'ORDER BY COALESCE("{field}", ?), id', params + [default]
+        )]
+
+    def places_near(self, lat, lon, radius_km, limit=None):
+        """
+        Returns the places within radius_km of (lat, lon), nearest first,
+        found with the index of their coordinates.
+
+        Args:
+        -   lat (float): The latitude of the center.
+        -   lon (float): The longitude of the center.
+        -   radius_km (float): The search radius in kilometers.
+        -   limit (int): The maximum number of places returned.
+        """
+        south, north, west, east = bounding_box(lat, lon, radius_km)
+        if west <= east:
+            lon_range = 'longitude BETWEEN ? AND ?'
+        else:
+            lon_range = '(longitude >= ? OR longitude <= ?)'
+        self.__flush()
+        found = []
+        for row in self.__connection.execute(
+            f'SELECT * FROM "Place" WHERE latitude BETWEEN ? AND ? '
+            f'AND {lon_range}', (south, north, west, east)
+        ):
+            p_lat, p_lon = row['latitude'], row['longitude']
+            if p_lat == 0 and p_lon == 0:
+                continue
+            distance = haversine(lat, lon, p_lat, p_lon)
+            if distance <= radius_km:
+                found.append((distance, row['id'], row))
+        if limit is None:
+            found.sort(key=lambda item: item[:2])
+        else:
+            found = heapq.nsmallest(limit, found, key=lambda item: item[:2])
+        return {
+            f"Place.{row['id']}": self.__instance('Place', row)
+            for _, _, row in found
+        }
+
+    def places_with_amenities(self, amenity_ids):
+        """
+        Returns the places offering every amenity of amenity_ids (or every
+        place if it's empty).
+
+        Args:
+        -   amenity_ids (list): The ids of the amenities.
+        """
+        if not amenity_ids:
+            return self.all('Place')
+        ids = list(dict.fromkeys(amenity_ids))
+        self.__flush()
+        rows = self.__connection.execute(
+            'SELECT * FROM "Place" WHERE id IN ('
+            'SELECT p.id FROM "Place" p, json_each(CASE WHEN '
+            "json_valid(p.amenity_ids) AND json_type(p.amenity_ids) = 'array'"
+            ' THEN p.amenity_ids END) a '
+            f'WHERE a.value IN ({", ".join("?" * len(ids))}) '
+            'GROUP BY p.id HAVING COUNT(DISTINCT a.value) = ?'
+            ') ORDER BY rowid', ids + [len(ids)]
+        )
+        return {
+            f"Place.{row['id']}": self.__instance('Place', row)
+            for row in rows
+        }
+
+    def search(self, cls, text, mode='and', limit=None):
+        """
+        Returns the instances of cls holding every word of text ("and")
+        or any of them ("or") in their text attributes, ranked by how
+        often the words appear. The rows are preselected with LIKE, then
+        tokenized like the file storage index does.
+
+        Args:
+        -   cls (type | str): The class (or class name), Place or Review.
+        -   text (str): The words to look for.
+        -   mode (str): "and" or "or".
+        -   limit (int): The maximum number of instances returned.
+
+        Raises:
+        -   ValueError: If cls has no text attributes or mode is unknown.
+        """
+        name = self.__cls_name(cls)
+        fields = text_fields(self.__model(name))
+        if mode not in ('and', 'or'):
+            raise ValueError(f"Unknown search mode: {mode}")
+        words = list(dict.fromkeys(tokenize(text)))
+        if not words:
+            return {}
+        body = " || ' ' || ".join(f'COALESCE("{f}", \'\')' for f in fields)
+        where = f' {mode.upper()} '.join([f'({body}) LIKE ?'] * len(words))
+        self.__flush()
+        rows = {}
+        postings = {word: {} for word in words}
+        for row in self.__connection.execute(
+            f'SELECT * FROM "{name}" WHERE {where}',
+            [f'%{word}%' for word in words]
+        ):
+            key = f"{name}.{row['id']}"
+            rows[key] = row
+            for word in tokenize(' '.join(
+                row[f] for f in fields if type(row[f]) is str
+            )):
+                if word in postings:
+                    postings[word][key] = postings[word].get(key, 0) + 1
+        return {
+            key: self.__instance(name, rows[key])
+            for key in rank(list(postings.values()), mode)[:limit]
+        }
+
+    def place_columns(self):
+        """
+        Returns a columnar copy of the numeric attributes of the places
+        grouped by city_id (a ColumnIndex, see `indexes.PLACE_COLUMNS`),
+        read from the table by a single query on every call.
+        """
+        model = self.__model('Place')
+        columns = ', '.join(f'"{field}"' for field in PLACE_COLUMNS)
+        self.__flush()
+        index = ColumnIndex(model, PLACE_COLUMNS)
+        index.sync({
+            row[0]: {f: v for f, v in zip(PLACE_COLUMNS, row[1:])
+                     if v is not None}
+            for row in self.__connection.execute(
+                f'SELECT id, {columns} FROM "Place"'
+            )
+        })
+        return index
+
+    def aggregate(self, name):
+        """
+        Returns the aggregate view called name (see `indexes.AGGREGATES`),
+        as a {group: value} dictionary, computed by a GROUP BY query over
+        the indexed group column (joined to the rolled up class, if any).
+
+        Raises:
+        -   ValueError: If there's no such view, or it reads attributes
+                that have no column.
+        """
+        cls_name, group, operation, field, rollup = aggregate_view(name)
+        columns = self.__columns(self.__model(cls_name))
+        for column in (group, field):
+            if column is not None and column not in columns:
+                raise ValueError(f"{cls_name}.{column} has no column")
+        params = {'group': columns[group], 'field': columns.get(field)}
+        key = f'COALESCE(t."{group}", :group)'
+        number = 'NULL'
+        if field is not None:
+            number = f'COALESCE(t."{field}", :field)'
+            number = (f"CASE WHEN typeof({number}) IN ('integer', 'real') "
+                      f"THEN {number} END")
+        join = ''
+        if rollup is not None:
+            parent_cls, parent_field = rollup
+            parent_columns = self.__columns(self.__model(parent_cls))
+            if parent_field not in parent_columns:
+                raise ValueError(f"{parent_cls}.{parent_field} has no column")
+            join = f' JOIN "{parent_cls}" AS p ON p.id = {key}'
+            key = f'COALESCE(p."{parent_field}", :parent)'
+            params['parent'] = parent_columns[parent_field]
+        counts, sums, numbers = {}, {}, {}
+        self.__flush()
+        for group_value, count, total, found in self.__connection.execute(
+            'SELECT key, COUNT(*), SUM(number), COUNT(number) FROM ('
+            f'SELECT {key} AS key, {number} AS number '
+            f'FROM "{cls_name}" AS t{join}) GROUP BY key', params
+        ):
+            if group_value is None or group_value == '':
+                continue
+            counts[group_value] = count
+            if found:
+                sums[group_value], numbers[group_value] = total, found
+        return AggregateIndex.combine(operation, counts, sums, numbers)
+
+    def where(self, cls, conditions):
+        """
+        Returns the instances of cls meeting every condition. The
+        conditions on declared attributes are checked by SQLite, which
+        picks the column index to use, and every condition is checked
+        again on the instances read.
+
+        Args:
+        -   cls (type | str): The class (or class name) of the instances.
+        -   conditions (list): The (attribute, operator, value) conditions,
+                see `query`.
+
+        Raises:
+        -   ValueError: If cls or an operator is unknown.
+        """
+        name = self.__cls_name(cls)
+        conditions = check_conditions(conditions)
+        where, params = self.__sql_filter(self.__model(name), conditions)
+        self.__flush()
+        objs = {}
+        for row in self.__connection.execute(
+            f'SELECT * FROM "{name}" WHERE {where}', params
+        ):
+            obj = self.__instance(name, row)
+            if matches(obj, conditions):
+                objs[f"{name}.{obj.id}"] = obj
+        return objs
+
+    def top_k(self, cls, field, k, descending=False, conditions=None):
+        """
+        Returns the k instances of cls with the smallest field (the
+        largest if descending) meeting every condition, in order, ties
+        broken by id. Instances without the field are left out, and so
+        are the values of a numeric field that aren't numbers.
+
+        A column is ordered by SQLite, which keeps the first k rows of
+        the ORDER BY ... LIMIT in a bounded sorter (O(n log k)). The rows
+        are checked again against every condition, and read again with a
+        larger limit if too many are left out. The other attributes go
+        through a heap of k instances.
+
+        Args:
+        -   cls (type | str): The class (or class name) of the instances.
+        -   field (str): The attribute ordering the instances.
+        -   k (int): How many instances are returned (at most).
+        -   descending (bool): Whether the largest values come first.
+        -   conditions (list): The (attribute, operator, value) conditions,
+                see `query`.
+
+        Returns:
+        -   dict: The instances by key, in order.
+
+        Raises:
+        -   ValueError: If cls or an operator is unknown, or values of the
+                field can't be compared.
+        """
+        name = self.__cls_name(cls)
+        model = self.__model(name)
+        conditions = check_conditions(conditions or [])
+        columns = {'id': None, 'created_at': None, 'updated_at': None,
+                   **self.__columns(model)}
+        default = columns.get(field, [])
+        numeric = type(default) in (int, float)
+        if type(default) is list:
+            candidates = self.where(name, conditions) if conditions \
+                else self.all(name)
+            return dict(top_k(candidates.items(), field, k, descending,
+                              numeric))
+        where, params = self.__sql_filter(model, conditions)
+        if default is None:
+            where += f' AND "{field}" IS NOT NULL'
+            order = f'"{field}"'
+        else:
+            order = f'COALESCE("{field}", ?)'
+            params.append(default)
+        if numeric:
+            where += (f" AND (typeof(\"{field}\") IN ('integer', 'real')"
+                      f' OR "{field}" IS NULL)')
+        direction = 'DESC' if descending else 'ASC'
+        query = (f'SELECT * FROM "{name}" WHERE {where} '
+                 f'ORDER BY {order} {direction}, id {direction} LIMIT ?')
+        self.__flush()
+        limit = k
+        while True:
+            rows = self.__connection.execute(query,
+                                             params + [limit]).fetchall()
+            objs = {}
+            for row in rows:
+                obj = self.__instance(name, row)
+                if len(objs) < k and matches(obj, conditions):
+                    objs[f"{name}.{obj.id}"] = obj
+            if len(objs) >= k or len(rows) < limit:
+                return objs
+            limit *= 4
+
+    def explain(self, cls, conditions):
+        """
+        Returns the Plan of `where(cls, conditions)`: the index SQLite
+        reads (from EXPLAIN QUERY PLAN) and how many rows it returns.
+
+        Raises:
+        -   ValueError: If cls or an operator is unknown.
+        """
+        name = self.__cls_name(cls)
+        conditions = check_conditions(conditions)
+        where, params = self.__sql_filter(self.__model(name), conditions)
+        self.__flush()
+        query = f'FROM "{name}" WHERE {where}'
+        details = ' '.join(row['detail'] for row in self.__connection.execute(
+            f'EXPLAIN QUERY PLAN SELECT * {query}', params
+        ))
+        indexes = re.findall(r'USING (?:COVERING )?INDEX (\w+)', details)
+        access = 'scan'
+        if indexes:
+            access = 'index ' + ', '.join(dict.fromkeys(indexes))
+        estimate = self.__connection.execute(
+            f'SELECT COUNT(*) {query}', params
+        ).fetchone()[0]
+        return Plan(name, access, None, estimate, self.count(name),
+                    conditions)
+
+    def new(self, obj):
+        """
+        Adds obj to the storage, it's written on the next flush.
+
+        Args:
+        -   obj (BaseModel): The object to be added.
+        """
+        key = f"{obj.__class__.__name__}.{obj.id}"
+        if self.__batch_depth:
+            self.__keep_undo(key, self.__objects.get(key))
+        self.__objects[key] = obj
+        self.__pending[key] = obj
+
+    def bulk_load(self, cls, records, batch_size=10000):
+        """
+        Inserts a row for each record, hydrated and written batch_size
+        records at a time by one statement, and commits once at the end.
+        The records are checked and completed by `importers.prepare()`,
+        and a record with the id of a stored instance replaces it. The
+        new instances aren't kept, they're read again when asked for.
+
+        Args:
+        -   cls (type | str): The class (or class name) of the instances.
+        -   records (iterable): The dictionaries of their attributes, i.e
+                streamed from a file by `importers.read_records()`.
+        -   batch_size (int): How many records are written at a time.
+
+        Returns:
+        -   int: The number of rows inserted.
+
+        Raises:
+        -   ValueError: If cls is unknown or a record is invalid, nothing
+                is inserted then.
+        """
+        name = self.__cls_name(cls)
+        model = self.__model(name)
+        count = 0
+        with self.batch():
+            # a pending write of an imported id must not overwrite it later
+            self.__flush()
+            for batch in batches(prepare(model, records), batch_size):
+                rows = [self.__row(model, obj)
+                        for obj in model.from_records(batch)]
+                columns = ', '.join(f'"{col}"' for col in rows[0])
+                self.__connection.executemany(
+                    f'INSERT OR REPLACE INTO "{name}" ({columns}) '
+                    f'VALUES ({", ".join("?" * len(rows[0]))})',
+                    [list(row.values()) for row in rows]
+                )
+                for row in rows:
+                    key = f"{name}.{row['id']}"
+                    if key in self.__objects:
+                        self.__keep_undo(key, self.__objects.pop(key))
+                count += len(batch)
+        return count
+
+    def touch(self, obj):
+        """
+        Marks a stored obj as dirty so the next flush writes it.
+        It's called right before obj changes.
+
+        Args:
+        -   obj (BaseModel): The object about to change.
+        """
+        key = f"{obj.__class__.__name__}.{getattr(obj, 'id', None)}"
+        if self.__objects.get(key) is obj:
+            if self.__batch_depth:
+                self.__keep_undo(key, obj)
+            self.__pending[key] = obj
+
+    def delete(self, obj=None):
+        """
+        Removes obj from the storage if it's inside.
+
+        Args:
+        -   obj (BaseModel): The object to be removed.
+
+        Returns:
+        -   The removed object or None if it wasn't stored.
+        """
+        if obj is None:
+            return None
+        key = f"{obj.__class__.__name__}.{obj.id}"
+        if self.get(obj.__class__, obj.id) is not obj:
+            return None
+        if self.__batch_depth:
+            self.__keep_undo(key, obj)
+        del self.__objects[key]
+        self.__pending[key] = None
+        return obj
+
+    def save(self):
+        """Commits every change to the database (deferred inside a batch)"""
+        if self.__batch_depth:
+            return
+        self.__flush()
+        if self.__connection.in_transaction:
+            self.__connection.execute('COMMIT')
+
+    def reload(self):
+        """
+        Creates the missing tables, writes the pending changes (committed
+        with the next save) and forgets the instances read so far.
+        """
+        for name, cls in self.__model_classes().items():
+            columns = self.__columns(cls)
+            defs = ', '.join(
+                f'"{col}" {SQL_TYPES.get(type(default), "")}'.rstrip()
+                for col, default in columns.items()
+            )
+            self.__connection.execute(
+                f'CREATE TABLE IF NOT EXISTS "{name}" ('
+                'id TEXT PRIMARY KEY, created_at TEXT, updated_at TEXT'
+                f'{", " + defs if defs else ""}, extra TEXT)'
+            )
+            for col, default in columns.items():
+                if col.endswith('_id') or type(default) is int:
+                    self.__connection.execute(
+                        f'CREATE INDEX IF NOT EXISTS "{name}_{col}" '
+                        f'ON "{name}" ("{col}")'
+                    )
+            if {'latitude', 'longitude'} <= columns.keys():
+                self.__connection.execute(
+                    f'CREATE INDEX IF NOT EXISTS "{name}_location" '
+                    f'ON "{name}" (latitude, longitude)'
+                )
+        self.__flush()
+        self.__objects = {}
+
+    def close(self):
+        """Closes the database connection"""
+        self.__connection.close()
+
+    def begin(self):
+        """
+        Opens a batch: commits are deferred until the batch is committed.
+        Nested batches join the outermost one.
+        """
+        if not self.__batch_depth:
+            self.__flush()
+            self.__undo = {}
+            self.__saved_pending = self.__pending.copy()
+            if not self.__connection.in_transaction:
+                self.__connection.execute('BEGIN')
+            self.__connection.execute('SAVEPOINT batch')
+        self.__batch_depth += 1
+
+    def in_batch(self):
+        """Returns True if a batch is open"""
+        return self.__batch_depth > 0
+
+    def commit(self):
+        """
+        Closes the innermost batch, and commits every deferred change once
+        the outermost batch is closed.
+        """
+        if not self.__batch_depth:
+            return
+        self.__batch_depth -= 1
+        if not self.__batch_depth:
+            self.__undo = {}
+            self.__flush()
+            self.__connection.execute('RELEASE batch')
+            self.save()
+
+    def rollback(self):
+        """
+        Discards the open batch: the database and every object changed
+        inside the batch are restored to their state when it began.
+        """
+        if not self.__batch_depth:
+            return
+        self.__connection.execute('ROLLBACK TO batch')
+        self.__connection.execute('RELEASE batch')
+        self.__restore(self.__undo)
+        self.__pending = self.__saved_pending
+        self.__undo = {}
+        self.__batch_depth = 0
+
+    @contextmanager
+    def batch(self):
+        """
+        Groups changes so they are committed once at the end of the block.
+        The changes are rolled back if an exception escapes the block.
+        Inside an open batch, the block is a savepoint: only its own
+        changes are rolled back, and the batch stays open.
+        """
+        if not self.__batch_depth:
+            self.begin()
+            try:
+                yield self
+            except BaseException:
+                self.rollback()
+                raise
+            self.commit()
+            return
+        # the block keeps its own undo log, merged into the batch's one
+        self.__flush()
+        savepoint = f'batch{self.__batch_depth}'
+        self.__connection.execute(f'SAVEPOINT {savepoint}')
+        undo = self.__undo
+        self.__undo = {}
+        self.__batch_depth += 1
+        try:
+            yield self
+        except BaseException:
+            self.__connection.execute(f'ROLLBACK TO {savepoint}')
+            self.__restore(self.__undo)
+            self.__pending = {}
+            raise
+        else:
+            for key, state in self.__undo.items():
+                undo.setdefault(key, state)
+        finally:
+            self.__connection.execute(f'RELEASE {savepoint}')
+            self.__undo = undo
+            self.__batch_depth -= 1
+
+    def __flush(self):
+        """Writes the pending changes to the database (without commit)"""
+        if not self.__pending:
+            return
+        if not self.__connection.in_transaction:
+            self.__connection.execute('BEGIN')
+        classes = self.__model_classes()
+        for key, obj in self.__pending.items():
+            name, _, obj_id = key.partition('.')
+            if obj is None:
+                self.__connection.execute(
+                    f'DELETE FROM "{name}" WHERE id = ?', (obj_id,)
+                )
+                continue
+            row = self.__row(classes[name], obj)
+            columns = ', '.join(f'"{col}"' for col in row)
+            self.__connection.execute(
+                f'INSERT OR REPLACE INTO "{name}" ({columns}) '
+                f'VALUES ({", ".join("?" * len(row))})',
+                list(row.values())
+            )
+        self.__pending = {}
+
+    def __row(self, cls, obj):
+        """Returns the column values of obj"""
+        attrs = obj.__dict__.copy()
+        row = {
+            'id': attrs.pop('id'),
+            'created_at': attrs.pop('created_at').isoformat(),
+            'updated_at': attrs.pop('updated_at').isoformat(),
+        }
+        for col in self.__columns(cls):
+            value = attrs.pop(col, None)
+            row[col] = json.dumps(value) if type(value) is list else value
+        row['extra'] = json.dumps(attrs) if attrs else None
+        return row
+
+    def __instance(self, name, row):
+        """
+        Returns the instance stored in row, built on its first read.
+        """
+        key = f"{name}.{row['id']}"
+        obj = self.__objects.get(key)
+        if obj is not None:
+            return obj
+        reader = DBStorage.__readers.get(name)
+        if reader is None:
+            cls = self.__model_classes()[name]
+            lists = {col for col, default in self.__columns(cls).items()
+                     if type(default) is list}
+            reader = DBStorage.__readers[name] = (cls.from_record, lists)
+        from_record, lists = reader
+        record = {}
+        for col in row.keys():
+            value = row[col]
+            if value is None or col == 'extra':
+                continue
+            if col in lists:
+                value = json.loads(value)
+            record[col] = value
+        if row['extra']:
+            record.update(json.loads(row['extra']))
+        obj = from_record(record)
+        self.__objects[key] = obj
+        return obj
+
+    def __model(self, name):
+        """
+        Returns the model class called name.
+
+        Raises:
+        -   ValueError: If there's no such class.
+        """
+        model = self.__model_classes().get(name)
+        if model is None:
+            raise ValueError(f"Unknown class: {name}")
+        return model
+
+    def __sql_filter(self, cls, conditions):
+        """
+        Returns the SQL condition (and its parameters) selecting the rows
+        that may meet conditions. Only the conditions on declared columns
+        with values of the column's type are translated, and NULL columns
+        are kept when the class default meets the condition. A "has"
+        condition on a list column counts the values found in its Json
+        array.
+        """
+        columns = {'id': None, **self.__columns(cls)}
+        clauses, params = [], []
+        for field, op, value in conditions:
+            if field not in columns or op == '!=':
+                continue
+            default = columns[field]
+            if type(default) is list:
+                values = list(dict.fromkeys(value)) if op == 'has' else []
+                if not values or not all(type(v) in (str, int, float)
+                                         for v in values):
+                    continue
+                clauses.append(
+                    '(SELECT COUNT(DISTINCT a.value) FROM json_each(CASE '
+                    f'WHEN json_valid("{field}") AND json_type("{field}") '
+                    f"= 'array' THEN \"{field}\" END) a WHERE a.value IN "
+                    f'({", ".join("?" * len(values))})) = ?'
+                )
+                params.extend(values + [len(values)])
+                continue
+            kinds = (int, float) if type(default) in (int, float) else (str,)
+            values = value if op == 'in' else [value]
+            if not values or not all(type(v) in kinds for v in values):
+                continue
+            if op == 'in':
+                clause = f'"{field}" IN ({", ".join("?" * len(values))})'
+            else:
+                clause = f'"{field}" {"=" if op == "==" else op} ?'
+            try:
+                if default is not None and OPERATORS[op](default, value):
+                    clause = f'({clause} OR "{field}" IS NULL)'
+            except TypeError:
+                pass
+            clauses.append(clause)
+            params.extend(values)
+        return ' AND '.join(clauses) or '1', params
+
+    def __keep_undo(self, key, obj):
+        """Records the state of key before its first change in the batch"""
+        if key not in self.__undo:
+            attrs = None if obj is None else obj.__dict__.copy()
+            self.__undo[key] = (obj, attrs)
+
+    def __restore(self, undo):
+        """Puts back the objects of undo as they were before the batch"""
+        for key, (obj, attrs) in undo.items():
+            if obj is None:
+                self.__objects.pop(key, None)
+                continue
+            obj.__dict__.clear()
+            obj.__dict__.update(attrs)
+            self.__objects[key] = obj
+
+    @staticmethod
+    def __columns(cls):
+        """
+        Returns the attributes declared on cls (or on the model of a
+        compact class) with their defaults, found once per class.
+        """
+        columns = DBStorage.__declared.get(cls)
+        if columns is None:
+            columns = {}
+            model = getattr(cls, '_model', None) or cls
+            for base in reversed(model.__mro__):
+                for name, value in vars(base).items():
+                    if not name.startswith('_') and type(value) in SQL_TYPES:
+                        columns[name] = value
+            DBStorage.__declared[cls] = columns
+        return columns
+
+    @staticmethod
+    def __cls_name(cls):
+        """Returns the name of cls, which can be a class or its name"""
+        return cls if isinstance(cls, str) else cls.__name__
+
+    def __names(self, cls):
+        """
+        Returns the names of the model classes, or the name of cls if it's
+        one of them.
+        """
+        classes = self.__model_classes()
+        if cls is None:
+            return list(classes)
+        name = self.__cls_name(cls)
+        return [name] if name in classes else []
+
+    def __model_classes(self):
+        """
+        Returns the model classes by name (imported on first call), or
+        their compact versions if HBNB_COMPACT_MODELS is set.
+        """
+        if DBStorage.__classes is None:
+            from models.base_model import BaseModel
+            from models.user import User
+            from models.place import Place
+            from models.state import State
+            from models.city import City
+            from models.amenity import Amenity
+            from models.review import Review
+            from models.compact import HBNB_COMPACT_MODELS, compact
+
+            classes = {
+                'BaseModel': BaseModel,
+                'Amenity': Amenity,
+                'Review': Review,
+                'Place': Place,
+                'State': State,
+                'City': City,
+                'User': User,
+            }
+            if HBNB_COMPACT_MODELS:
+                classes = {n: compact(c) for n, c in classes.items()}
+            DBStorage.__classes = classes
+        return DBStorage.__classes
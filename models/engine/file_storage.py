@@ -2,6 +2,20 @@
 """This module defines a class to manage file storage for hbnb clone"""
 import json
 import os
+from collections.abc import Hashable
+from contextlib import contextmanager
+from functools import partial
+from models.engine.importers import batches, prepare
+from models.engine.indexes import (
+    PLACE_COLUMNS, TIME_FIELDS, AggregateIndex, BitmapIndex, ColumnIndex,
+    GridIndex, HashIndex, KeyIndex, RangeIndex, TextIndex, TimeIndex,
+    aggregate_view, foreign_key, numeric_field, persistent_indexes,
+    text_fields
+)
+from models.engine.query import (
+    Plan, check_conditions, equal_values, interval, matches, top_k
+)
+from models.engine.serializers import get_serializer
 
 HBNB_ENV = os.getenv("HBNB_ENV", "dev")
 HBNB_MYSQL_USER = os.getenv("HBNB_MYSQL_USER", "dev")
@@ -9,25 +23,396 @@ HBNB_MYSQL_PWD = os.getenv("HBNB_MYSQL_PWD", "dev")
 HBNB_MYSQL_HOST = os.getenv("HBNB_MYSQL_HOST", "dev")
 HBNB_MYSQL_DB = os.getenv("HBNB_MYSQL_DB", "dev")
 HBNB_TYPE_STORAGE = os.getenv("HBNB_TYPE_STORAGE", "dev")
+# "snapshot" rewrites the whole file on save, "journal" appends changes
+HBNB_FILE_MODE = os.getenv("HBNB_FILE_MODE", "snapshot")
+# journal size (in bytes) that triggers a compaction into the snapshot
+HBNB_JOURNAL_LIMIT = int(os.getenv("HBNB_JOURNAL_LIMIT", 1 << 20))
+# "1" defers reading the file, and building each object, until first use
+HBNB_LAZY_RELOAD = os.getenv("HBNB_LAZY_RELOAD", "0") == "1"
+# size (in characters) of the chunks read while streaming the Json file
+HBNB_READ_CHUNK = int(os.getenv("HBNB_READ_CHUNK", 1 << 16))
+# format of the storage files, "json" or "binary"
+HBNB_FILE_FORMAT = os.getenv("HBNB_FILE_FORMAT", "json")
+# "single" keeps every class in one file, "sharded" uses one file per class
+HBNB_FILE_LAYOUT = os.getenv("HBNB_FILE_LAYOUT", "single")
 
 
 class FileStorage:
     """
     Manage serialization and deserialization of class instances.
 
+    In "snapshot" mode every save rewrites the whole file. In "journal"
+    mode a save only appends the changed objects to a journal file next
+    to the snapshot, and the journal is folded back into the snapshot
+    once it grows past `__journal_limit` bytes (or on `compact()`).
+
+    The files are written by a serializer: Json by default ("hbnb.json"),
+    or a compact binary format ("hbnb.bin").
+
+    In the "sharded" layout each class has its own files ("hbnb.User.json",
+    "hbnb.Place.json"...): a save only writes the shards of the classes
+    that changed, and the shards are read independently.
+
+    The search indexes are saved next to each snapshot written while they
+    exist ("hbnb.Place.search.json"), and reused by a reload reading that
+    same snapshot.
+
+    In lazy mode `reload()` doesn't read the files: each one is parsed on
+    the first access to its classes, and its entries are kept as plain
+    dictionaries in __objects until they are reached through `all()` or
+    `get()`, which turn them into model instances.
+
     Attributes:
-    -   __file_path (str): The path to the Json file.
+    -   __file_path (str): The path to the Json file, the binary format
+            swaps its extension.
     -   __objects (dict): A dictionary containing every class instance.
+    -   __by_class (dict): __objects partitioned by class name, so the
+            instances of one class are reached without a full scan.
+    -   __mode (str): The write mode, "snapshot" or "journal".
+    -   __journal_limit (int): Journal size that triggers a compaction.
+    -   __pending (dict): Keys changed (dirty) since the last save, mapped
+            to the object to write or None for a deletion.
+    -   __cache (dict): The serialized entry of every clean object, keyed
+            like __objects and stored with the object it was encoded from.
+    -   __batch_depth (int): How many batches are open, saves are deferred
+            until the outermost one is committed.
+    -   __undo (dict): The stored object and a copy of its attributes from
+            before its first change inside the open batch (or None for
+            objects added by the batch).
+    -   __saved_pending (dict): __pending as it was when the batch began.
+    -   __lazy (bool): Whether reload defers loading until first use.
+    -   __unloaded (set): The shards that still have to be read.
+    -   __raw_keys (set): The keys of entries not turned into instances.
+    -   __read_chunk (int): Size of the chunks read while streaming the
+            snapshot, only one entry at a time is decoded from them.
+    -   __serializer: The format of the files (see `serializers`).
+    -   __cache_format: The serializer that produced the cached entries.
+    -   __layout (str): The file layout, "single" or "sharded".
+    -   __indexes (dict): The secondary indexes of each class name, keyed
+            by (index type, attribute), see `indexes`.
     """
 
     __file_path = 'hbnb.json'
     __objects = {}
+    __by_class = {}
+    __mode = HBNB_FILE_MODE
+    __journal_limit = HBNB_JOURNAL_LIMIT
+    __pending = {}
+    __cache = {}
+    __batch_depth = 0
+    __undo = {}
+    __saved_pending = {}
+    __lazy = HBNB_LAZY_RELOAD
+    __unloaded = set()
+    __raw_keys = set()
+    __classes = None
+    __read_chunk = HBNB_READ_CHUNK
+    __serializer = get_serializer(HBNB_FILE_FORMAT)
+    __cache_format = None
+    __layout = HBNB_FILE_LAYOUT
+    __indexes = {}
+
+    def all(self, cls=None):
+        """
+        Returns A dictionary containing all instances stored in __objects,
+        or only the instances of cls.
+
+        Args:
+        -   cls (type | str): The class (or class name) to filter on.
+        """
+        self.__ensure_loaded(cls)
+        if cls is None:
+            for key in list(FileStorage.__raw_keys):
+                self.__materialize(key)
+            FileStorage.__raw_keys.clear()
+            return FileStorage.__objects
+        partition = self.__class_index().get(self.__cls_name(cls), {})
+        if FileStorage.__raw_keys:
+            for key in [k for k, v in partition.items() if type(v) is dict]:
+                self.__materialize(key)
+        return dict(partition)
+
+    def get(self, cls, id):
+        """
+        Returns the instance of cls with the given id, or None.
+
+        Args:
+        -   cls (type | str): The class (or class name) of the instance.
+        -   id (str): The instance id.
+        """
+        self.__ensure_loaded(cls)
+        return self.__materialize(f"{self.__cls_name(cls)}.{id}")
+
+    def page(self, cls=None, limit=None, offset=0, after=None):
+        """
+        Yields the instances of cls (or every instance) in the order of
+        their keys, so by class name then id, from a sorted index of the
+        keys of each class: the start of a page is found by bisection,
+        without reaching the instances before it.
+
+        Args:
+        -   cls (type | str): The class (or class name) to list.
+        -   limit (int): The maximum number of instances (None for all).
+        -   offset (int): How many instances are skipped.
+        -   after (str): The key ("<className>.id") of the last instance of
+                the previous page, the page starts after it (a cursor).
+        """
+        self.__ensure_loaded(cls)
+        if cls is None:
+            names = sorted(self.__class_index())
+        else:
+            names = [self.__cls_name(cls)]
+            self.__model(names[0])
+        after_name = None if after is None else after.partition('.')[0]
+        for name in names:
+            if limit is not None and limit <= 0:
+                return
+            if after_name is not None and name < after_name:
+                continue
+            index = self.__index(name, KeyIndex, 'id')
+            start = index.after(after) if name == after_name else 0
+            skipped = min(offset, len(index.sorted_keys) - start)
+            offset -= skipped
+            start += skipped
+            stop = None if limit is None else start + limit
+            keys = index.sorted_keys[start:stop]
+            if limit is not None:
+                limit -= len(keys)
+            for key in keys:
+                yield self.__materialize(key)
+
+    def count(self, cls=None):
+        """
+        Returns the number of stored instances, or of instances of cls.
+
+        Args:
+        -   cls (type | str): The class (or class name) to count.
+        """
+        self.__ensure_loaded(cls)
+        if cls is None:
+            return len(FileStorage.__objects)
+        return len(self.__class_index().get(self.__cls_name(cls), ()))
+
+    def related(self, obj, cls):
+        """
+        Returns the instances of cls referencing obj through their
+        "<obj class>_id" attribute (e.g. the cities of a state), found
+        with a reverse index of that attribute.
+
+        Args:
+        -   obj (BaseModel): The referenced object.
+        -   cls (type | str): The class (or class name) of the instances.
+
+        Raises:
+        -   ValueError: If cls has no attribute referencing obj's class.
+        """
+        name = self.__cls_name(cls)
+        field = foreign_key(self.__model(name), obj.__class__)
+        index = self.__index(name, HashIndex, field)
+        return {key: self.__materialize(key) for key in index.lookup(obj.id)}
+
+    def ids_in_range(self, cls, field, low=None, high=None):
+        """
+        Returns the ids of the instances of cls whose field is between low
+        and high, ordered by that field (then by id). They're read from a
+        sorted index of the field, without reaching the instances.
+
+        Args:
+        -   cls (type | str): The class (or class name) of the instances.
+        -   field (str): A numeric attribute (i.e "price_by_night").
+        -   low (int | float): The lowest value (None for no bound).
+        -   high (int | float): The highest value (None for no bound).
+
+        Raises:
+        -   ValueError: If field isn't a numeric attribute of cls.
+        """
+        name = self.__cls_name(cls)
+        field = numeric_field(self.__model(name), field)
+        index = self.__index(name, RangeIndex, field)
+        return [key.partition('.')[2] for key in index.range(low, high)]
+
+    def places_near(self, lat, lon, radius_km, limit=None):
+        """
+        Returns the places within radius_km of (lat, lon), nearest first,
+        found with a grid index over their coordinates.
+
+        Args:
+        -   lat (float): The latitude of the center.
+        -   lon (float): The longitude of the center.
+        -   radius_km (float): The search radius in kilometers.
+        -   limit (int): The maximum number of places returned.
+        """
+        index = self.__index('Place', GridIndex, ('latitude', 'longitude'))
+        keys = index.near(lat, lon, radius_km, limit)
+        return {key: self.__materialize(key) for key in keys}
+
+    def places_with_amenities(self, amenity_ids):
+        """
+        Returns the places offering every amenity of amenity_ids (or every
+        place if it's empty), found by a bitwise AND of the bitsets of
+        the places of each amenity. `where` with an "amenity_ids has"
+        condition reads the same bitsets alongside other conditions.
+
+        Args:
+        -   amenity_ids (list): The ids of the amenities.
+        """
+        if not amenity_ids:
+            return self.all('Place')
+        index = self.__index('Place', BitmapIndex, 'amenity_ids')
+        keys = index.lookup(index.all_of(amenity_ids))
+        return {key: self.__materialize(key) for key in keys}
+
+    def search(self, cls, text, mode='and', limit=None):
+        """
+        Returns the instances of cls holding every word of text ("and")
+        or any of them ("or") in their text attributes, ranked by how
+        often the words appear, found with an inverted index.
+
+        Args:
+        -   cls (type | str): The class (or class name), Place or Review.
+        -   text (str): The words to look for.
+        -   mode (str): "and" or "or".
+        -   limit (int): The maximum number of instances returned.
+
+        Raises:
+        -   ValueError: If cls has no text attributes or mode is unknown.
+        """
+        name = self.__cls_name(cls)
+        fields = text_fields(self.__model(name))
+        if mode not in ('and', 'or'):
+            raise ValueError(f"Unknown search mode: {mode}")
+        keys = self.__index(name, TextIndex, fields).search(text, mode)
+        return {key: self.__materialize(key) for key in keys[:limit]}
+
+    def place_columns(self):
+        """
+        Returns the columnar mirror of the numeric attributes of the places
+        grouped by city_id (a ColumnIndex, see `indexes.PLACE_COLUMNS`),
+        built on the first call and kept up to date with the storage.
+
+        Example:
+        >>>> storage.place_columns().aggregate('price_by_night', 'mean',
+        ...                                    by_group=True)
+        {'<city id>': 120.5, ...}
+        """
+        return self.__index('Place', ColumnIndex, PLACE_COLUMNS)
+
+    def aggregate(self, name):
+        """
+        Returns the aggregate view called name (see `indexes.AGGREGATES`),
+        as a {group: value} dictionary. A view is built on its first call,
+        then each change of the storage updates it in constant time. The
+        views rolled up to another class (i.e "price_per_state") combine
+        the totals of each group on every call.
+
+        Example:
+        >>>> storage.aggregate('places_per_city')
+        {'<city id>': 12, ...}
+
+        Raises:
+        -   ValueError: If there's no such view.
+        """
+        cls_name, group, operation, field, rollup = aggregate_view(name)
+        fields = (group,) if field is None else (group, field)
+        self.__model(cls_name)
+        index = self.__index(cls_name, AggregateIndex, fields)
+        parents = None
+        if rollup is not None:
+            parent_cls, parent_field = rollup
+            self.__model(parent_cls)
+            values = self.__index(parent_cls, HashIndex, parent_field).values
+            parents = {key.partition('.')[2]: value
+                       for key, value in values.items()}
+        return index.result(operation, parents)
+
+    def where(self, cls, conditions):
+        """
+        Returns the instances of cls meeting every condition, read from
+        the index the planner picked (see `explain()`) or found with a scan
+        of the class.
+
+        Args:
+        -   cls (type | str): The class (or class name) of the instances.
+        -   conditions (list): The (attribute, operator, value) conditions,
+                see `query`.
+
+        Raises:
+        -   ValueError: If cls or an operator is unknown.
+        """
+        name = self.__cls_name(cls)
+        conditions = check_conditions(conditions)
+        plan, select = self.__plan(name, conditions)
+        if select is None:
+            candidates = self.all(name)
+        else:
+            candidates = {key: self.__materialize(key) for key in select()}
+        return {key: obj for key, obj in candidates.items()
+                if matches(obj, conditions)}
+
+    def top_k(self, cls, field, k, descending=False, conditions=None):
+        """
+        Returns the k instances of cls with the smallest field (the
+        largest if descending) meeting every condition, in order, ties
+        broken by id. Instances without the field are left out, and so
+        are the values of a numeric field that aren't numbers.
+
+        A numeric field or a timestamp is read in order from its sorted
+        index, up to the k-th instance meeting the conditions, unless the
+        planner picked an index for the conditions. Its candidates, or
+        every instance for the other fields, go through a heap of k
+        instances, which is O(n log k) instead of a full sort.
+
+        Args:
+        -   cls (type | str): The class (or class name) of the instances.
+        -   field (str): The attribute ordering the instances.
+        -   k (int): How many instances are returned (at most).
+        -   descending (bool): Whether the largest values come first.
+        -   conditions (list): The (attribute, operator, value) conditions,
+                see `query`.
+
+        Returns:
+        -   dict: The instances by key, in order.
+
+        Raises:
+        -   ValueError: If cls or an operator is unknown, or values of the
+                field can't be compared.
+        """
+        name = self.__cls_name(cls)
+        model = self.__model(name)
+        numeric = type(getattr(model, field, None)) in (int, float)
+        kind = RangeIndex if numeric else \
+            TimeIndex if field in TIME_FIELDS else None
+        conditions = check_conditions(conditions or [])
+        select = self.__plan(name, conditions)[1] if conditions else None
+        if kind is not None and select is None:
+            keys = self.__index(name, kind, field).sorted_keys
+            objs = {}
+            for key in reversed(keys) if descending else keys:
+                if len(objs) >= k:
+                    break
+                obj = self.__materialize(key)
+                if matches(obj, conditions):
+                    objs[key] = obj
+            return objs
+        if select is None:
+            candidates = self.all(name).items()
+        else:
+            candidates = ((key, self.__materialize(key)) for key in select())
+        if conditions:
+            candidates = ((key, obj) for key, obj in candidates
+                          if matches(obj, conditions))
+        return dict(top_k(candidates, field, k, descending, numeric))
 
-    def all(self):
+    def explain(self, cls, conditions):
         """
-        Returns A dictionary containing all instances stored in __objects.
+        Returns the Plan of `where(cls, conditions)`: the index it reads
+        and how many candidates it expects to check.
+
+        Raises:
+        -   ValueError: If cls or an operator is unknown.
         """
-        return FileStorage.__objects
+        name = self.__cls_name(cls)
+        return self.__plan(name, check_conditions(conditions))[0]
 
     def new(self, obj):
         """
@@ -36,40 +421,664 @@ class FileStorage:
         Args:
         -   obj (BaseModel): The object to be added.
         """
+        self.__ensure_loaded(obj.__class__)
+        key = f"{obj.__class__.__name__}.{obj.id}"
+        if FileStorage.__batch_depth:
+            self.__keep_undo(key, FileStorage.__objects.get(key))
+        self.__put(key, obj)
+        FileStorage.__pending[key] = obj
+
+    def bulk_load(self, cls, records, batch_size=10000):
+        """
+        Adds an instance of cls for each record, hydrated batch_size
+        records at a time, and saves once at the end. The records are
+        checked and completed by `importers.prepare()`, and a record with
+        the id of a stored instance replaces it.
+
+        Args:
+        -   cls (type | str): The class (or class name) of the instances.
+        -   records (iterable): The dictionaries of their attributes, i.e
+                streamed from a file by `importers.read_records()`.
+        -   batch_size (int): How many records are hydrated at a time.
+
+        Returns:
+        -   int: The number of instances added.
+
+        Raises:
+        -   ValueError: If cls is unknown or a record is invalid, nothing
+                is added then.
+        """
+        model = self.__model(self.__cls_name(cls))
+        count = 0
+        with self.batch():
+            for batch in batches(prepare(model, records), batch_size):
+                for obj in model.from_records(batch):
+                    self.new(obj)
+                count += len(batch)
+        return count
+
+    def touch(self, obj):
+        """
+        Marks a stored obj as dirty so the next save re-serializes it.
+        It's called right before obj changes.
+
+        Args:
+        -   obj (BaseModel): The object about to change.
+        """
+        key = f"{obj.__class__.__name__}.{getattr(obj, 'id', None)}"
+        if FileStorage.__objects.get(key) is obj:
+            if FileStorage.__batch_depth:
+                self.__keep_undo(key, obj)
+            FileStorage.__pending[key] = obj
+            self.__mark_stale(key)
+
+    def delete(self, obj=None):
+        """
+        Removes obj from __objects if it's inside.
+
+        Args:
+        -   obj (BaseModel): The object to be removed.
+
+        Returns:
+        -   The removed object or None if it wasn't stored.
+        """
+        if obj is None:
+            return None
+        self.__ensure_loaded(obj.__class__)
         key = f"{obj.__class__.__name__}.{obj.id}"
-        self.all()[key] = obj
+        if FileStorage.__batch_depth:
+            self.__keep_undo(key, FileStorage.__objects.get(key))
+        removed = self.__drop(key)
+        if removed is not None:
+            FileStorage.__pending[key] = None
+            FileStorage.__cache.pop(key, None)
+        return removed
 
     def save(self):
-        """Saves storage dictionary to file"""
-        with open(FileStorage.__file_path, 'w') as f:
-            _dict = {k: v.to_dict() for k, v in FileStorage.__objects.items()}
-            json.dump(_dict, f)
-
-    def reload(self):
-        """Loads storage dictionary from file"""
-        from models.base_model import BaseModel
-        from models.user import User
-        from models.place import Place
-        from models.state import State
-        from models.city import City
-        from models.amenity import Amenity
-        from models.review import Review
-
-        classes = {
-            'BaseModel': BaseModel,
-            'Amenity': Amenity,
-            'Review': Review,
-            'Place': Place,
-            'State': State,
-            'City': City,
-            'User': User,
-        }
+        """
+        Saves storage dictionary to file (deferred inside a batch).
+        Only the shards holding changes are written, or every shard if
+        __objects was changed without going through the storage (e.g.
+        `storage.all().clear()`).
+        """
+        if FileStorage.__batch_depth:
+            return
+        by_class = FileStorage.__by_class
+        if sum(map(len, by_class.values())) != len(FileStorage.__objects):
+            # brings __by_class back in sync, then writes every shard
+            self.__class_index()
+            self.compact()
+        elif FileStorage.__mode == "journal":
+            self.__append_journal()
+        else:
+            shards = {self.__shard_of(key) for key in FileStorage.__pending}
+            for shard in shards:
+                self.__write_snapshot(shard)
+
+    def compact(self):
+        """Writes a fresh snapshot of every shard and drops the journals"""
+        for shard in self.__shard_names():
+            self.__write_snapshot(shard)
+
+    def begin(self):
+        """
+        Opens a batch: saves are deferred until the batch is committed.
+        Nested batches join the outermost one.
+        """
+        if not FileStorage.__batch_depth:
+            FileStorage.__undo = {}
+            FileStorage.__saved_pending = FileStorage.__pending.copy()
+        FileStorage.__batch_depth += 1
+
+    def in_batch(self):
+        """Returns True if a batch is open"""
+        return FileStorage.__batch_depth > 0
+
+    def commit(self):
+        """
+        Closes the innermost batch, and saves every deferred change once
+        the outermost batch is closed.
+        """
+        if not FileStorage.__batch_depth:
+            return
+        FileStorage.__batch_depth -= 1
+        if not FileStorage.__batch_depth:
+            FileStorage.__undo = {}
+            if FileStorage.__pending:
+                self.save()
+
+    def rollback(self):
+        """
+        Discards the open batch: __objects and every object changed inside
+        the batch are restored to their state when it began.
+        """
+        if not FileStorage.__batch_depth:
+            return
+        self.__restore(FileStorage.__undo)
+        FileStorage.__pending = FileStorage.__saved_pending
+        FileStorage.__undo = {}
+        FileStorage.__batch_depth = 0
+
+    @contextmanager
+    def batch(self):
+        """
+        Groups changes so they are saved once at the end of the block.
+        The changes are rolled back if an exception escapes the block.
+        Inside an open batch, the block is a savepoint: only its own
+        changes are rolled back, and the batch stays open.
+
+        Example:
+        >>>> with storage.batch():
+        ...      for _ in range(1000):
+        ...          User().save()
+        """
+        if not FileStorage.__batch_depth:
+            self.begin()
+            try:
+                yield self
+            except BaseException:
+                self.rollback()
+                raise
+            self.commit()
+            return
+        # the block keeps its own undo log, merged into the batch's one
+        undo = FileStorage.__undo
+        pending = FileStorage.__pending.copy()
+        FileStorage.__undo = {}
+        FileStorage.__batch_depth += 1
+        try:
+            yield self
+        except BaseException:
+            self.__restore(FileStorage.__undo)
+            FileStorage.__pending = pending
+            raise
+        else:
+            for key, state in FileStorage.__undo.items():
+                undo.setdefault(key, state)
+        finally:
+            FileStorage.__undo = undo
+            FileStorage.__batch_depth -= 1
 
+    def reload(self, classes=None):
+        """
+        Loads storage dictionary from file (on first use in lazy mode).
+        The indexes of the reloaded classes (but the persistent ones) are
+        dropped, and built from scratch on their next query.
+
+        Args:
+        -   classes (list): The classes (or class names) to reload, in the
+                sharded layout only their files are read.
+        """
+        FileStorage.__cache.clear()
+        if classes is None:
+            shards = self.__shard_names()
+        else:
+            shards = {self.__shard_of(self.__cls_name(c)) for c in classes}
+        for shard in shards:
+            for name in self.__shard_classes(shard):
+                for index in FileStorage.__indexes.get(name, {}).values():
+                    if not index.persistent:
+                        index.reset()
+            if FileStorage.__lazy:
+                FileStorage.__unloaded.add(shard)
+            else:
+                self.__load(shard)
+
+    def __load(self, shard):
+        """
+        Reads the snapshot of shard and replays its journal into __objects,
+        keeping the entries as dictionaries in lazy mode.
+        """
+        FileStorage.__unloaded.discard(shard)
+        build = {n: c.from_record for n, c in self.__model_classes().items()}
+        lazy = FileStorage.__lazy
+        pending = FileStorage.__pending
+        serializer = FileStorage.__serializer
+        by_class = self.__class_index()
+        empty = [n for n in self.__shard_classes(shard) if not by_class.get(n)]
         try:
-            _dict = {}
-            with open(FileStorage.__file_path) as f:
-                _dict = json.load(f)
-                for key, val in _dict.items():
-                    self.all()[key] = classes[val['__class__']](**val)
+            path = self.__snapshot_path(shard)
+            signature = self.__signature(path)
+            with open(path, 'r' + serializer.file_mode) as f:
+                for key, val in serializer.read(f, FileStorage.__read_chunk):
+                    if not lazy:
+                        val = build[val['__class__']](val)
+                    self.__put(key, val)
+                    pending.pop(key, None)
+            self.__load_indexes(empty, signature)
         except FileNotFoundError:
             pass
+        for key, val in self.__read_journal(shard):
+            if val is None:
+                self.__drop(key)
+            else:
+                if not lazy:
+                    val = build[val['__class__']](val)
+                self.__put(key, val)
+            pending.pop(key, None)
+
+    def __ensure_loaded(self, cls=None):
+        """
+        Loads the shard of cls (or every shard) if a lazy reload deferred it.
+        """
+        unloaded = FileStorage.__unloaded
+        if not unloaded:
+            return
+        if cls is None:
+            shards = list(unloaded)
+        else:
+            shards = [self.__shard_of(self.__cls_name(cls))]
+        for shard in shards:
+            if shard in unloaded:
+                self.__load(shard)
+
+    def __materialize(self, key):
+        """
+        Turns the entry stored under key into a model instance if it's
+        still a dictionary.
+
+        Returns:
+        -   The stored instance or None if key isn't stored.
+        """
+        obj = FileStorage.__objects.get(key)
+        if type(obj) is not dict:
+            return obj
+        raw = obj
+        obj = self.__model_classes()[raw['__class__']].from_record(raw)
+        self.__put(key, obj)
+        cached = FileStorage.__cache.get(key)
+        if cached is not None and cached[0] is raw:
+            FileStorage.__cache[key] = (obj, cached[1])
+        return obj
+
+    def __model_classes(self):
+        """
+        Returns the model classes by name (imported on first call), or
+        their compact versions if HBNB_COMPACT_MODELS is set.
+        """
+        if FileStorage.__classes is None:
+            from models.base_model import BaseModel
+            from models.user import User
+            from models.place import Place
+            from models.state import State
+            from models.city import City
+            from models.amenity import Amenity
+            from models.review import Review
+            from models.compact import HBNB_COMPACT_MODELS, compact
+
+            classes = {
+                'BaseModel': BaseModel,
+                'Amenity': Amenity,
+                'Review': Review,
+                'Place': Place,
+                'State': State,
+                'City': City,
+                'User': User,
+            }
+            if HBNB_COMPACT_MODELS:
+                classes = {n: compact(c) for n, c in classes.items()}
+            FileStorage.__classes = classes
+        return FileStorage.__classes
+
+    def __model(self, name):
+        """
+        Returns the model class called name.
+
+        Raises:
+        -   ValueError: If there's no such class.
+        """
+        model = self.__model_classes().get(name)
+        if model is None:
+            raise ValueError(f"Unknown class: {name}")
+        return model
+
+    def __put(self, key, obj):
+        """
+        Stores obj under key in __objects and in its class partition.
+        obj can be an instance or the dictionary of an unloaded entry.
+        """
+        by_class = self.__class_index()
+        FileStorage.__objects[key] = obj
+        by_class.setdefault(key.partition('.')[0], {})[key] = obj
+        self.__mark_stale(key)
+        if type(obj) is dict:
+            FileStorage.__raw_keys.add(key)
+        else:
+            FileStorage.__raw_keys.discard(key)
+
+    def __drop(self, key):
+        """
+        Removes key from __objects and from its class partition.
+
+        Returns:
+        -   The removed object or None if key wasn't stored.
+        """
+        by_class = self.__class_index()
+        obj = FileStorage.__objects.pop(key, None)
+        if obj is not None:
+            by_class[key.partition('.')[0]].pop(key)
+            FileStorage.__raw_keys.discard(key)
+            self.__mark_stale(key)
+        return obj
+
+    def __class_index(self):
+        """
+        Returns __by_class, rebuilt first if __objects was changed without
+        going through the storage (e.g. `storage.all().clear()`), in which
+        case the secondary indexes are dropped as well.
+        """
+        by_class = FileStorage.__by_class
+        if sum(map(len, by_class.values())) != len(FileStorage.__objects):
+            by_class.clear()
+            for key, obj in FileStorage.__objects.items():
+                by_class.setdefault(key.partition('.')[0], {})[key] = obj
+            for indexes in FileStorage.__indexes.values():
+                for index in indexes.values():
+                    index.reset()
+        return by_class
+
+    def __index(self, cls_name, kind, field):
+        """
+        Returns the index of type kind over the field of cls_name, created
+        on first use and brought up to date with the stored objects.
+        """
+        self.__ensure_loaded(cls_name)
+        indexes = FileStorage.__indexes.setdefault(cls_name, {})
+        index = indexes.get((kind, field))
+        if index is None:
+            model = self.__model_classes()[cls_name]
+            index = indexes[(kind, field)] = kind(model, field)
+        index.sync(self.__class_index().get(cls_name, {}))
+        return index
+
+    def __plan(self, name, conditions):
+        """
+        Picks the most selective access to the instances of name meeting
+        conditions: the reverse index of a foreign key ("==" and "in"),
+        the sorted index of a numeric attribute (comparisons and "in"),
+        the bitmap index of a list attribute ("has"), or a scan of the
+        class when no index reads fewer instances. The bitsets of the
+        "has" conditions are intersected with the keys read from a hash
+        or range index. The indexes considered are built on first use.
+
+        Returns:
+        -   tuple: The Plan, and the function returning the keys of the
+                candidates (None for a scan).
+        """
+        model = self.__model(name)
+        total = self.count(name)
+        best = (total, 'scan', None, None)
+        references = {c.__name__.lower() + '_id'
+                      for c in self.__model_classes().values()}
+        # the (index, bitset) of the objects meeting the "has" conditions
+        bitsets = []
+        for field in dict.fromkeys(field for field, _, _ in conditions):
+            on_field = [c for c in conditions if c[0] == field]
+            values = equal_values(on_field)
+            default = getattr(model, field, None)
+            if type(default) is list:
+                elements = [v for _, op, value in on_field if op == 'has'
+                            for v in value]
+                if not elements or not all(isinstance(e, Hashable)
+                                           for e in elements):
+                    continue
+                index = self.__index(name, BitmapIndex, field)
+                bitset = index.all_of(elements)
+                bitsets.append((index, bitset))
+                candidate = (bin(bitset).count('1'), 'bitmap index', field,
+                             partial(index.lookup, bitset))
+            elif field in references and type(default) is str:
+                if values is None or not all(
+                    type(v) is str and v for v in values
+                ):
+                    continue
+                index = self.__index(name, HashIndex, field)
+                candidate = (index.count(values), 'hash index', field,
+                             partial(index.select, values))
+            elif type(default) in (int, float):
+                if values is not None:
+                    if not all(type(v) in (int, float) and v == v
+                               for v in values):
+                        continue
+                    intervals = [(v, v) for v in sorted(set(values))]
+                else:
+                    intervals = [interval(on_field)]
+                    if intervals == [(None, None)]:
+                        continue
+                index = self.__index(name, RangeIndex, field)
+                candidate = (index.count(intervals), 'range index', field,
+                             partial(index.select, intervals))
+            else:
+                continue
+            if candidate[0] < best[0]:
+                best = candidate
+        estimate, access, field, select = best
+        if select is not None and access != 'bitmap index' and bitsets:
+            select = partial(self.__and_bitsets, select, bitsets)
+            estimate = min([estimate] + [bin(bitset).count('1')
+                                         for _, bitset in bitsets])
+            access = f"{access} on {field} and bitmap index"
+            field = ', '.join(index.field for index, _ in bitsets)
+        return Plan(name, access, field, estimate, total, conditions), select
+
+    @staticmethod
+    def __and_bitsets(select, bitsets):
+        """
+        Returns the keys of select() that are also set in every bitset of
+        bitsets, a list of (BitmapIndex, bitset).
+        """
+        keys = select()
+        for index, bitset in bitsets:
+            keys = index.lookup(index.bits(keys) & bitset)
+        return keys
+
+    def __index_path(self, cls_name, kind):
+        """Returns the path of a persistent index of cls_name"""
+        root = os.path.splitext(FileStorage.__file_path)[0]
+        return f"{root}.{cls_name}.{kind.name}.json"
+
+    @staticmethod
+    def __signature(path):
+        """Returns the [size, mtime] of the file at path"""
+        stat = os.stat(path)
+        return [stat.st_size, stat.st_mtime_ns]
+
+    def __save_indexes(self, shard):
+        """
+        Writes the persistent indexes of the classes of shard next to its
+        snapshot, with the signature of the snapshot they match.
+        """
+        signature = self.__signature(self.__snapshot_path(shard))
+        by_class = self.__class_index()
+        for name in self.__shard_classes(shard):
+            for index in FileStorage.__indexes.get(name, {}).values():
+                if not (index.persistent and index.built):
+                    continue
+                index.sync(by_class.get(name, {}))
+                path = self.__index_path(name, type(index))
+                with open(path + '.tmp', 'w') as f:
+                    json.dump({'snapshot': signature, 'index': index.dump()},
+                              f)
+                os.replace(path + '.tmp', path)
+
+    def __load_indexes(self, classes, signature):
+        """
+        Reuses the saved persistent indexes of classes (whose instances
+        were all just read from a snapshot) if they match its signature.
+        The journal replayed afterwards marks its keys as stale.
+        """
+        for name in classes:
+            for kind in persistent_indexes:
+                try:
+                    with open(self.__index_path(name, kind)) as f:
+                        data = json.load(f)
+                    if data['snapshot'] != signature:
+                        continue
+                    field = tuple(data['index']['field'])
+                    index = kind(self.__model_classes()[name], field)
+                    index.load(data['index'])
+                except (OSError, ValueError, KeyError, TypeError):
+                    continue
+                indexes = FileStorage.__indexes.setdefault(name, {})
+                indexes[(kind, field)] = index
+
+    def __mark_stale(self, key):
+        """Tells the indexes of the class of key that it changed"""
+        indexes = FileStorage.__indexes.get(key.partition('.')[0])
+        if indexes:
+            for index in indexes.values():
+                index.mark(key)
+
+    @staticmethod
+    def __cls_name(cls):
+        """Returns the name of cls, which can be a class or its name"""
+        return cls if isinstance(cls, str) else cls.__name__
+
+    def __encode(self, key, obj):
+        """
+        Serializes obj and caches its entry until the object is marked as
+        dirty again.
+
+        Returns:
+        -   tuple: The encoded object and its entry.
+        """
+        cached = (obj, FileStorage.__serializer.encode(key, obj))
+        FileStorage.__cache[key] = cached
+        return cached
+
+    def __check_cache_format(self):
+        """Drops the cached entries if the format was changed since"""
+        if FileStorage.__cache_format is not FileStorage.__serializer:
+            FileStorage.__cache.clear()
+            FileStorage.__cache_format = FileStorage.__serializer
+
+    def __keep_undo(self, key, obj):
+        """Records the state of key before its first change in the batch"""
+        if key not in FileStorage.__undo:
+            attrs = None
+            if obj is not None and type(obj) is not dict:
+                attrs = obj.__dict__.copy()
+            FileStorage.__undo[key] = (obj, attrs)
+
+    def __restore(self, undo):
+        """Puts back the objects of undo as they were before the batch"""
+        for key, (obj, attrs) in undo.items():
+            if obj is None:
+                self.__drop(key)
+                continue
+            if attrs is not None:
+                obj.__dict__.clear()
+                obj.__dict__.update(attrs)
+            self.__put(key, obj)
+
+    def __shard_of(self, key):
+        """
+        Returns the shard holding key, or the class name key ('' in the
+        single layout).
+        """
+        if FileStorage.__layout == "sharded":
+            return key.partition('.')[0]
+        return ''
+
+    def __shard_classes(self, shard):
+        """Returns the names of the classes stored in shard"""
+        return [shard] if shard else list(self.__model_classes())
+
+    def __shard_names(self):
+        """Returns the names of every shard"""
+        if FileStorage.__layout == "sharded":
+            return list(self.__model_classes())
+        return ['']
+
+    def __snapshot_path(self, shard=''):
+        """Returns the path of the snapshot of shard in the current format"""
+        root = os.path.splitext(FileStorage.__file_path)[0]
+        if shard:
+            root += '.' + shard
+        return root + FileStorage.__serializer.extension
+
+    def __journal_path(self, shard=''):
+        """Returns the path of the journal kept next to the snapshot"""
+        return self.__snapshot_path(shard) + '.journal'
+
+    def __write_snapshot(self, shard):
+        """
+        Writes a fresh snapshot of shard and drops its journal. An empty
+        shard of the sharded layout has its files removed instead.
+        """
+        self.__ensure_loaded(shard or None)
+        self.__check_cache_format()
+        if shard:
+            objects = self.__class_index().get(shard, {})
+        else:
+            objects = FileStorage.__objects
+        cache = FileStorage.__cache
+        pending = FileStorage.__pending
+        serializer = FileStorage.__serializer
+        path = self.__snapshot_path(shard)
+        if objects or not shard:
+            entries = []
+            for key, obj in objects.items():
+                cached = cache.get(key)
+                if cached is None or cached[0] is not obj or key in pending:
+                    cached = self.__encode(key, obj)
+                entries.append(cached[1])
+            with open(path + '.tmp', 'w' + serializer.file_mode) as f:
+                serializer.write(f, entries)
+            os.replace(path + '.tmp', path)
+            self.__save_indexes(shard)
+            stale = [self.__journal_path(shard)]
+        else:
+            stale = [path, self.__journal_path(shard)]
+        for stale_path in stale:
+            try:
+                os.remove(stale_path)
+            except FileNotFoundError:
+                pass
+        if shard:
+            for key in [k for k in pending if self.__shard_of(k) == shard]:
+                del pending[key]
+        else:
+            pending.clear()
+
+    def __append_journal(self):
+        """
+        Appends one record per pending change to the journal of its shard,
+        then compacts the journals that grew past the size limit.
+        """
+        if not FileStorage.__pending:
+            return
+        self.__check_cache_format()
+        serializer = FileStorage.__serializer
+        records = {}
+        for key, obj in FileStorage.__pending.items():
+            if obj is None:
+                record = serializer.del_record(key)
+            else:
+                record = serializer.put_record(self.__encode(key, obj)[1])
+            records.setdefault(self.__shard_of(key), []).append(record)
+        FileStorage.__pending.clear()
+        for shard, shard_records in records.items():
+            path = self.__journal_path(shard)
+            with open(path, 'a' + serializer.file_mode) as f:
+                f.writelines(shard_records)
+                size = f.tell()
+            if size > FileStorage.__journal_limit:
+                self.__write_snapshot(shard)
+
+    def __read_journal(self, shard):
+        """
+        Yields (key, dict) pairs recorded in the journal of shard, with dict
+        set to None for deletions. A torn last record is cut off the file,
+        the next append would follow it otherwise.
+        """
+        serializer = FileStorage.__serializer
+        path = self.__journal_path(shard)
+        try:
+            f = open(path, 'r' + serializer.file_mode)
+        except FileNotFoundError:
+            return
+        with f:
+            end = yield from serializer.read_journal(f)
+        if end is not None:
+            os.truncate(path, end)
@@ -0,0 +1,192 @@
+#!/usr/bin/python3
+"""
+This module reads the records of the bulk imports (`storage.bulk_load()`
+and the console's import command).
+
+A record is the dictionary of the attributes of one instance. The files
+are streamed one line at a time, in one of two formats picked by their
+extension:
+
+- Json Lines (".jsonl", ".ndjson"): one Json object per line.
+- CSV (".csv"): a header row naming the attributes, then one row per
+    instance. Empty cells leave their attribute unset, and the lists
+    (i.e amenity_ids) are written in Json.
+
+The attributes of ATTRIBUTE_TYPES are cast like the console's update
+casts them, and the records missing an id or a timestamp get new ones.
+"""
+import csv
+import json
+import os
+from datetime import datetime
+from functools import partial
+from itertools import islice
+from models import ids
+
+# the types of the attributes set from text, by the update command and
+# the imports
+ATTRIBUTE_TYPES = {
+    'number_rooms': int,
+    'number_bathrooms': int,
+    'max_guest': int,
+    'price_by_night': int,
+    'latitude': float,
+    'longitude': float,
+}
+# the formats of the imported files, by extension
+FORMATS = {'.jsonl': 'jsonl', '.ndjson': 'jsonl', '.csv': 'csv'}
+
+
+def file_format(path):
+    """
+    Returns the format of the file at path, "jsonl" or "csv".
+
+    Raises:
+    -   ValueError: If its extension isn't one of FORMATS.
+    """
+    fmt = FORMATS.get(os.path.splitext(path)[1].lower())
+    if fmt is None:
+        raise ValueError(f"Unknown file format: {path}")
+    return fmt
+
+
+def read_records(f, fmt):
+    """
+    Yields the records of the open text file f, in the format fmt
+    ("jsonl" or "csv"), one line at a time.
+
+    Raises:
+    -   ValueError: If a line isn't a valid record, with its number.
+    """
+    if fmt == 'csv':
+        for row in csv.DictReader(f):
+            yield {name: value for name, value in row.items()
+                   if value is not None and value != ''}
+        return
+    if fmt != 'jsonl':
+        raise ValueError(f"Unknown file format: {fmt}")
+    for number, line in enumerate(f, 1):
+        if not line.strip():
+            continue
+        try:
+            record = json.loads(line)
+        except ValueError as e:
+            raise ValueError(f"Line {number}: {e}") from None
+        if type(record) is not dict:
+            raise ValueError(f"Line {number}: not a Json object")
+        yield record
+
+
+def cast(name, value):
+    """
+    Returns value cast to the type of the attribute name, if it's one of
+    ATTRIBUTE_TYPES.
+
+    Raises:
+    -   ValueError: If value can't be cast.
+    """
+    kind = ATTRIBUTE_TYPES.get(name)
+    if kind is None or type(value) is kind:
+        return value
+    if type(value) is bool or type(value) not in (str, int, float):
+        raise ValueError(f"{name}: {value!r} isn't a {kind.__name__}")
+    return kind(value)
+
+
+def parse_time(name, value):
+    """
+    Returns value, a datetime or its ISO format, as a datetime.
+
+    Raises:
+    -   ValueError: If value isn't a valid timestamp.
+    """
+    if type(value) is str:
+        return datetime.fromisoformat(value)
+    if type(value) is not datetime:
+        raise ValueError(f"invalid {name}")
+    return value
+
+
+def converter(cls, name):
+    """
+    Returns the function checking and converting the values of the
+    attribute name of cls, or None if they're kept as they are.
+
+    Raises:
+    -   ValueError: If name isn't a valid attribute name.
+    """
+    if type(name) is not str or not name.isidentifier():
+        raise ValueError(f"invalid attribute name {name!r}")
+    if type(getattr(cls, name, None)) is list:
+        return partial(decode_list, name)
+    if name in ATTRIBUTE_TYPES:
+        return partial(cast, name)
+    return None
+
+
+def decode_list(name, value):
+    """
+    Returns value, a list or its Json text, as a list.
+
+    Raises:
+    -   ValueError: If value isn't a list.
+    """
+    if type(value) is str:
+        value = json.loads(value)
+    if type(value) is not list:
+        raise ValueError(f"{name} isn't a list")
+    return value
+
+
+def prepare(cls, records):
+    """
+    Yields the records checked and completed for `cls.from_record()`:
+    the attributes of ATTRIBUTE_TYPES are cast, the lists written as
+    Json text decoded, the timestamps parsed, and the records without an
+    id or a timestamp get new ones.
+
+    Args:
+    -   cls (type): The model class of the records.
+    -   records (iterable): The records, i.e read by `read_records()`.
+
+    Raises:
+    -   ValueError: If a record is invalid, with its number (from 1).
+    """
+    name = cls.__name__
+    # the converter of each attribute, looked up once per import
+    converters = {'__class__': None}
+    for number, record in enumerate(records, 1):
+        try:
+            checked = {}
+            for attr, value in record.items():
+                if attr in converters:
+                    convert = converters[attr]
+                else:
+                    convert = converters[attr] = converter(cls, attr)
+                checked[attr] = value if convert is None else convert(value)
+            if checked.pop('__class__', name) != name:
+                raise ValueError(f"not a {name}")
+            if 'id' not in checked:
+                checked['id'] = ids.new_id()
+            elif type(checked['id']) is not str or not checked['id']:
+                raise ValueError("invalid id")
+            created_at = checked['created_at'] \
+                if 'created_at' in checked else datetime.now()
+            updated_at = checked.get('updated_at', created_at)
+            checked['created_at'] = parse_time('created_at', created_at)
+            checked['updated_at'] = checked['created_at'] \
+                if updated_at == created_at \
+                else parse_time('updated_at', updated_at)
+        except (ValueError, TypeError) as e:
+            raise ValueError(f"Record {number}: {e}") from None
+        yield checked
+
+
+def batches(iterable, size):
+    """Yields the items of iterable in lists of size items (or fewer)"""
+    iterator = iter(iterable)
+    while True:
+        batch = list(islice(iterator, size))
+        if not batch:
+            return
+        yield batch
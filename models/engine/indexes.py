@@ -0,0 +1,1122 @@
+#!/usr/bin/python3
+"""
+This module defines the secondary indexes kept by FileStorage.
+
+An index covers one attribute of one model class. The storage marks a
+key as stale whenever its object is added, changed or removed, and the
+index brings the stale keys up to date on its next query: the storage is
+told about a change right before it happens, so the new value can only
+be read afterwards. An index is only built on its first query.
+"""
+import heapq
+import re
+from array import array
+from bisect import bisect_left, bisect_right
+from collections import Counter
+from collections.abc import Hashable
+from datetime import datetime
+from itertools import count, repeat
+from math import (
+    asin, cos, degrees, fsum, isfinite, isnan, nan, radians, sin, sqrt
+)
+
+# mean radius of the Earth and length of a degree of latitude, in km
+EARTH_RADIUS = 6371.0088
+DEGREE = radians(1) * EARTH_RADIUS
+# the text attributes searched by `TextIndex`, by class name
+TEXT_FIELDS = {
+    'Place': ('name', 'description'),
+    'Review': ('text',),
+}
+WORD = re.compile(r'\w+')
+# the timestamps of every instance, ordered by `TimeIndex`
+TIME_FIELDS = ('created_at', 'updated_at')
+# the attributes mirrored by the `ColumnIndex` of places, grouped by city
+PLACE_COLUMNS = ('city_id', 'number_rooms', 'number_bathrooms', 'max_guest',
+                 'price_by_night', 'latitude', 'longitude')
+# the aggregate views of `storage.aggregate()`, by name: the class, the
+# attribute grouping its instances, the operation ("count", "sum" or
+# "mean"), the attribute it reads, and the (class, attribute) rolling the
+# groups up (i.e the state of each city) or None
+AGGREGATES = {
+    'places_per_city': ('Place', 'city_id', 'count', None, None),
+    'reviews_per_place': ('Review', 'place_id', 'count', None, None),
+    'cities_per_state': ('City', 'state_id', 'count', None, None),
+    'price_per_city': ('Place', 'city_id', 'mean', 'price_by_night', None),
+    'price_per_state': ('Place', 'city_id', 'mean', 'price_by_night',
+                        ('City', 'state_id')),
+}
+
+
+def tokenize(text):
+    """Returns the lowercase words of text"""
+    return WORD.findall(text.lower())
+
+
+def text_fields(cls):
+    """
+    Returns the searchable text attributes of cls.
+
+    Raises:
+    -   ValueError: If cls has no searchable attribute.
+    """
+    fields = TEXT_FIELDS.get(cls.__name__)
+    if fields is None:
+        raise ValueError(f"{cls.__name__} has no searchable text")
+    return fields
+
+
+def rank(postings, mode='and'):
+    """
+    Returns the keys found in the postings ({key: term frequency}) of
+    every term ("and") or of any term ("or"), by descending sum of the
+    frequencies, then by key.
+    """
+    if not postings:
+        return []
+    if mode == 'and':
+        postings = sorted(postings, key=len)
+        keys = [k for k in postings[0] if all(k in p for p in postings[1:])]
+    else:
+        keys = set().union(*postings)
+    scores = {k: sum(p.get(k, 0) for p in postings) for k in keys}
+    return sorted(scores, key=lambda k: (-scores[k], k))
+
+
+def foreign_key(cls, target):
+    """
+    Returns the attribute of cls holding the id of a target instance
+    ("<target>_id", e.g. City.state_id for State).
+
+    Raises:
+    -   ValueError: If cls has no attribute referencing target.
+    """
+    field = target.__name__.lower() + '_id'
+    if type(getattr(cls, field, None)) is not str:
+        raise ValueError(f"{cls.__name__} has no reference to "
+                         f"{target.__name__}")
+    return field
+
+
+def numeric_field(cls, field):
+    """
+    Checks that the field of cls holds numbers (its class default is an
+    int or a float).
+
+    Raises:
+    -   ValueError: If the field isn't numeric.
+    """
+    if type(getattr(cls, field, None)) not in (int, float):
+        raise ValueError(f"{cls.__name__}.{field} isn't a numeric field")
+    return field
+
+
+def register_aggregate(name, cls_name, group, operation='count', field=None,
+                       rollup=None):
+    """
+    Registers an aggregate view of `storage.aggregate()`, i.e the mean
+    rating of the reviews of each place:
+    >>>> register_aggregate('rating_per_place', 'Review', 'place_id',
+    ...                     'mean', 'rating')
+
+    Args:
+    -   name (str): The name of the view.
+    -   cls_name (str): The class of the aggregated instances.
+    -   group (str): The attribute grouping the instances.
+    -   operation (str): "count", "sum" or "mean".
+    -   field (str): The numeric attribute summed or averaged.
+    -   rollup (tuple): The (class, attribute) of the group instances
+            their groups are rolled up to, or None.
+
+    Raises:
+    -   ValueError: If operation is unknown, or has no field to read.
+    """
+    if operation not in AggregateIndex.operations:
+        raise ValueError(f"Unknown operation: {operation}")
+    if operation != 'count' and field is None:
+        raise ValueError(f"{operation} needs a field")
+    AGGREGATES[name] = (cls_name, group, operation, field,
+                        None if rollup is None else tuple(rollup))
+
+
+def aggregate_view(name):
+    """
+    Returns the (class, group, operation, field, rollup) of the aggregate
+    view called name.
+
+    Raises:
+    -   ValueError: If there's no such view.
+    """
+    view = AGGREGATES.get(name)
+    if view is None:
+        raise ValueError(f"Unknown aggregate: {name}")
+    return view
+
+
+def haversine(lat1, lon1, lat2, lon2):
+    """Returns the great-circle distance (in km) between two points"""
+    phi1, phi2 = radians(lat1), radians(lat2)
+    a = (sin((phi2 - phi1) / 2) ** 2
+         + cos(phi1) * cos(phi2) * sin(radians(lon2 - lon1) / 2) ** 2)
+    return 2 * EARTH_RADIUS * asin(min(1.0, sqrt(a)))
+
+
+def bounding_box(lat, lon, radius_km):
+    """
+    Returns the (south, north, west, east) box holding every point within
+    radius_km of (lat, lon). west is greater than east when the box
+    crosses the antimeridian.
+    """
+    dlat = radius_km / DEGREE
+    south, north = max(-90.0, lat - dlat), min(90.0, lat + dlat)
+    if abs(lat) + dlat >= 90:
+        return south, north, -180.0, 180.0
+    # the widest longitude is where the circle touches a meridian, which
+    # is wider than dlat / cos(lat) at high latitudes and large radii
+    ratio = sin(radius_km / EARTH_RADIUS) / cos(radians(lat))
+    if ratio >= 1:
+        return south, north, -180.0, 180.0
+    dlon = degrees(asin(ratio))
+    west = (lon - dlon + 180) % 360 - 180
+    east = (lon + dlon + 180) % 360 - 180
+    return south, north, west, east
+
+
+def _get(obj, field, default):
+    """
+    Returns the field of obj, which is a model instance or the dictionary
+    of an unloaded entry.
+    """
+    if type(obj) is dict:
+        return obj.get(field, default)
+    return getattr(obj, field, default)
+
+
+class Index:
+    """
+    Base class of the indexes, subclasses implement `clear()`,
+    `add(key, value)` and `remove(key)`, and can override `build()`.
+    Persistent indexes are saved next to the storage file (in
+    "<file>.<className>.<name>.json"), with `dump()` and `load()`.
+
+    Attributes:
+    -   cls (type): The model class of the indexed objects.
+    -   field (str | tuple): The indexed attribute (or attributes).
+    -   default: The class default of the attribute, used for objects
+            that don't set it.
+    -   built (bool): Whether the index was built.
+    -   stale (set): The keys changed since the last query.
+    """
+
+    persistent = False
+
+    def __init__(self, cls, field):
+        """
+        Args:
+        -   cls (type): The model class of the indexed objects.
+        -   field (str | tuple): The indexed attribute (or attributes).
+        """
+        self.cls = cls
+        self.field = field
+        if type(field) is tuple:
+            self.default = tuple(getattr(cls, f, None) for f in field)
+        else:
+            self.default = getattr(cls, field, None)
+        self.built = False
+        self.stale = set()
+        self.clear()
+
+    def value(self, obj):
+        """
+        Returns the indexed attribute of obj (a tuple for several
+        attributes), which is a model instance or the dictionary of an
+        unloaded entry.
+        """
+        if type(self.field) is tuple:
+            if type(obj) is dict:
+                return tuple(map(obj.get, self.field, self.default))
+            return tuple(map(getattr, repeat(obj), self.field, self.default))
+        return _get(obj, self.field, self.default)
+
+    def mark(self, key):
+        """Marks key as changed, it's indexed again on the next query"""
+        if self.built:
+            self.stale.add(key)
+
+    def reset(self):
+        """Drops the index, it's built again on the next query"""
+        self.built = False
+        self.stale.clear()
+        self.clear()
+
+    def sync(self, partition):
+        """
+        Brings the index up to date, building it on first use.
+
+        Args:
+        -   partition (dict): The stored objects of the class, keyed by
+                "<className>.id".
+        """
+        if not self.built:
+            self.build(partition)
+            self.built = True
+            return
+        for key in self.stale:
+            self.remove(key)
+            obj = partition.get(key)
+            if obj is not None:
+                self.add(key, self.value(obj))
+        self.stale.clear()
+
+    def build(self, partition):
+        """Indexes every object of partition"""
+        for key, obj in partition.items():
+            self.add(key, self.value(obj))
+
+
+class HashIndex(Index):
+    """
+    Maps each value of the attribute to the keys holding it (in the order
+    they were indexed). Empty values aren't indexed.
+
+    Attributes:
+    -   keys (dict): The keys (as a dict with None values) by value.
+    -   values (dict): The indexed value of each key.
+    """
+
+    def clear(self):
+        """Empties the index"""
+        self.keys = {}
+        self.values = {}
+
+    def add(self, key, value):
+        """Indexes key under value"""
+        if value is None or value == '' or not isinstance(value, Hashable):
+            return
+        self.keys.setdefault(value, {})[key] = None
+        self.values[key] = value
+
+    def remove(self, key):
+        """Removes key from the index"""
+        if key not in self.values:
+            return
+        value = self.values.pop(key)
+        keys = self.keys[value]
+        del keys[key]
+        if not keys:
+            del self.keys[value]
+
+    def lookup(self, value):
+        """Returns the keys holding value"""
+        return list(self.keys.get(value, ()))
+
+    def count(self, values):
+        """Returns how many keys hold one of values"""
+        return sum(len(self.keys.get(value, ())) for value in values)
+
+    def select(self, values):
+        """Returns the keys holding one of values (which are distinct)"""
+        return [key for value in values for key in self.keys.get(value, ())]
+
+
+class GridIndex(Index):
+    """
+    Buckets (latitude, longitude) points in a grid of `cell` degrees, so
+    a box query only visits the cells it overlaps. Non-numeric, out of
+    range and unset ((0, 0), the class defaults) points aren't indexed.
+
+    Attributes:
+    -   cells (dict): The points ({key: (lat, lon)}) of each (row, column)
+            cell.
+    -   points (dict): The cell of each key.
+    """
+
+    cell = 0.1  # about 11 km of latitude
+    columns = round(360 / cell)
+
+    def clear(self):
+        """Empties the index"""
+        self.cells = {}
+        self.points = {}
+
+    def cell_of(self, lat, lon):
+        """Returns the (row, column) cell holding a point (see `add()`)"""
+        return (int((lat + 90) // self.cell),
+                min(int((lon + 180) // self.cell), self.columns - 1))
+
+    def add(self, key, value):
+        """Indexes key at the point value"""
+        lat, lon = value
+        if type(lat) not in (int, float) or type(lon) not in (int, float):
+            return
+        if (lat == 0 and lon == 0) or abs(lat) > 90 or abs(lon) > 180:
+            return
+        cell = (int((lat + 90) // self.cell),
+                min(int((lon + 180) // self.cell), self.columns - 1))
+        self.cells.setdefault(cell, {})[key] = value
+        self.points[key] = cell
+
+    def remove(self, key):
+        """Removes key from the index"""
+        if key not in self.points:
+            return
+        cell = self.points.pop(key)
+        points = self.cells[cell]
+        del points[key]
+        if not points:
+            del self.cells[cell]
+
+    def within(self, south, north, west, east):
+        """
+        Yields the (key, lat, lon) points inside a box, which crosses the
+        antimeridian when west is greater than east.
+        """
+        row_min = self.cell_of(south, 0)[0]
+        row_max = self.cell_of(north, 0)[0]
+        col_min = self.cell_of(0, west)[1]
+        col_max = self.cell_of(0, east)[1]
+        wraps = west > east
+        if wraps:
+            cols = [*range(col_min, self.columns), *range(col_max + 1)]
+        else:
+            cols = range(col_min, col_max + 1)
+        rows = range(row_min, row_max + 1)
+        if len(rows) * len(cols) <= len(self.cells):
+            cells = (self.cells.get((r, c)) for r in rows for c in cols)
+        else:
+            cells = (
+                points for (r, c), points in self.cells.items()
+                if row_min <= r <= row_max
+                and ((c >= col_min or c <= col_max) if wraps
+                     else col_min <= c <= col_max)
+            )
+        for points in cells:
+            if not points:
+                continue
+            for key, (lat, lon) in points.items():
+                if south <= lat <= north and (
+                    (lon >= west or lon <= east) if wraps
+                    else west <= lon <= east
+                ):
+                    yield key, lat, lon
+
+    def near(self, lat, lon, radius_km, limit=None):
+        """
+        Returns the keys of the points within radius_km of (lat, lon),
+        nearest first, and up to limit of them.
+        """
+        found = []
+        for key, p_lat, p_lon in self.within(
+            *bounding_box(lat, lon, radius_km)
+        ):
+            distance = haversine(lat, lon, p_lat, p_lon)
+            if distance <= radius_km:
+                found.append((distance, key))
+        if limit is None:
+            found.sort()
+        else:
+            found = heapq.nsmallest(limit, found)
+        return [key for _, key in found]
+
+
+class RangeIndex(Index):
+    """
+    Keeps the keys sorted by the value of a numeric attribute (then by
+    key), so a range of values is found by bisection. Non-numeric values
+    aren't indexed.
+
+    Attributes:
+    -   sorted_values (list): The indexed values in ascending order.
+    -   sorted_keys (list): The key of each value of sorted_values.
+    -   values (dict): The indexed value of each key.
+    """
+
+    def clear(self):
+        """Empties the index"""
+        self.sorted_values = []
+        self.sorted_keys = []
+        self.values = {}
+
+    def build(self, partition):
+        """Indexes every object of partition with a single sort"""
+        self.clear()
+        entries = []
+        for key, obj in partition.items():
+            value = self.value(obj)
+            if self.indexable(value):
+                entries.append((value, key))
+        entries.sort()
+        self.sorted_values = [value for value, _ in entries]
+        self.sorted_keys = [key for _, key in entries]
+        self.values = {key: value for value, key in entries}
+
+    def position(self, key, value):
+        """Returns where (value, key) is, or goes, in the sorted lists"""
+        lo = bisect_left(self.sorted_values, value)
+        hi = bisect_right(self.sorted_values, value, lo)
+        return bisect_left(self.sorted_keys, key, lo, hi)
+
+    def indexable(self, value):
+        """Returns whether value is indexed (a number, but not NaN)"""
+        return type(value) in (int, float) and value == value
+
+    def add(self, key, value):
+        """Indexes key under value"""
+        if not self.indexable(value):
+            return
+        i = self.position(key, value)
+        self.sorted_values.insert(i, value)
+        self.sorted_keys.insert(i, key)
+        self.values[key] = value
+
+    def remove(self, key):
+        """Removes key from the index"""
+        if key not in self.values:
+            return
+        i = self.position(key, self.values.pop(key))
+        del self.sorted_values[i]
+        del self.sorted_keys[i]
+
+    def bounds(self, low=None, high=None):
+        """
+        Returns the (start, stop) slice of the sorted lists holding the
+        values between low and high (inclusive, None for no bound).
+        """
+        values = self.sorted_values
+        start = 0 if low is None else bisect_left(values, low)
+        stop = len(values) if high is None else bisect_right(values, high)
+        return start, max(start, stop)
+
+    def range(self, low=None, high=None):
+        """Returns the keys of the values between low and high, in order"""
+        return self.sorted_keys[slice(*self.bounds(low, high))]
+
+    def count(self, intervals):
+        """Returns how many keys the (low, high) intervals hold"""
+        return sum(stop - start for start, stop in
+                   (self.bounds(low, high) for low, high in intervals))
+
+    def select(self, intervals):
+        """
+        Returns the keys held by the (low, high) intervals (which don't
+        overlap), in the order of the intervals.
+        """
+        return [key for low, high in intervals
+                for key in self.range(low, high)]
+
+
+class TimeIndex(RangeIndex):
+    """
+    Keeps the keys sorted by a timestamp (one of TIME_FIELDS), then by
+    key. The timestamps of unloaded entries are parsed.
+    """
+
+    def value(self, obj):
+        """Returns the timestamp of obj as a datetime (None if invalid)"""
+        value = super().value(obj)
+        if type(value) is str:
+            try:
+                return datetime.fromisoformat(value)
+            except ValueError:
+                return None
+        return value
+
+    def indexable(self, value):
+        """Returns whether value is indexed (a datetime)"""
+        return type(value) is datetime
+
+
+class KeyIndex(Index):
+    """
+    Keeps the keys of a class sorted, so by id, for the pages of
+    instances: a page starting after a key is found by bisection. The
+    indexed field is the id, which never changes.
+
+    Attributes:
+    -   sorted_keys (list): The keys in ascending order.
+    """
+
+    def clear(self):
+        """Empties the index"""
+        self.sorted_keys = []
+
+    def build(self, partition):
+        """Indexes every key of partition with a single sort"""
+        self.sorted_keys = sorted(partition)
+
+    def sync(self, partition):
+        """
+        Brings the index up to date: only the keys added or removed move,
+        the changes of the other attributes don't.
+        """
+        if not self.built:
+            super().sync(partition)
+            return
+        for key in self.stale:
+            if (key in partition) != self.has(key):
+                if key in partition:
+                    self.add(key, key)
+                else:
+                    self.remove(key)
+        self.stale.clear()
+
+    def has(self, key):
+        """Returns whether key is indexed"""
+        i = bisect_left(self.sorted_keys, key)
+        return i < len(self.sorted_keys) and self.sorted_keys[i] == key
+
+    def add(self, key, value):
+        """Indexes key (value is ignored)"""
+        self.sorted_keys.insert(bisect_left(self.sorted_keys, key), key)
+
+    def remove(self, key):
+        """Removes key from the index"""
+        if self.has(key):
+            del self.sorted_keys[bisect_left(self.sorted_keys, key)]
+
+    def after(self, key=None):
+        """
+        Returns the position of the first key greater than key (0 for
+        None).
+        """
+        return 0 if key is None else bisect_right(self.sorted_keys, key)
+
+
+class BitmapIndex(Index):
+    """
+    Maps each element of a list attribute (i.e the ids of
+    Place.amenity_ids) to a bitset of the objects holding it, stored as
+    a Python int where bit n stands for the object of ordinal n. Objects
+    holding several elements are found with a bitwise AND, and bitsets
+    combine with the keys found by other indexes (see `bits()`).
+
+    Attributes:
+    -   bitmaps (dict): The bitset of each element.
+    -   ordinals (dict): The ordinal of each key, kept for the life of the
+            index so an object keeps its bit when it changes.
+    -   keys (list): The key of each ordinal.
+    -   values (dict): The indexed elements of each key.
+    """
+
+    def clear(self):
+        """Empties the index"""
+        self.bitmaps = {}
+        self.ordinals = {}
+        self.keys = []
+        self.values = {}
+
+    def elements(self, value):
+        """Returns the indexable elements of a list value"""
+        if type(value) not in (list, tuple):
+            return ()
+        return {e for e in value if isinstance(e, Hashable)}
+
+    def ordinal(self, key):
+        """Returns the ordinal of key, assigning the next one if needed"""
+        ordinal = self.ordinals.get(key)
+        if ordinal is None:
+            ordinal = self.ordinals[key] = len(self.keys)
+            self.keys.append(key)
+        return ordinal
+
+    def build(self, partition):
+        """
+        Indexes every object of partition, setting the bits in bytearrays
+        so the large ints are only created once.
+        """
+        self.clear()
+        size = len(partition) // 8 + 1
+        arrays = {}
+        for key, obj in partition.items():
+            elements = self.elements(self.value(obj))
+            if not elements:
+                continue
+            ordinal = self.ordinal(key)
+            self.values[key] = elements
+            byte, bit = ordinal >> 3, 1 << (ordinal & 7)
+            for element in elements:
+                array = arrays.get(element)
+                if array is None:
+                    array = arrays[element] = bytearray(size)
+                array[byte] |= bit
+        self.bitmaps = {
+            element: int.from_bytes(array, 'little')
+            for element, array in arrays.items()
+        }
+
+    def add(self, key, value):
+        """Sets the bit of key in the bitset of each element of value"""
+        elements = self.elements(value)
+        if not elements:
+            return
+        bit = 1 << self.ordinal(key)
+        self.values[key] = elements
+        for element in elements:
+            self.bitmaps[element] = self.bitmaps.get(element, 0) | bit
+
+    def remove(self, key):
+        """Clears the bits of key"""
+        if key not in self.values:
+            return
+        mask = ~(1 << self.ordinals[key])
+        for element in self.values.pop(key):
+            bitmap = self.bitmaps[element] & mask
+            if bitmap:
+                self.bitmaps[element] = bitmap
+            else:
+                del self.bitmaps[element]
+
+    def all_of(self, elements):
+        """Returns the bitset of the objects holding every element"""
+        bitmaps = [self.bitmaps.get(e, 0) for e in elements]
+        if not bitmaps:
+            return 0
+        bitmaps.sort(key=int.bit_length)
+        result = bitmaps[0]
+        for bitmap in bitmaps[1:]:
+            if not result:
+                break
+            result &= bitmap
+        return result
+
+    def bits(self, keys):
+        """
+        Returns the bitset of keys (found by another index, i.e a price
+        range) to combine it with the bitsets of this one. Keys that aren't
+        indexed here hold no element, they are left out.
+        """
+        array = bytearray(len(self.keys) // 8 + 1)
+        ordinals = self.ordinals
+        for key in keys:
+            ordinal = ordinals.get(key)
+            if ordinal is not None:
+                array[ordinal >> 3] |= 1 << (ordinal & 7)
+        return int.from_bytes(array, 'little')
+
+    def lookup(self, bitset):
+        """Returns the keys of the bits set in bitset, by ordinal"""
+        digits = bin(bitset)[:1:-1]
+        keys = self.keys
+        found = []
+        i = digits.find('1')
+        while i >= 0:
+            found.append(keys[i])
+            i = digits.find('1', i + 1)
+        return found
+
+
+class TextIndex(Index):
+    """
+    Inverted index of the words of text attributes: each word maps to the
+    keys holding it with its number of occurrences (term frequency).
+
+    Attributes:
+    -   postings (dict): The {key: frequency} postings list of each word.
+    -   terms (dict): The {word: frequency} of each key, or None when the
+            index was loaded and no key changed since (it's only needed
+            to remove a key, so it's inverted from postings on demand).
+    """
+
+    persistent = True
+    name = 'search'
+
+    def clear(self):
+        """Empties the index"""
+        self.postings = {}
+        self.terms = {}
+
+    def key_terms(self):
+        """Returns terms, inverting postings first if it's unknown"""
+        if self.terms is None:
+            self.terms = {}
+            for word, postings in self.postings.items():
+                for key, occurrences in postings.items():
+                    self.terms.setdefault(key, {})[word] = occurrences
+        return self.terms
+
+    def add(self, key, value):
+        """Indexes the words of the text attributes (value) of key"""
+        counts = {}
+        for text in value:
+            if type(text) is str:
+                for word in tokenize(text):
+                    counts[word] = counts.get(word, 0) + 1
+        if not counts:
+            return
+        self.key_terms()[key] = counts
+        for word, occurrences in counts.items():
+            self.postings.setdefault(word, {})[key] = occurrences
+
+    def remove(self, key):
+        """Removes key from the index"""
+        for word in self.key_terms().pop(key, ()):
+            postings = self.postings[word]
+            del postings[key]
+            if not postings:
+                del self.postings[word]
+
+    def search(self, text, mode='and'):
+        """
+        Returns the keys holding every word of text ("and"), or any of
+        them ("or"), ranked by the frequency of the words.
+        """
+        words = dict.fromkeys(tokenize(text))
+        postings = [self.postings.get(word, {}) for word in words]
+        return rank(postings, mode)
+
+    def dump(self):
+        """Returns the index as a Json-serializable dict"""
+        return {'field': list(self.field), 'postings': self.postings}
+
+    def load(self, data):
+        """
+        Loads an index returned by `dump()`, its postings are used as they
+        are read.
+
+        Raises:
+        -   ValueError: If it was built over other attributes.
+        """
+        if tuple(data['field']) != self.field:
+            raise ValueError("Index of other attributes")
+        self.postings = data['postings']
+        self.terms = None
+        self.built = True
+        self.stale.clear()
+
+
+class ColumnGroup:
+    """
+    The rows of a ColumnIndex sharing a group value, stored column-wise:
+    the n-th value of every column belongs to the n-th key. A column of
+    integers ("q" array) turns into a column of doubles ("d" array) when
+    it receives another value, non-numeric values are stored as NaN.
+
+    Attributes:
+    -   keys (list): The key of each row.
+    -   columns (list): The array of each column.
+    -   invalid (list): How many NaN values each column holds.
+    """
+
+    def __init__(self, typecodes, keys=(), columns=None):
+        """
+        Args:
+        -   typecodes (list): The array type of each column, "q" or "d".
+        -   keys (list): The keys of the first rows.
+        -   columns (list): The values of each column for those rows.
+        """
+        self.keys = list(keys)
+        self.columns = []
+        self.invalid = []
+        for i, code in enumerate(typecodes):
+            values = columns[i] if columns else ()
+            kinds = set(map(type, values))
+            if kinds - ({int} if code == 'q' else {int, float}):
+                code = 'd'
+                values = [v if type(v) in (int, float) else nan
+                          for v in values]
+            try:
+                column = array(code, values)
+            except OverflowError:
+                column = array('d', values)
+            self.columns.append(column)
+            self.invalid.append(sum(map(isnan, column))
+                                if column.typecode == 'd' else 0)
+
+    def append(self, key, numbers):
+        """Appends the row of key, returns its position"""
+        self.keys.append(key)
+        for i, number in enumerate(numbers):
+            column = self.columns[i]
+            if column.typecode == 'q' and type(number) is not int:
+                column = self.columns[i] = array('d', column)
+            try:
+                column.append(number)
+            except OverflowError:
+                column = self.columns[i] = array('d', column)
+                column.append(number)
+            if number != number:
+                self.invalid[i] += 1
+        return len(self.keys) - 1
+
+    def pop(self, position):
+        """
+        Removes the row at position by moving the last row into it.
+
+        Returns:
+        -   The key of the moved row, or None if it was the last one.
+        """
+        for i, column in enumerate(self.columns):
+            if column[position] != column[position]:
+                self.invalid[i] -= 1
+            column[position] = column[-1]
+            column.pop()
+        last = self.keys.pop()
+        if position == len(self.keys):
+            return None
+        self.keys[position] = last
+        return last
+
+    def values(self, i):
+        """Returns column i, without its NaN values"""
+        column = self.columns[i]
+        if self.invalid[i]:
+            return array('d', [v for v in column if v == v])
+        return column
+
+
+class ColumnIndex(Index):
+    """
+    Columnar mirror of numeric attributes (i.e the prices of the places),
+    for aggregates computed by C functions over contiguous arrays instead
+    of reading the attributes of each instance. The rows are partitioned
+    by the first attribute of field (i.e city_id), so that grouped
+    aggregates read one array per group. Integer attributes are stored in
+    arrays of 64-bit integers (their sums are exact), float attributes in
+    arrays of doubles. Non-numeric values are left out of the aggregates.
+
+    Attributes:
+    -   group_field (str): The attribute the rows are grouped by.
+    -   fields (tuple): The numeric attributes, one column each.
+    -   typecodes (list): The array type of each column ("q" or "d").
+    -   groups (dict): The ColumnGroup of each group value.
+    -   rows (dict): The (group value, position) of each key.
+    """
+
+    operations = ('count', 'sum', 'mean', 'min', 'max')
+
+    def clear(self):
+        """Empties the index"""
+        self.group_field = self.field[0]
+        self.fields = self.field[1:]
+        self.typecodes = ['q' if type(d) is int else 'd'
+                          for d in self.default[1:]]
+        self.groups = {}
+        self.rows = {}
+
+    def build(self, partition):
+        """Indexes every object of partition, one array per column"""
+        self.clear()
+        grouped = {}
+        for key, obj in partition.items():
+            value = self.value(obj)
+            try:
+                rows = grouped.get(value[0])
+            except TypeError:
+                value = (None,) + value[1:]
+                rows = grouped.get(None)
+            if rows is None:
+                rows = grouped[value[0]] = ([], [])
+            rows[0].append(key)
+            rows[1].append(value)
+        for group, (keys, values) in grouped.items():
+            self.groups[group] = ColumnGroup(self.typecodes, keys,
+                                             list(zip(*values))[1:])
+            self.rows.update(zip(keys, zip(repeat(group), count())))
+
+    def add(self, key, value):
+        """Appends the row of key to the columns of its group"""
+        group, *numbers = value
+        numbers = [n if type(n) in (int, float) else nan for n in numbers]
+        if not isinstance(group, Hashable):
+            group = None
+        columns = self.groups.get(group)
+        if columns is None:
+            columns = self.groups[group] = ColumnGroup(self.typecodes)
+        self.rows[key] = (group, columns.append(key, numbers))
+
+    def remove(self, key):
+        """Removes the row of key"""
+        if key not in self.rows:
+            return
+        group, position = self.rows.pop(key)
+        columns = self.groups[group]
+        moved = columns.pop(position)
+        if moved is not None:
+            self.rows[moved] = (group, position)
+        if not columns.keys:
+            del self.groups[group]
+
+    def column(self, field):
+        """
+        Returns the position of the column of field.
+
+        Raises:
+        -   ValueError: If field has no column.
+        """
+        if field not in self.fields:
+            raise ValueError(f"{self.cls.__name__}.{field} has no column")
+        return self.fields.index(field)
+
+    def aggregate(self, field, operation='sum', by_group=False):
+        """
+        Returns an aggregate of the values of field: their "count",
+        "sum", "mean", "min" or "max" (None for the mean, min and max of
+        no value), or a {group value: aggregate} dict if by_group.
+
+        Raises:
+        -   ValueError: If field has no column or operation is unknown.
+        """
+        i = self.column(field)
+        if operation not in self.operations:
+            raise ValueError(f"Unknown operation: {operation}")
+        if by_group:
+            return {
+                group: self.reduce(operation, [columns.values(i)])
+                for group, columns in self.groups.items()
+            }
+        return self.reduce(operation, [columns.values(i)
+                                       for columns in self.groups.values()])
+
+    @staticmethod
+    def reduce(operation, columns):
+        """Returns the aggregate of the values of several arrays"""
+        columns = [column for column in columns if len(column)]
+        size = sum(map(len, columns))
+        if operation == 'count':
+            return size
+        if operation in ('sum', 'mean'):
+            if all(column.typecode == 'q' for column in columns):
+                total = sum(map(sum, columns))
+            else:
+                total = fsum(map(fsum, columns))
+            if operation == 'sum':
+                return total
+            return total / size if size else None
+        if not size:
+            return None
+        if operation == 'min':
+            return min(map(min, columns))
+        return max(map(max, columns))
+
+    def histogram(self, field, bins=10, low=None, high=None):
+        """
+        Returns the histogram of the values of field between low and high
+        (defaulting to their min and max), in bins of equal width. The
+        arrays are counted by a Counter, so only each distinct value is
+        put in its bin by Python code.
+
+        Returns:
+        -   tuple: The bins + 1 edges and the count of each bin, the last
+                bin holds the values equal to high.
+
+        Raises:
+        -   ValueError: If field has no column or bins isn't positive.
+        """
+        i = self.column(field)
+        if bins < 1:
+            raise ValueError("bins must be positive")
+        found = Counter()
+        for columns in self.groups.values():
+            found.update(columns.values(i))
+        if low is None:
+            low = min(found, default=0)
+        if high is None:
+            high = max(found, default=0)
+        width = (high - low) / bins
+        edges = [low + width * n for n in range(bins)] + [high]
+        counts = [0] * bins
+        for value, n in found.items():
+            if low <= value <= high:
+                counts[min(int((value - low) // width), bins - 1)
+                       if width else -1] += n
+        return edges, counts
+
+
+class AggregateIndex(Index):
+    """
+    Running count of the instances in each group of the first attribute
+    of field (i.e city_id), with the sum of their second attribute if
+    any (i.e price_by_night). A change moves one row between groups in
+    constant time, so the aggregates are never computed from a scan.
+    Empty groups and non-numeric (or infinite) values are left out.
+
+    Attributes:
+    -   counts (dict): The number of rows of each group.
+    -   sums (dict): The sum of the numeric values of each group.
+    -   numbers (dict): The number of numeric values of each group.
+    -   rows (dict): The (group, number or None) of each key.
+    """
+
+    operations = ('count', 'sum', 'mean')
+
+    def clear(self):
+        """Empties the index"""
+        self.counts = {}
+        self.sums = {}
+        self.numbers = {}
+        self.rows = {}
+
+    def add(self, key, value):
+        """Adds the row of key to its group"""
+        group = value[0]
+        if group is None or group == '' or not isinstance(group, Hashable):
+            return
+        number = value[1] if len(value) > 1 else None
+        if type(number) not in (int, float) or (
+            type(number) is float and not isfinite(number)
+        ):
+            number = None
+        self.rows[key] = (group, number)
+        self.counts[group] = self.counts.get(group, 0) + 1
+        if number is not None:
+            self.sums[group] = self.sums.get(group, 0) + number
+            self.numbers[group] = self.numbers.get(group, 0) + 1
+
+    def remove(self, key):
+        """Removes the row of key from its group"""
+        row = self.rows.pop(key, None)
+        if row is None:
+            return
+        group, number = row
+        self.counts[group] -= 1
+        if not self.counts[group]:
+            del self.counts[group]
+        if number is None:
+            return
+        self.numbers[group] -= 1
+        if self.numbers[group]:
+            self.sums[group] -= number
+        else:
+            del self.numbers[group], self.sums[group]
+
+    def result(self, operation='count', parents=None):
+        """
+        Returns the {group: aggregate} of operation, or the aggregates of
+        the parent groups if parents maps each group to its parent (the
+        groups without a parent are left out).
+        """
+        counts, sums, numbers = self.counts, self.sums, self.numbers
+        if parents is not None:
+            counts, sums, numbers = (
+                self.roll_up(totals, parents)
+                for totals in (counts, sums, numbers)
+            )
+        return self.combine(operation, counts, sums, numbers)
+
+    @staticmethod
+    def roll_up(totals, parents):
+        """Returns the {parent: total} of the {group: total} totals"""
+        rolled = {}
+        for group, total in totals.items():
+            parent = parents.get(group)
+            if parent is not None:
+                rolled[parent] = rolled.get(parent, 0) + total
+        return rolled
+
+    @staticmethod
+    def combine(operation, counts, sums, numbers):
+        """
+        Returns the {group: aggregate} of operation from the counts, sums
+        and numbers of values of the groups. The mean of a group without
+        numeric values is None.
+        """
+        if operation == 'count':
+            return dict(counts)
+        if operation == 'sum':
+            return {group: sums.get(group, 0) for group in counts}
+        return {group: sums[group] / numbers[group] if group in numbers
+                else None for group in counts}
+
+
+# the index types saved next to the storage file
+persistent_indexes = [TextIndex]
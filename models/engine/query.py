@@ -0,0 +1,282 @@
+#!/usr/bin/python3
+"""
+This module defines the filters of `storage.where()` and
+`storage.top_k()`.
+
+A filter is a list of (attribute, operator, value) conditions that must
+all hold, e.g. [('max_guest', '>=', 4), ('city_id', '==', 'abc')]. It
+is usually parsed from the text of the console's where command
+("max_guest >= 4, city_id == abc"). An instance that doesn't set an
+attribute is compared through the class default, like the indexes do.
+The "has" operator keeps the instances whose list attribute holds every
+value of a list, e.g. ('amenity_ids', 'has', ['wifi', 'tv']).
+"""
+import ast
+import heapq
+import re
+
+OPERATORS = {
+    '==': lambda a, b: a == b,
+    '!=': lambda a, b: a != b,
+    '<': lambda a, b: a < b,
+    '<=': lambda a, b: a <= b,
+    '>': lambda a, b: a > b,
+    '>=': lambda a, b: a >= b,
+    'in': lambda a, b: a in b,
+    'has': lambda a, b: type(a) is list and all(v in a for v in b),
+}
+# the "order by <field> [asc|desc] limit <k>" clause ending a filter
+ORDER_BY = re.compile(
+    r'(?:^|[\s,])order\s+by\s+(\w+)(?:\s+(asc|desc))?\s+limit\s+(\d+)\s*$',
+    re.IGNORECASE
+)
+CONDITION = re.compile(
+    r'\s*(\w+)\s*(==|!=|<=|>=|<|>|(?<=\s)(?:in|has)(?=[\s\[(]))\s*(.*?)\s*',
+    re.DOTALL
+)
+
+
+def parse_conditions(text):
+    """
+    Returns the conditions of a comma separated filter, in order.
+    Values are Python literals, anything else is read as a string (so
+    ids don't have to be quoted).
+
+    Example:
+    >>>> parse_conditions('max_guest >= 4, city_id in [a1, b2]')
+    [('max_guest', '>=', 4), ('city_id', 'in', ['a1', 'b2'])]
+    >>>> parse_conditions('amenity_ids has wifi')
+    [('amenity_ids', 'has', ['wifi'])]
+
+    Raises:
+    -   ValueError: If a condition can't be parsed.
+    """
+    conditions = []
+    for part in _split(text):
+        if not part.strip():
+            continue
+        match = CONDITION.fullmatch(part)
+        if match is None or not match.group(3):
+            raise ValueError(f"Invalid condition: {part.strip()}")
+        field, op, raw = match.groups()
+        value = _value(raw)
+        if op in ('in', 'has') and type(value) is not list:
+            value = _value(f"[{raw[1:-1]}]" if raw[:1] == '(' else raw)
+        if op == 'has' and type(value) is not list:
+            value = [value]
+        conditions.append((field, op, value))
+    return check_conditions(conditions)
+
+
+def parse_order(text):
+    """
+    Splits the "order by <field> [asc|desc] limit <k>" clause off the end
+    of a filter.
+
+    Example:
+    >>>> parse_order('city_id == a1, order by price_by_night limit 10')
+    ('city_id == a1', ('price_by_night', False, 10))
+
+    Returns:
+    -   tuple: The text of the conditions, and the (field, descending, k)
+            order or None if there's no such clause.
+    """
+    match = ORDER_BY.search(text)
+    if match is None:
+        return text, None
+    field, direction, k = match.groups()
+    order = (field, (direction or 'asc').lower() == 'desc', int(k))
+    return text[:match.start()].rstrip(' ,'), order
+
+
+def check_conditions(conditions):
+    """
+    Returns conditions as a list of (attribute, operator, value) tuples.
+
+    Raises:
+    -   ValueError: If an operator is unknown, or the value of an "in"
+            or "has" condition isn't a list, tuple or set.
+    """
+    checked = []
+    for field, op, value in conditions:
+        if op not in OPERATORS:
+            raise ValueError(f"Unknown operator: {op}")
+        if op in ('in', 'has'):
+            if type(value) not in (list, tuple, set, frozenset):
+                raise ValueError(f"{field} {op}: the value isn't a list")
+            value = list(value)
+        checked.append((field, op, value))
+    return checked
+
+
+def matches(obj, conditions):
+    """
+    Returns True if obj meets every condition. Values that can't be
+    compared (e.g. a string and a number) don't meet it.
+    """
+    for field, op, value in conditions:
+        attr = getattr(obj, field, None)
+        try:
+            if not OPERATORS[op](attr, value):
+                return False
+        except TypeError:
+            return False
+    return True
+
+
+def top_k(items, field, k, descending=False, numeric=False):
+    """
+    Returns the (key, instance) pairs of items with the k smallest values
+    of field (the largest if descending), in order, ties broken by key.
+    They're selected with a heap of k items, O(n log k) instead of
+    sorting every item. Instances without the field are left out, and so
+    are the values of a numeric field that aren't numbers.
+
+    Args:
+    -   items (iterable): The (key, instance) pairs.
+    -   field (str): The attribute ordering the instances.
+    -   k (int): How many pairs are returned (at most).
+    -   descending (bool): Whether the largest values come first.
+    -   numeric (bool): Whether field holds numbers.
+
+    Raises:
+    -   ValueError: If values of field can't be compared.
+    """
+    def entries():
+        for key, obj in items:
+            value = getattr(obj, field, None)
+            if value is None:
+                continue
+            if numeric and (type(value) not in (int, float)
+                            or value != value):
+                continue
+            yield value, key, obj
+
+    pick = heapq.nlargest if descending else heapq.nsmallest
+    try:
+        return [(key, obj) for _, key, obj in pick(k, entries())]
+    except TypeError:
+        raise ValueError(f"{field}: values that can't be compared") \
+            from None
+
+
+def equal_values(conditions):
+    """
+    Returns the values allowed by the "==" and "in" conditions (in the
+    order of the first one), or None if there's no such condition or a
+    value isn't hashable.
+    """
+    values = None
+    try:
+        for _, op, value in conditions:
+            if op == '==':
+                allowed = [value]
+            elif op == 'in':
+                allowed = value
+            else:
+                continue
+            if values is None:
+                values = list(dict.fromkeys(allowed))
+            else:
+                values = [v for v in values if v in allowed]
+    except TypeError:
+        return None
+    return values
+
+
+def interval(conditions):
+    """
+    Returns the (low, high) bounds (inclusive, None for no bound) set by
+    the numeric "<", "<=", ">" and ">=" conditions.
+    """
+    low = high = None
+    for _, op, value in conditions:
+        if type(value) not in (int, float) or value != value:
+            continue
+        if op in ('>', '>='):
+            low = value if low is None else max(low, value)
+        elif op in ('<', '<='):
+            high = value if high is None else min(high, value)
+    return low, high
+
+
+def format_conditions(conditions):
+    """Returns conditions as the text of a filter"""
+    return ', '.join(f"{field} {op} {value!r}"
+                     for field, op, value in conditions)
+
+
+def _split(text):
+    """Splits text on the commas outside of quotes and brackets"""
+    parts, start, depth, quote = [], 0, 0, None
+    for i, char in enumerate(text):
+        if quote:
+            if char == quote:
+                quote = None
+        elif char in '"\'':
+            quote = char
+        elif char in '([{':
+            depth += 1
+        elif char in ')]}':
+            depth -= 1
+        elif char == ',' and depth == 0:
+            parts.append(text[start:i])
+            start = i + 1
+    parts.append(text[start:])
+    return parts
+
+
+def _value(raw):
+    """
+    Returns the literal written in raw, or raw as a string (unquoted). The
+    items of a list are read the same way.
+    """
+    try:
+        return ast.literal_eval(raw)
+    except (ValueError, SyntaxError, MemoryError, RecursionError):
+        pass
+    if raw[:1] == '[' and raw[-1:] == ']':
+        return [_value(item.strip()) for item in _split(raw[1:-1])
+                if item.strip()]
+    return raw.strip("\"'")
+
+
+class Plan:
+    """
+    How `storage.where()` finds the instances meeting a filter, as
+    printed by the console's explain command.
+
+    Attributes:
+    -   cls_name (str): The class of the instances.
+    -   access (str): "scan" to check every instance of the class, or
+            the index (or access path) the candidates are read from.
+    -   field (str): The attribute looked up in the index, if any.
+    -   estimate (int): How many candidates the access reads.
+    -   total (int): How many instances the class has.
+    -   conditions (list): The filter, checked on every candidate.
+    """
+
+    def __init__(self, cls_name, access, field, estimate, total,
+                 conditions):
+        """Sets the attributes (see the class docstring)"""
+        self.cls_name = cls_name
+        self.access = access
+        self.field = field
+        self.estimate = estimate
+        self.total = total
+        self.conditions = conditions
+
+    def __str__(self):
+        """Returns the plan as one line of text"""
+        access = self.access
+        if self.field:
+            access += f" on {self.field}"
+        text = (f"{self.cls_name}: {access} "
+                f"(~{self.estimate} of {self.total} rows)")
+        if self.conditions:
+            text += f", filter: {format_conditions(self.conditions)}"
+        return text
+
+    def __repr__(self):
+        """Returns the plan as one line of text"""
+        return f"<Plan {self}>"
@@ -0,0 +1,268 @@
+#!/usr/bin/python3
+"""
+This module defines the formats FileStorage can write its files in.
+
+A serializer turns each stored object into an entry, writes a snapshot
+made of entries, reads a snapshot back one entry at a time, and frames
+the put/del records of the journal. Entries are cached by the storage
+so an unchanged object is never encoded twice.
+
+- "json" (the default): a single Json object, as it always was.
+- "binary": length-prefixed `marshal` records with typed numbers, and
+    the created_at/updated_at timestamps stored as integers.
+"""
+import json
+import marshal
+import struct
+from datetime import datetime, timedelta
+
+EPOCH = datetime(1970, 1, 1)
+MICROSECOND = timedelta(microseconds=1)
+TIMESTAMPS = ('created_at', 'updated_at')
+
+
+class JsonSerializer:
+    """
+    Reads and writes the storage as a Json object of "<key>": {...}
+    entries, and the journal as one Json record per line.
+    """
+
+    name = 'json'
+    extension = '.json'
+    file_mode = ''
+
+    def encode(self, key, obj):
+        """
+        Returns the Json entry ('"<key>": {...}') of obj, which is a model
+        instance or the dictionary of an unloaded entry.
+        """
+        # the storage caches the entry, the instance doesn't keep a copy
+        _dict = obj if type(obj) is dict else obj.to_dict(memoize=False)
+        return f"{json.dumps(key)}: {json.dumps(_dict)}"
+
+    def write(self, f, entries):
+        """Writes a snapshot made of entries to f"""
+        f.write('{' + ', '.join(entries) + '}')
+
+    def read(self, f, chunk_size):
+        """
+        Yields the (key, dict) entries of the Json object in f one at a
+        time, reading the file in chunks so that the whole document is
+        never held in memory.
+
+        Raises:
+        -   ValueError: If the file isn't a valid Json object.
+        """
+        decode = json.JSONDecoder().raw_decode
+        buf, pos, eof = '', 0, False
+
+        def fill():
+            """Appends the next chunk to what's left of the buffer"""
+            nonlocal buf, pos, eof
+            chunk = f.read(chunk_size)
+            eof = not chunk
+            buf, pos = buf[pos:] + chunk, 0
+
+        def skip_to_char():
+            """Returns the next non-whitespace character (or '' at eof)"""
+            nonlocal pos
+            while True:
+                while pos < len(buf) and buf[pos] in ' \t\n\r':
+                    pos += 1
+                if pos < len(buf) or eof:
+                    return buf[pos:pos + 1]
+                fill()
+
+        def value():
+            """Decodes the Json value starting at pos"""
+            nonlocal pos
+            while True:
+                try:
+                    val, end = decode(buf, pos)
+                    if end < len(buf) or eof:
+                        pos = end
+                        return val
+                except json.JSONDecodeError:
+                    if eof:
+                        raise
+                fill()
+
+        def expect(chars):
+            """Consumes the next character, which must be one of chars"""
+            nonlocal pos
+            char = skip_to_char()
+            if not char or char not in chars:
+                raise json.JSONDecodeError(
+                    f"Expecting one of {chars!r}", buf, pos
+                )
+            pos += 1
+            return char
+
+        expect('{')
+        if skip_to_char() == '}':
+            return
+        while True:
+            skip_to_char()
+            key = value()
+            expect(':')
+            skip_to_char()
+            yield key, value()
+            if expect(',}') == '}':
+                return
+
+    def put_record(self, entry):
+        """Returns the journal record storing an entry"""
+        return f'{{"put": {{{entry}}}}}\n'
+
+    def del_record(self, key):
+        """Returns the journal record deleting key"""
+        return f'{{"del": {json.dumps(key)}}}\n'
+
+    def read_journal(self, f):
+        """
+        Yields (key, dict) pairs recorded in the journal, with dict set to
+        None for deletions. A torn last line (interrupted append, without
+        its newline) is ignored.
+
+        Returns:
+        -   int: The offset of the torn line, or None if there's none.
+        """
+        end = 0
+        for line in f:
+            if not line.endswith('\n'):
+                return end
+            record = json.loads(line)
+            end += len(line.encode(f.encoding))
+            if "del" in record:
+                yield record["del"], None
+            else:
+                yield from record["put"].items()
+
+
+class BinarySerializer:
+    """
+    Reads and writes the storage as a header followed by length-prefixed
+    `marshal` records of (key, dict). Numbers keep their type, and the
+    timestamps are stored as microseconds since the epoch, so they are
+    neither formatted on save nor parsed on reload.
+    """
+
+    name = 'binary'
+    extension = '.bin'
+    file_mode = 'b'
+    header = b'HBNB' + bytes([1, marshal.version])
+    length = struct.Struct('<I')
+
+    def encode(self, key, obj):
+        """
+        Returns the framed record of obj, which is a model instance or the
+        dictionary of an unloaded entry.
+        """
+        if type(obj) is dict:
+            _dict = obj.copy()
+        else:
+            _dict = obj.__dict__.copy()
+            _dict['__class__'] = obj.__class__.__name__
+        for name in TIMESTAMPS:
+            value = _dict.get(name)
+            if type(value) is datetime and value.tzinfo is None:
+                _dict[name] = (value - EPOCH) // MICROSECOND
+        return self.__frame(marshal.dumps((key, _dict)))
+
+    def write(self, f, entries):
+        """Writes a snapshot made of entries to f"""
+        f.write(self.header)
+        f.write(b''.join(entries))
+
+    def read(self, f, chunk_size):
+        """
+        Yields the (key, dict) entries of the snapshot in f one at a time,
+        with the timestamps turned back into datetime objects.
+
+        Raises:
+        -   ValueError: If the file isn't a complete binary snapshot.
+        """
+        if f.read(len(self.header)) != self.header:
+            raise ValueError("Not a binary storage file")
+        for payload in self.__frames(f, torn_ok=False):
+            yield self.__decode(payload)
+
+    def put_record(self, entry):
+        """Returns the journal record storing an entry"""
+        return b'P' + entry
+
+    def del_record(self, key):
+        """Returns the journal record deleting key"""
+        return b'D' + self.__frame(marshal.dumps(key))
+
+    def read_journal(self, f):
+        """
+        Yields (key, dict) pairs recorded in the journal, with dict set to
+        None for deletions. A torn last record (interrupted append) is
+        ignored.
+
+        Returns:
+        -   int: The offset of the torn record, or None if there's none.
+        """
+        while True:
+            end = f.tell()
+            op = f.read(1)
+            if not op:
+                return None
+            payload = next(self.__frames(f, torn_ok=True, count=1), None)
+            if payload is None:
+                return end
+            if op == b'D':
+                yield marshal.loads(payload), None
+            else:
+                yield self.__decode(payload)
+
+    def __frame(self, payload):
+        """Prefixes payload with its length"""
+        return self.length.pack(len(payload)) + payload
+
+    def __frames(self, f, torn_ok, count=-1):
+        """Yields the payloads of up to count (or all) framed records"""
+        size = self.length.size
+        while count:
+            head = f.read(size)
+            if not head:
+                return
+            payload = b''
+            if len(head) == size:
+                length = self.length.unpack(head)[0]
+                payload = f.read(length)
+            if len(head) < size or len(payload) < length:
+                if torn_ok:
+                    return
+                raise ValueError("Truncated binary storage file")
+            yield payload
+            count -= 1
+
+    def __decode(self, payload):
+        """Returns the (key, dict) pair of a record"""
+        key, _dict = marshal.loads(payload)
+        for name in TIMESTAMPS:
+            value = _dict.get(name)
+            if type(value) is int:
+                _dict[name] = EPOCH + value * MICROSECOND
+        return key, _dict
+
+
+serializers = {
+    JsonSerializer.name: JsonSerializer(),
+    BinarySerializer.name: BinarySerializer(),
+}
+
+
+def get_serializer(name):
+    """
+    Returns the serializer registered under name.
+
+    Raises:
+    -   ValueError: If no serializer has that name.
+    """
+    try:
+        return serializers[name]
+    except KeyError:
+        raise ValueError(f"Unknown storage format: {name}") from None
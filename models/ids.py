@@ -0,0 +1,119 @@
+#!/usr/bin/python3
+"""
+This module defines the generators of the ids of new instances.
+
+The HBNB_ID_FORMAT environment variable picks the generator used by
+BaseModel:
+
+- "uuid4" (the default): random UUIDs, as the instances always had.
+- "uuid7": time-ordered UUIDs (RFC 9562 version 7), starting with the
+    creation time in milliseconds. Their string form sorts in creation
+    order, so the keys of ordered indexes and pages of instances follow
+    it, and instances created together sit next to each other.
+
+Both kinds are plain strings once created: the storages load either,
+mixed in any way.
+"""
+import os
+import time
+import uuid
+
+# "uuid4" for random ids, "uuid7" for time-ordered ids
+HBNB_ID_FORMAT = os.getenv("HBNB_ID_FORMAT", "uuid4")
+
+
+def uuid4():
+    """Returns a random UUID (version 4) as a string"""
+    return str(uuid.uuid4())
+
+
+class UUID7:
+    """
+    Generates time-ordered UUIDs (version 7): 48 bits of Unix time in
+    milliseconds, then 74 bits that are random for the first id of a
+    millisecond and counted up from there for the next ones, so the ids
+    of one generator always increase, even if the clock goes back.
+
+    The random bits are read from a pool of entropy filled by one
+    `os.urandom()` call every `pool_size // 10` new milliseconds, instead
+    of one call per id as `uuid.uuid4()` does.
+
+    Attributes:
+    -   clock (function): Returns the current time in nanoseconds.
+    -   pool_size (int): The number of random bytes read at once.
+    -   pool (bytes): The random bytes not used yet (from `position`).
+    -   position (int): The next random byte of pool.
+    -   last_ms (int): The time of the last id.
+    -   last_tail (int): The 74 bits following the time in the last id.
+    """
+
+    def __init__(self, pool_size=4096, clock=time.time_ns):
+        """
+        Args:
+        -   pool_size (int): The number of random bytes read at once.
+        -   clock (function): Returns the current time in nanoseconds.
+        """
+        self.clock = clock
+        self.pool_size = pool_size
+        self.reset()
+
+    def reset(self):
+        """Drops the pooled entropy (i.e in a forked process)"""
+        self.pool = b''
+        self.position = 0
+        self.last_ms = -1
+        self.last_tail = 0
+
+    def random_bits(self):
+        """Returns 74 random bits from the pool"""
+        position = self.position
+        if position + 10 > len(self.pool):
+            self.pool = os.urandom(self.pool_size)
+            position = 0
+        self.position = position + 10
+        return int.from_bytes(self.pool[position:position + 10],
+                              'big') >> 6
+
+    def __call__(self):
+        """Returns the next id as a string"""
+        ms = self.clock() // 1000000
+        if ms > self.last_ms:
+            # the top bit is left clear to count the next ids up
+            tail = self.random_bits() >> 1
+        else:
+            ms = self.last_ms
+            tail = self.last_tail + 1
+            if tail >> 74:
+                ms += 1
+                tail = self.random_bits() >> 1
+        self.last_ms = ms
+        self.last_tail = tail
+        value = (ms << 80 | 0x7 << 76 | (tail >> 62) << 64
+                 | 0b10 << 62 | tail & 0x3fffffffffffffff)
+        hex_ = f"{value:032x}"
+        return (f"{hex_[:8]}-{hex_[8:12]}-{hex_[12:16]}-{hex_[16:20]}-"
+                f"{hex_[20:]}")
+
+
+uuid7 = UUID7()
+if hasattr(os, 'register_at_fork'):
+    # a child process must not hand out the ids of its parent's pool
+    os.register_at_fork(after_in_child=uuid7.reset)
+
+GENERATORS = {'uuid4': uuid4, 'uuid7': uuid7}
+
+
+def get_generator(name):
+    """
+    Returns the id generator called name ("uuid4" or "uuid7").
+
+    Raises:
+    -   ValueError: If there's no such generator.
+    """
+    generator = GENERATORS.get(name)
+    if generator is None:
+        raise ValueError(f"Unknown id format: {name}")
+    return generator
+
+
+new_id = get_generator(HBNB_ID_FORMAT)
@@ -1,12 +1,15 @@
 #!/usr/bin/python3
 """Defines the unittests for the console.py module"""
 import os
+import subprocess
+import sys
+import tempfile
 import unittest
 from io import StringIO
 from unittest.mock import patch
-from console import HBNBCommand, error_messages
+from console import HBNBCommand, error_messages, main
 from models.base_model import BaseModel
-from models.__init__ import storage
+from models import storage
 from models.user import User
 from models.place import Place
 from models.state import State
@@ -186,6 +189,15 @@ class TestBaseModel(unittest.TestCase):
                 count += 1
         self.assertEqual(int(output), count)
 
+    def test_all_with_clsname(self):
+        obj = classes[self._cls]()
+        other = State() if self._cls != "State" else City()
+        with patch('sys.stdout', new=StringIO()) as mock_stdout:
+            self.console.onecmd(f"all {self._cls}")
+        output = mock_stdout.getvalue()
+        self.assertIn(obj.id, output)
+        self.assertNotIn(other.id, output)
+
     def test_destroy(self):
         obj = classes[self._cls]()
         with patch('sys.stdout', new=StringIO()):
@@ -404,5 +416,590 @@ class TestBaseModelDotNotation(unittest.TestCase):
         self.assertEqual(output, expected)
 
 
+class TestConsoleTransaction(unittest.TestCase):
+    """Testing the begin, commit and rollback commands"""
+
+    def setUp(self):
+        self.console = HBNBCommand()
+        self.file = "hbnb.json"
+
+    def tearDown(self):
+        storage.rollback()
+        if os.path.exists(self.file):
+            os.remove(self.file)
+
+    def test_commit(self):
+        with patch('sys.stdout', new=StringIO()) as mock_stdout:
+            self.console.onecmd("begin")
+            self.console.onecmd("create User")
+            self.assertFalse(os.path.exists(self.file))
+            self.console.onecmd("commit")
+        obj_id = mock_stdout.getvalue().strip()
+        self.assertTrue(os.path.exists(self.file))
+        self.assertIn(f"User.{obj_id}", storage.all())
+
+    def test_rollback(self):
+        obj = User()
+        obj.save()
+        with patch('sys.stdout', new=StringIO()) as mock_stdout:
+            self.console.onecmd("begin")
+            self.console.onecmd("create User")
+            self.console.onecmd(f"update User {obj.id} first_name \"x\"")
+            self.console.onecmd("rollback")
+        obj_id = mock_stdout.getvalue().strip()
+        self.assertNotIn(f"User.{obj_id}", storage.all())
+        self.assertNotIn("first_name", obj.__dict__)
+
+    def test_commit_without_begin(self):
+        with patch('sys.stdout', new=StringIO()) as mock_stdout:
+            self.console.onecmd("commit")
+        output = mock_stdout.getvalue().strip()
+        self.assertEqual(output, error_messages["no_batch"])
+
+    def test_rollback_without_begin(self):
+        with patch('sys.stdout', new=StringIO()) as mock_stdout:
+            self.console.onecmd("rollback")
+        output = mock_stdout.getvalue().strip()
+        self.assertEqual(output, error_messages["no_batch"])
+
+
+class TestConsoleRelated(unittest.TestCase):
+    """Testing the <className>.by_<parent>(<id>) commands"""
+
+    def setUp(self):
+        self.console = HBNBCommand()
+        self.state = State()
+        self.city = City()
+        self.city.state_id = self.state.id
+
+    def tearDown(self):
+        storage.delete(self.state)
+        storage.delete(self.city)
+
+    def run_cmd(self, line):
+        with patch('sys.stdout', new=StringIO()) as mock_stdout:
+            self.console.onecmd(self.console.precmd(line))
+        return mock_stdout.getvalue().strip()
+
+    def test_by_state(self):
+        output = self.run_cmd(f"City.by_state({self.state.id})")
+        self.assertEqual(output, str([str(self.city)]))
+
+    def test_by_city(self):
+        place = Place()
+        place.city_id = self.city.id
+        output = self.run_cmd(f"Place.by_city(\"{self.city.id}\")")
+        self.assertEqual(output, str([str(place)]))
+        storage.delete(place)
+
+    def test_by_user_and_place(self):
+        user = User()
+        place = Place()
+        review = Review()
+        place.user_id = review.user_id = user.id
+        review.place_id = place.id
+        self.assertIn(place.id, self.run_cmd(f"Place.by_user({user.id})"))
+        self.assertIn(review.id, self.run_cmd(f"Review.by_user({user.id})"))
+        self.assertIn(review.id,
+                      self.run_cmd(f"Review.by_place({place.id})"))
+        for obj in (user, place, review):
+            storage.delete(obj)
+
+    def test_no_related(self):
+        other = State()
+        self.assertEqual(self.run_cmd(f"City.by_state({other.id})"), "[]")
+        storage.delete(other)
+
+    def test_invalid_id(self):
+        output = self.run_cmd("City.by_state(123)")
+        self.assertEqual(output, error_messages["no_obj"])
+
+    def test_missing_id(self):
+        output = self.run_cmd("by_state City")
+        self.assertEqual(output, error_messages["no_obj_id"])
+
+    def test_invalid_relation(self):
+        output = self.run_cmd(f"State.by_city({self.city.id})")
+        self.assertEqual(output, f"{error_messages['no_method']}: by_city **")
+
+
+class TestConsoleNear(unittest.TestCase):
+    """Testing the Place.near(<lat>, <lon>, <km>) command"""
+
+    def setUp(self):
+        self.console = HBNBCommand()
+        self.place = Place()
+        self.place.latitude = 48.8566
+        self.place.longitude = 2.3522
+
+    def tearDown(self):
+        storage.delete(self.place)
+
+    def run_cmd(self, line):
+        with patch('sys.stdout', new=StringIO()) as mock_stdout:
+            self.console.onecmd(self.console.precmd(line))
+        return mock_stdout.getvalue().strip()
+
+    def test_near(self):
+        output = self.run_cmd("Place.near(48.86, 2.35, 5)")
+        self.assertEqual(output, str([str(self.place)]))
+
+    def test_near_with_limit(self):
+        other = Place()
+        other.latitude = 48.8567
+        other.longitude = 2.3523
+        output = self.run_cmd("Place.near(48.8566, 2.3522, 5, 1)")
+        self.assertEqual(output, str([str(self.place)]))
+        storage.delete(other)
+
+    def test_nothing_near(self):
+        self.assertEqual(self.run_cmd("Place.near(-33.86, 151.2, 5)"), "[]")
+
+    def test_invalid_number(self):
+        output = self.run_cmd("Place.near(north, 2.35, 5)")
+        self.assertEqual(output, error_messages["no_num"])
+        output = self.run_cmd("near Place 48.86")
+        self.assertEqual(output, error_messages["no_num"])
+
+    def test_invalid_class(self):
+        output = self.run_cmd("City.near(48.86, 2.35, 5)")
+        self.assertEqual(output, f"{error_messages['no_method']}: near **")
+        self.assertEqual(self.run_cmd("near"), error_messages["no_cls_name"])
+
+
+class TestConsoleAmenityIndex(unittest.TestCase):
+    """Testing that updates made by the console reach the indexes"""
+
+    def tearDown(self):
+        storage._FileStorage__objects.clear()
+        if os.path.exists("hbnb.json"):
+            os.remove("hbnb.json")
+
+    def test_update_amenity_ids(self):
+        place = Place()
+        storage.places_with_amenities(['wifi'])
+        with patch('sys.stdout', new=StringIO()):
+            HBNBCommand().onecmd(HBNBCommand().precmd(
+                f'Place.update({place.id}, {{"amenity_ids": ["wifi"]}})'
+            ))
+        self.assertIn(f"Place.{place.id}",
+                      storage.places_with_amenities(['wifi']))
+        storage.delete(place)
+        self.assertNotIn(f"Place.{place.id}",
+                         storage.places_with_amenities(['wifi']))
+
+
+class TestConsoleSearch(unittest.TestCase):
+    """Testing the search command"""
+
+    def setUp(self):
+        self.console = HBNBCommand()
+        self.place = Place()
+        self.place.name = "Zanzibar beach villa"
+        self.other = Place()
+        self.other.name = "Zanzibar town flat"
+
+    def tearDown(self):
+        storage.delete(self.place)
+        storage.delete(self.other)
+        # don't let the search index be saved by the next tests
+        storage._FileStorage__indexes.clear()
+
+    def run_cmd(self, line):
+        with patch('sys.stdout', new=StringIO()) as mock_stdout:
+            self.console.onecmd(self.console.precmd(line))
+        return mock_stdout.getvalue().strip()
+
+    def test_search_and(self):
+        output = self.run_cmd("search Place zanzibar beach")
+        self.assertEqual(output, str([str(self.place)]))
+        output = self.run_cmd("search Place zanzibar AND villa")
+        self.assertEqual(output, str([str(self.place)]))
+
+    def test_search_or(self):
+        output = self.run_cmd("search Place villa OR flat")
+        self.assertIn(self.place.id, output)
+        self.assertIn(self.other.id, output)
+
+    def test_search_dot_notation(self):
+        output = self.run_cmd('Place.search("beach villa")')
+        self.assertEqual(output, str([str(self.place)]))
+
+    def test_search_invalid_class(self):
+        output = self.run_cmd("search User zanzibar")
+        self.assertEqual(output, f"{error_messages['no_method']}: search **")
+        output = self.run_cmd("search Nope zanzibar")
+        self.assertEqual(output, error_messages["no_cls"])
+
+
+class TestConsoleWhere(unittest.TestCase):
+    """Testing the where and explain commands"""
+
+    def setUp(self):
+        self.console = HBNBCommand()
+        self.place = Place()
+        self.place.city_id = "where-city"
+        self.place.max_guest = 12
+        self.other = Place()
+        self.other.city_id = "where-city"
+
+    def tearDown(self):
+        storage.delete(self.place)
+        storage.delete(self.other)
+
+    def run_cmd(self, line):
+        with patch('sys.stdout', new=StringIO()) as mock_stdout:
+            self.console.onecmd(self.console.precmd(line))
+        return mock_stdout.getvalue().strip()
+
+    def test_where(self):
+        output = self.run_cmd("where Place city_id == where-city, "
+                              "max_guest >= 12")
+        self.assertEqual(output, str([str(self.place)]))
+
+    def test_where_dot_notation(self):
+        output = self.run_cmd('Place.where(city_id in ["where-city", "x"], '
+                              'max_guest < 12)')
+        self.assertEqual(output, str([str(self.other)]))
+
+    def test_where_has(self):
+        self.place.amenity_ids = ["where-wifi", "where-tv"]
+        self.other.amenity_ids = ["where-wifi"]
+        output = self.run_cmd('Place.where(amenity_ids has [where-tv, '
+                              'where-wifi], city_id == where-city)')
+        self.assertEqual(output, str([str(self.place)]))
+        output = self.run_cmd('Place.explain(amenity_ids has where-tv)')
+        self.assertTrue(output.startswith("Place: bitmap index on "
+                                          "amenity_ids (~1 of "))
+
+    def test_explain(self):
+        output = self.run_cmd('Place.explain(max_guest >= 12)')
+        self.assertTrue(output.startswith("Place: range index on max_guest "
+                                          "(~1 of "))
+        output = self.run_cmd("Place.explain(name == 'x')")
+        self.assertTrue(output.startswith("Place: scan "))
+
+    def test_invalid(self):
+        output = self.run_cmd("where Place max_guest >")
+        self.assertEqual(output, error_messages["no_cond"])
+        output = self.run_cmd("explain Nope max_guest > 1")
+        self.assertEqual(output, error_messages["no_cls"])
+
+
+class TestConsoleStats(unittest.TestCase):
+    """Testing the stats command"""
+
+    def setUp(self):
+        self.console = HBNBCommand()
+        self.place = Place()
+        self.place.city_id = "stats-city"
+        self.place.price_by_night = 80
+
+    def tearDown(self):
+        storage.delete(self.place)
+        if os.path.exists("hbnb.json"):
+            os.remove("hbnb.json")
+
+    def run_cmd(self, line):
+        with patch('sys.stdout', new=StringIO()) as mock_stdout:
+            self.console.onecmd(self.console.precmd(line))
+        return mock_stdout.getvalue().strip()
+
+    def test_stats(self):
+        output = self.run_cmd("stats places_per_city")
+        self.assertIn("'stats-city': 1", output)
+        self.assertEqual(self.run_cmd("stats price_per_city stats-city"),
+                         "80.0")
+        self.assertEqual(self.run_cmd("stats places_per_city nope"), "0")
+
+    def test_update(self):
+        self.run_cmd("stats places_per_city")
+        self.run_cmd(f'update Place {self.place.id} city_id "other-city"')
+        self.assertEqual(self.run_cmd("stats places_per_city stats-city"),
+                         "0")
+        self.assertEqual(self.run_cmd("stats places_per_city other-city"),
+                         "1")
+
+    def test_names(self):
+        output = self.run_cmd("stats")
+        self.assertIn("'places_per_city'", output)
+        output = self.run_cmd("stats nope")
+        self.assertEqual(output, error_messages["no_view"])
+
+
+class TestConsoleImport(unittest.TestCase):
+    """Testing the import command"""
+
+    def setUp(self):
+        self.console = HBNBCommand()
+        self.dir = tempfile.TemporaryDirectory()
+        self.path = os.path.join(self.dir.name, "places.jsonl")
+        with open(self.path, "w") as f:
+            f.write('{"id": "import-1", "max_guest": "3"}\n')
+            f.write('{"id": "import-2", "name": "Loft"}\n')
+
+    def tearDown(self):
+        for key in ("Place.import-1", "Place.import-2"):
+            obj = storage.all().get(key)
+            if obj is not None:
+                storage.delete(obj)
+        self.dir.cleanup()
+        if os.path.exists("hbnb.json"):
+            os.remove("hbnb.json")
+
+    def run_cmd(self, line):
+        with patch('sys.stdout', new=StringIO()) as mock_stdout:
+            self.console.onecmd(self.console.precmd(line))
+        return mock_stdout.getvalue().strip()
+
+    def test_import(self):
+        self.assertEqual(self.run_cmd(f"import Place {self.path}"), "2")
+        self.assertEqual(storage.get(Place, "import-1").max_guest, 3)
+        self.assertEqual(storage.get(Place, "import-2").name, "Loft")
+
+    def test_invalid_record(self):
+        with open(self.path, "a") as f:
+            f.write('{"max_guest": "many"}\n')
+        output = self.run_cmd(f"import Place {self.path}")
+        self.assertEqual(output, error_messages["no_record"].format(
+            "Record 3: invalid literal for int() with base 10: 'many'"))
+        self.assertIsNone(storage.get(Place, "import-1"))
+
+    def test_invalid_record_in_transaction(self):
+        with open(self.path, "a") as f:
+            f.write('{"max_guest": "many"}\n')
+        self.run_cmd("begin")
+        try:
+            user_id = self.run_cmd("create User")
+            self.run_cmd(f"import Place {self.path}")
+            self.assertIsNotNone(storage.get(User, user_id))
+            self.assertIsNone(storage.get(Place, "import-1"))
+            self.assertEqual(self.run_cmd("commit"), "")
+        finally:
+            storage.rollback()
+        self.assertIsNotNone(storage.get(User, user_id))
+        storage.delete(storage.get(User, user_id))
+
+    def test_errors(self):
+        self.assertEqual(self.run_cmd("import Nope x.csv"),
+                         error_messages["no_cls"])
+        self.assertEqual(self.run_cmd("import Place"),
+                         error_messages["no_file_name"])
+        self.assertEqual(self.run_cmd("import Place x.txt"),
+                         error_messages["no_format"])
+        missing = os.path.join(self.dir.name, "missing.csv")
+        self.assertEqual(self.run_cmd(f"import Place {missing}"),
+                         error_messages["no_file"])
+
+
+class TestConsoleAllPages(unittest.TestCase):
+    """Testing the projections and pages of the all command"""
+
+    def setUp(self):
+        self.console = HBNBCommand()
+        self.places = sorted((Place() for _ in range(3)),
+                             key=lambda obj: obj.id)
+        for i, place in enumerate(self.places):
+            place.name = f"place {i}"
+
+    def tearDown(self):
+        for place in self.places:
+            storage.delete(place)
+
+    def run_cmd(self, line):
+        with patch('sys.stdout', new=StringIO()) as mock_stdout:
+            self.console.onecmd(self.console.precmd(line))
+        return mock_stdout.getvalue().strip()
+
+    def test_default_format(self):
+        output = self.run_cmd("all Place")
+        self.assertEqual(output, str([str(obj) for obj in
+                                      storage.all(Place).values()]))
+
+    def test_projection(self):
+        output = self.run_cmd("all Place name max_guest nope")
+        place = self.places[0]
+        self.assertIn(repr(f"[Place] ({place.id}) "
+                           "{'name': 'place 0', 'max_guest': 0}"), output)
+
+    def test_pages(self):
+        seen = []
+        line = "all Place name limit 2"
+        while True:
+            output = self.run_cmd(line)
+            ids = [part.split(")")[0] for part in output.split("(")[1:]]
+            if not ids:
+                break
+            seen.extend(ids)
+            line = f"all Place name limit 2 after {ids[-1]}"
+        self.assertEqual(seen, sorted(obj.id for obj in
+                                      storage.all(Place).values()))
+        ids = [place.id for place in self.places]
+        output = self.run_cmd(f"Place.all(name, after {ids[0]}, limit 1)")
+        self.assertNotIn(f"({ids[0]})", output)
+        self.assertEqual(self.run_cmd("all Place limit 1 offset 1"),
+                         self.run_cmd(f"all Place limit 1 after {seen[0]}"))
+
+    def test_errors(self):
+        self.assertEqual(self.run_cmd("all Place limit x"),
+                         error_messages["no_num"])
+        self.assertEqual(self.run_cmd("all Place offset"),
+                         error_messages["no_attr_val"])
+        self.assertEqual(self.run_cmd("all Place limit 0"), "[]")
+
+
+class TestConsoleOrderBy(unittest.TestCase):
+    """Testing the order by clause of the where command"""
+
+    def setUp(self):
+        self.console = HBNBCommand()
+        self.places = [Place() for _ in range(3)]
+        for place, price in zip(self.places, (30, 10, 20)):
+            place.city_id = "order-city"
+            place.price_by_night = price
+
+    def tearDown(self):
+        for place in self.places:
+            storage.delete(place)
+
+    def run_cmd(self, line):
+        with patch('sys.stdout', new=StringIO()) as mock_stdout:
+            self.console.onecmd(self.console.precmd(line))
+        return mock_stdout.getvalue().strip()
+
+    def test_order_by(self):
+        output = self.run_cmd("Place.where(city_id == order-city, "
+                              "order by price_by_night limit 2)")
+        self.assertEqual(output, str([str(self.places[1]),
+                                      str(self.places[2])]))
+        output = self.run_cmd("where Place city_id == order-city "
+                              "order by price_by_night DESC limit 1")
+        self.assertEqual(output, str([str(self.places[0])]))
+
+    def test_invalid(self):
+        self.assertEqual(self.run_cmd("where Place order by nope limit x"),
+                         error_messages["no_cond"])
+
+
+class TestConsoleBatch(unittest.TestCase):
+    """Testing the batch mode running scripts of commands"""
+
+    def setUp(self):
+        self.console = HBNBCommand()
+        self.dir = tempfile.TemporaryDirectory()
+        self.ids = []
+
+    def tearDown(self):
+        storage.rollback()
+        for obj_id in self.ids:
+            for cls in (State, City):
+                obj = storage.get(cls, obj_id)
+                if obj is not None:
+                    storage.delete(obj)
+        self.dir.cleanup()
+        if os.path.exists("hbnb.json"):
+            os.remove("hbnb.json")
+
+    def run_batch(self, lines, checkpoint=0):
+        """Runs lines, and returns the saves made and the report"""
+        save = storage.save
+        writes = []
+
+        def counted_save():
+            # the saves made inside a batch are deferred, not written
+            if not storage.in_batch():
+                writes.append(1)
+            save()
+        with patch('sys.stdout', new=StringIO()) as mock_stdout, \
+                patch('sys.stderr', new=StringIO()) as mock_stderr, \
+                patch.object(storage, 'save', side_effect=counted_save):
+            try:
+                self.console.run_batch(lines, checkpoint)
+            finally:
+                self.ids += mock_stdout.getvalue().splitlines()
+        return len(writes), mock_stderr.getvalue()
+
+    def test_single_save(self):
+        saves, report = self.run_batch(
+            ["# states\n", "create State\n", "\n", "State.create()\n",
+             "count State\n"])
+        self.assertEqual(saves, 1)
+        self.assertFalse(storage.in_batch())
+        for obj_id in self.ids[:2]:
+            self.assertIsNotNone(storage.get(State, obj_id))
+        self.assertIn("3 commands in", report)
+        self.assertIn("1 checkpoint(s)", report)
+        self.assertRegex(report, r"\ncreate +2 ")
+
+    def test_checkpoint(self):
+        saves, report = self.run_batch(["create State"] * 5, checkpoint=2)
+        self.assertEqual(saves, 3)
+        self.assertEqual(len(self.ids), 5)
+
+    def test_transactions(self):
+        saves, report = self.run_batch(
+            ["create State", "begin", "create City", "rollback",
+             "rollback", "begin", "create City", "commit"])
+        self.assertEqual(saves, 2)
+        self.assertEqual(len(self.ids), 4)
+        self.assertEqual(self.ids[2], error_messages["no_batch"])
+        self.assertIsNotNone(storage.get(State, self.ids[0]))
+        self.assertIsNone(storage.get(City, self.ids[1]))
+        self.assertIsNotNone(storage.get(City, self.ids[-1]))
+
+    def test_quit(self):
+        with self.assertRaises(SystemExit):
+            self.run_batch(["create State", "quit", "create State"])
+        self.assertEqual(len(self.ids), 1)
+        self.assertFalse(storage.in_batch())
+        self.assertIsNotNone(storage.get(State, self.ids[0]))
+
+    def test_main(self):
+        path = os.path.join(self.dir.name, "script.hbnb")
+        with open(path, "w") as f:
+            f.write("create State\ncreate State\n")
+        with patch('sys.stdout', new=StringIO()) as mock_stdout, \
+                patch('sys.stderr', new=StringIO()):
+            main(["--batch", path])
+        self.ids = mock_stdout.getvalue().split()
+        self.assertEqual(len(self.ids), 2)
+        self.assertIsNotNone(storage.get(State, self.ids[1]))
+
+
+class TestConsoleDBStorage(unittest.TestCase):
+    """Testing the console on the SQLite storage (HBNB_TYPE_STORAGE=db)"""
+
+    def setUp(self):
+        self.dir = tempfile.TemporaryDirectory()
+        with open(os.path.join(self.dir.name, "states.jsonl"), "w") as f:
+            f.write('{"id": "db-state"}\n')
+        with open(os.path.join(self.dir.name, "cities.jsonl"), "w") as f:
+            f.write('{"id": "db-city", "state_id": "db-state"}\n')
+
+    def tearDown(self):
+        self.dir.cleanup()
+
+    def run_console(self, *lines):
+        """Pipes lines to the console, and returns what it printed"""
+        env = dict(os.environ, HBNB_TYPE_STORAGE="db", HBNB_ENV="dev",
+                   HBNB_SQLITE_PATH=os.path.join(self.dir.name, "hbnb.db"))
+        console = os.path.join(os.path.dirname(os.path.dirname(
+            os.path.abspath(__file__))), "console.py")
+        result = subprocess.run(
+            [sys.executable, console], input="\n".join(lines) + "\n",
+            capture_output=True, text=True, cwd=self.dir.name, env=env)
+        self.assertEqual(result.returncode, 0, result.stderr)
+        return result.stdout
+
+    def test_update(self):
+        output = self.run_console("import State states.jsonl",
+                                  "import City cities.jsonl",
+                                  'update City db-city name "Paris"',
+                                  "City.by_state(db-state)")
+        self.assertIn("'name': 'Paris'", output)
+        output = self.run_console("show City db-city")
+        self.assertIn("'name': 'Paris'", output)
+
+
 if __name__ == "__main__":
     unittest.main()
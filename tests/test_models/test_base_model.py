@@ -94,6 +94,57 @@ class test_basemodel(unittest.TestCase):
         """ """
         new = self.value()
         self.assertEqual(type(new.updated_at), datetime.datetime)
+        # a new instance is updated when it's created
+        self.assertEqual(new.updated_at, new.created_at)
         n = new.to_dict()
         new = BaseModel(**n)
-        self.assertFalse(new.created_at == new.updated_at)
+        self.assertEqual(new.updated_at, new.created_at)
+        new.save()
+        self.assertGreaterEqual(new.updated_at, new.created_at)
+
+    def test_from_record(self):
+        """Instances are rebuilt from their dictionary, not stored"""
+        from models import storage
+        i = self.value()
+        i.extra = "x"
+        record = i.to_dict()
+        new = self.value.from_record(record)
+        self.assertEqual(new.to_dict(), record)
+        self.assertEqual(record['__class__'], self.name)
+        self.assertEqual(new.created_at, i.created_at)
+        self.assertIs(storage.all()[f"{self.name}.{i.id}"], i)
+
+    def test_from_records(self):
+        """Equal timestamps are parsed once"""
+        i = self.value()
+        record = i.to_dict()
+        record['updated_at'] = record['created_at']
+        new, = self.value.from_records([record])
+        self.assertEqual(type(new.created_at), datetime.datetime)
+        self.assertIs(new.updated_at, new.created_at)
+
+    def test_todict_memo(self):
+        """The memoized timestamps are never stale"""
+        i = self.value()
+        first = i.to_dict()
+        first['name'] = 'changed'
+        self.assertNotIn('name', i.to_dict())
+        i.updated_at = datetime.datetime(2020, 1, 2, 3, 4, 5)
+        self.assertEqual(i.to_dict()['updated_at'], '2020-01-02T03:04:05')
+        i.__dict__.update(created_at=datetime.datetime(2019, 1, 1))
+        self.assertEqual(i.to_dict()['created_at'], '2019-01-01T00:00:00')
+        i.__dict__['updated_at'] = i.created_at
+        self.assertEqual(i.to_dict()['updated_at'], '2019-01-01T00:00:00')
+        i.save()
+        self.assertEqual(i.to_dict()['updated_at'],
+                         i.updated_at.isoformat())
+        self.assertNotIn('_isoformats', i.__dict__)
+
+    def test_todict_no_memo(self):
+        """Entries cached by the storage aren't memoized"""
+        i = self.value()
+        self.assertEqual(i.to_dict(memoize=False), i.to_dict())
+        j = self.value()
+        j.to_dict(memoize=False)
+        with self.assertRaises(AttributeError):
+            j._isoformats
@@ -0,0 +1,118 @@
+#!/usr/bin/python3
+""" Module for testing the compact models"""
+import sys
+import unittest
+from unittest.mock import patch
+from tests.test_models import test_place
+from models import storage
+from models.compact import compact, declared_fields
+from models.engine.file_storage import FileStorage
+from models.place import Place
+from models.user import User
+
+
+class test_compactPlace(test_place.test_Place):
+    """Runs the Place tests on the compact Place"""
+
+    def __init__(self, *args, **kwargs):
+        """ """
+        super().__init__(*args, **kwargs)
+        self.value = compact(Place)
+
+
+class test_compact(unittest.TestCase):
+    """Class to test the compact instances"""
+
+    def setUp(self):
+        """Creates a compact place"""
+        self.cls = compact(Place)
+        self.place = self.cls()
+
+    def tearDown(self):
+        """Removes the place from the storage"""
+        storage.delete(self.place)
+
+    def test_class(self):
+        """The compact class looks like the model"""
+        self.assertIs(compact(Place), self.cls)
+        self.assertEqual(self.cls.__name__, 'Place')
+        self.assertEqual(self.cls.max_guest, 0)
+        self.assertIs(self.cls.amenity_ids, Place.amenity_ids)
+        self.assertFalse(hasattr(self.cls, 'id'))
+        self.assertIs(storage.get(Place, self.place.id), self.place)
+        self.assertEqual(declared_fields(User),
+                         {'email': '', 'password': '', 'first_name': '',
+                          'last_name': ''})
+
+    def test_no_dict(self):
+        """Instances keep their attributes in slots"""
+        self.assertFalse(hasattr(self.cls, '__weakref__'))
+        self.assertIsNot(type(self.place.__dict__), dict)
+        self.assertEqual(self.place.__dict__, self.place.__dict__.copy())
+
+    def test_defaults(self):
+        """Unset attributes read as the default, lists aren't shared"""
+        self.assertEqual(self.place.name, "")
+        self.place.amenity_ids.append('x')
+        self.assertEqual(self.place.amenity_ids, [])
+        self.assertNotIn('name', self.place.__dict__)
+        self.place.name = "Loft"
+        self.assertEqual(self.place.__dict__['name'], "Loft")
+
+    def test_dynamic_attributes(self):
+        """Attributes added at runtime are kept and listed"""
+        self.place.pets = "yes"
+        self.assertEqual(self.place.pets, "yes")
+        self.assertEqual(self.place.to_dict()['pets'], "yes")
+        self.assertIn("'pets': 'yes'", str(self.place))
+        del self.place.pets
+        self.assertNotIn('pets', self.place.to_dict())
+        with self.assertRaises(AttributeError):
+            self.place.pets
+
+    def test_shared_values(self):
+        """References are interned and equal dates shared"""
+        copy = self.cls(**{**self.place.to_dict(),
+                           'city_id': ''.join(['ab', 'c']),
+                           'updated_at': self.place.to_dict()['created_at']})
+        other = self.cls.from_record({**copy.to_dict(),
+                                      'city_id': ''.join(['a', 'bc'])})
+        self.assertIs(copy.city_id, sys.intern('abc'))
+        self.assertIs(other.city_id, copy.city_id)
+        self.assertIs(copy.updated_at, copy.created_at)
+
+    def test_dirty_tracking(self):
+        """Changes mark the instance as dirty in the storage"""
+        storage.save()
+        self.place.pets = "no"
+        self.assertIn('Place.' + self.place.id,
+                      storage._FileStorage__pending)
+
+    def test_rollback(self):
+        """A rollback restores the attributes"""
+        self.place.name = "Loft"
+        storage.save()
+        with self.assertRaises(RuntimeError):
+            with storage.batch():
+                self.place.name = "Flat"
+                self.place.pets = "yes"
+                raise RuntimeError
+        self.assertEqual(self.place.to_dict()['name'], "Loft")
+        self.assertNotIn('pets', self.place.__dict__)
+
+    def test_reload(self):
+        """The storage reloads compact instances"""
+        self.place.name = "Loft"
+        self.place.pets = "yes"
+        storage.save()
+        classes = {name: compact(cls) for name, cls in
+                   storage._FileStorage__model_classes().items()}
+        with patch.object(FileStorage, '_FileStorage__classes', classes):
+            storage.all().clear()
+            storage.reload()
+            loaded = storage.get(Place, self.place.id)
+        self.assertIs(type(loaded), self.cls)
+        self.assertIsNot(loaded, self.place)
+        self.assertEqual(loaded.to_dict(), self.place.to_dict())
+        storage.delete(loaded)
+        storage.save()
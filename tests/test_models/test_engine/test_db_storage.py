@@ -0,0 +1,404 @@
+#!/usr/bin/python3
+""" Module for testing the SQLite storage"""
+import unittest
+from unittest.mock import patch
+from models.engine.db_storage import DBStorage
+from models.base_model import BaseModel
+from models.place import Place
+from models.city import City
+from models.user import User
+from models.state import State
+from models.review import Review
+import os
+import sqlite3
+
+DB_PATH = 'test_hbnb.db'
+
+
+class test_dbStorage(unittest.TestCase):
+    """Class to test the SQLite storage method"""
+
+    def setUp(self):
+        """Opens an empty database used as the models' storage"""
+        self.storage = self.open()
+        self._patch = patch('models.base_model.storage', self.storage)
+        self._patch.start()
+
+    def tearDown(self):
+        """Closes and removes the database"""
+        self._patch.stop()
+        self.storage.close()
+        try:
+            os.remove(DB_PATH)
+        except FileNotFoundError:
+            pass
+
+    def open(self):
+        """Returns a new storage on the test database"""
+        db = DBStorage(DB_PATH)
+        db.reload()
+        return db
+
+    def test_new_all_count(self):
+        """New objects are listed and counted before being saved"""
+        user = User()
+        place = Place()
+        self.assertIs(self.storage.all(User)['User.' + user.id], user)
+        self.assertEqual(self.storage.count(), 2)
+        self.assertEqual(self.storage.count('Place'), 1)
+        self.assertEqual(list(self.storage.all('Place')),
+                         ['Place.' + place.id])
+
+    def test_save_reload(self):
+        """Saved objects are read back with the same attributes"""
+        place = Place()
+        place.name = "Loft"
+        place.number_rooms = 3
+        place.latitude = 1.5
+        place.amenity_ids = ['a', 'b']
+        place.pets = "yes"
+        place.save()
+        db = self.open()
+        loaded = db.get(Place, place.id)
+        db.close()
+        self.assertIsNot(loaded, place)
+        self.assertEqual(loaded.to_dict(), place.to_dict())
+
+    def test_unsaved_changes_lost(self):
+        """Changes are only committed by save()"""
+        user = User()
+        self.storage.save()
+        user.first_name = "Betty"
+        self.assertEqual(self.storage.count(), 1)
+        db = self.open()
+        self.assertNotIn('first_name', db.get(User, user.id).__dict__)
+        db.close()
+
+    def test_get(self):
+        """get() reads a single row and keeps the same instance"""
+        city = City()
+        city.name = "Paris"
+        self.storage.save()
+        db = self.open()
+        self.assertIs(db.get('City', city.id), db.get(City, city.id))
+        self.assertEqual(db.get(City, city.id).name, "Paris")
+        self.assertIsNone(db.get(City, 'missing'))
+        self.assertIsNone(db.get('Nope', city.id))
+        db.close()
+
+    def test_unknown_class(self):
+        """Classes without a table have no instances"""
+        City()
+        self.assertEqual(self.storage.all('Nope'), {})
+        self.assertEqual(self.storage.all(str), {})
+        self.assertEqual(self.storage.count('Nope'), 0)
+        self.assertEqual(self.storage.count(), 1)
+
+    def test_reload_pending(self):
+        """Changes made before a reload are saved by the next save()"""
+        city = City()
+        city.name = "Paris"
+        self.storage.reload()
+        self.assertEqual(self.storage.get(City, city.id).name, "Paris")
+        self.storage.save()
+        db = self.open()
+        self.assertEqual(db.get(City, city.id).name, "Paris")
+        db.close()
+
+    def test_delete(self):
+        """Deleted objects are removed from the database on save"""
+        user = User()
+        self.storage.save()
+        self.assertIs(self.storage.delete(user), user)
+        self.assertIsNone(self.storage.get(User, user.id))
+        self.assertIsNone(self.storage.delete(user))
+        self.storage.save()
+        db = self.open()
+        self.assertEqual(db.count(), 0)
+        db.close()
+
+    def test_foreign_key_index(self):
+        """Foreign key columns are indexed"""
+        con = sqlite3.connect(DB_PATH)
+        indexes = {row[1] for row in con.execute(
+            "SELECT * FROM sqlite_master WHERE type = 'index'"
+        )}
+        con.close()
+        self.assertIn('Place_city_id', indexes)
+        self.assertIn('Review_place_id', indexes)
+        self.assertIn('City_state_id', indexes)
+
+    def test_batch_rollback(self):
+        """Rolling back restores the database and the objects"""
+        user = User()
+        user.email = "a@b.c"
+        self.storage.save()
+        with self.assertRaises(RuntimeError):
+            with self.storage.batch():
+                user.email = "x@y.z"
+                BaseModel()
+                self.storage.save()
+                raise RuntimeError
+        self.assertEqual(user.email, "a@b.c")
+        self.assertEqual(self.storage.count(), 1)
+        db = self.open()
+        self.assertEqual(db.get(User, user.id).email, "a@b.c")
+        db.close()
+
+    def test_batch_commit(self):
+        """Committing the batch commits its changes"""
+        self.storage.begin()
+        user = User()
+        self.assertTrue(self.storage.in_batch())
+        self.storage.commit()
+        self.assertFalse(self.storage.in_batch())
+        db = self.open()
+        self.assertIsNotNone(db.get(User, user.id))
+        db.close()
+
+    def test_related(self):
+        """The instances referencing an object are listed"""
+        state = State()
+        city = City()
+        city.state_id = state.id
+        City()
+        self.assertEqual(list(self.storage.related(state, City)),
+                         ['City.' + city.id])
+        with self.assertRaises(ValueError):
+            self.storage.related(state, Place)
+
+    def test_places_near(self):
+        """The places within the radius are returned nearest first"""
+        sf = Place()
+        sf.latitude, sf.longitude = 37.7749, -122.4194
+        oak = Place()
+        oak.latitude, oak.longitude = 37.8044, -122.2712
+        fiji = Place()
+        fiji.latitude, fiji.longitude = -17.0, 179.99
+        Place()
+        self.assertEqual(
+            list(self.storage.places_near(37.7749, -122.4194, 20).values()),
+            [sf, oak]
+        )
+        self.assertEqual(
+            list(self.storage.places_near(37.8044, -122.2712, 20, 1)),
+            ['Place.' + oak.id]
+        )
+        self.assertEqual(list(self.storage.places_near(-17, -179.99, 10)),
+                         ['Place.' + fiji.id])
+
+    def test_places_near_north(self):
+        """Far north, the box is as wide as the circle"""
+        # about 994 km away, beyond 1000 / DEGREE / cos(70) degrees east
+        north = Place()
+        north.latitude, north.longitude = 72.5, 27.0
+        self.assertEqual(list(self.storage.places_near(70, 0, 1000)),
+                         ['Place.' + north.id])
+
+    def test_ids_in_range(self):
+        """The ids are returned ordered by the field"""
+        places = [Place(), Place(), Place()]
+        for place, guests in zip(places, (4, 2, 8)):
+            place.max_guest = guests
+        unset = Place()
+        self.assertEqual(self.storage.ids_in_range(Place, 'max_guest', 2, 4),
+                         [places[1].id, places[0].id])
+        self.assertEqual(self.storage.ids_in_range(Place, 'max_guest')[0],
+                         unset.id)
+        self.assertEqual(self.storage.ids_in_range(Place, 'max_guest', 5),
+                         [places[2].id])
+        with self.assertRaises(ValueError):
+            self.storage.ids_in_range(Place, 'name')
+
+    def test_places_with_amenities(self):
+        """The places offering every amenity are returned"""
+        places = [Place(), Place(), Place()]
+        places[0].amenity_ids = ['wifi', 'tv']
+        places[1].amenity_ids = ['wifi']
+        places[2].amenity_ids = 'wifi'
+        self.assertEqual(
+            list(self.storage.places_with_amenities(['wifi']).values()),
+            places[:2]
+        )
+        self.assertEqual(
+            list(self.storage.places_with_amenities(['tv', 'wifi'])),
+            ['Place.' + places[0].id]
+        )
+        self.assertEqual(len(self.storage.places_with_amenities([])), 3)
+
+    def test_search(self):
+        """Instances are ranked by the frequency of the words"""
+        beach = Place()
+        beach.name = "Beach house"
+        beach.description = "Sea view, sea breeze"
+        loft = Place()
+        loft.description = "City view"
+        review = Review()
+        review.text = "Seaside"
+        self.assertEqual(list(self.storage.search(Place, 'sea view')),
+                         ['Place.' + beach.id])
+        self.assertEqual(list(self.storage.search(Place, 'city sea', 'or')),
+                         ['Place.' + beach.id, 'Place.' + loft.id])
+        self.assertEqual(self.storage.search(Review, 'sea'), {})
+        with self.assertRaises(ValueError):
+            self.storage.search(User, 'sea')
+
+    def test_where(self):
+        """The rows meeting every condition are returned"""
+        places = [Place() for _ in range(3)]
+        for place, city, guests in zip(places, 'aab', (2, 4, 6)):
+            place.city_id = city
+            place.max_guest = guests
+        unset = Place()
+        self.assertEqual(
+            list(self.storage.where(Place, [('city_id', '==', 'a'),
+                                            ('max_guest', '>', 2)])),
+            ['Place.' + places[1].id]
+        )
+        self.assertEqual(
+            len(self.storage.where(Place, [('max_guest', '<', 3)])), 2
+        )
+        self.assertIn('Place.' + unset.id,
+                      self.storage.where(Place, [('max_guest', '==', 0)]))
+        self.assertEqual(
+            len(self.storage.where(Place, [('city_id', 'in', ['a', 'b']),
+                                           ('pets', '==', None)])), 3
+        )
+
+    def test_where_has(self):
+        """List columns are filtered on the values of their Json array"""
+        places = [Place() for _ in range(3)]
+        for place, ids in zip(places, (['w', 't'], ['w'], 'w')):
+            place.amenity_ids = ids
+        self.assertEqual(
+            list(self.storage.where(Place, [('amenity_ids', 'has', ['w'])])),
+            ['Place.' + places[0].id, 'Place.' + places[1].id]
+        )
+        self.assertEqual(
+            list(self.storage.where(Place, [('amenity_ids', 'has',
+                                             ['t', 'w', 't'])])),
+            ['Place.' + places[0].id]
+        )
+        self.assertEqual(
+            self.storage.where(Place, [('amenity_ids', 'has', ['x'])]), {}
+        )
+
+    def test_explain(self):
+        """The plan names the index SQLite reads"""
+        Place().city_id = 'a'
+        plan = self.storage.explain(Place, [('city_id', '==', 'a')])
+        self.assertEqual(plan.access, 'index Place_city_id')
+        self.assertEqual((plan.estimate, plan.total), (1, 1))
+        plan = self.storage.explain(Place, [('name', '!=', 'a')])
+        self.assertEqual(plan.access, 'scan')
+
+    def test_aggregate(self):
+        """The views are grouped by SQLite, unset values as defaults"""
+        state, city = State(), City()
+        city.state_id = state.id
+        places = [Place(), Place(), Place()]
+        for place, price in zip(places, (10, 'free', None)):
+            place.city_id = city.id
+            if price is not None:
+                place.price_by_night = price
+        self.assertEqual(self.storage.aggregate('places_per_city'),
+                         {city.id: 3})
+        self.assertEqual(self.storage.aggregate('price_per_city'),
+                         {city.id: 5})
+        self.assertEqual(self.storage.aggregate('price_per_state'),
+                         {state.id: 5})
+        self.assertEqual(self.storage.aggregate('cities_per_state'),
+                         {state.id: 1})
+        with self.assertRaises(ValueError):
+            self.storage.aggregate('nope')
+
+    def test_place_columns(self):
+        """The columns are read from the table, unset values as defaults"""
+        places = [Place(), Place()]
+        places[0].city_id = 'a'
+        places[0].price_by_night = 10
+        columns = self.storage.place_columns()
+        self.assertEqual(columns.aggregate('price_by_night', 'sum',
+                                           by_group=True),
+                         {'a': 10, '': 0})
+        self.assertEqual(columns.aggregate('latitude', 'count'), 2)
+
+    def test_bulk_load(self):
+        """The records are inserted as rows, replacing the same ids"""
+        place = Place()
+        place.name = "old"
+        self.storage.save()
+        records = [{'id': place.id, 'name': 'new', 'max_guest': '4'}] + \
+            [{'amenity_ids': '["a"]'}, {'pets': 'yes'}]
+        self.assertEqual(self.storage.bulk_load('Place', records,
+                                                batch_size=2), 3)
+        self.storage.close()
+        self.storage = self.open()
+        places = self.storage.all(Place)
+        self.assertEqual(len(places), 3)
+        new = places['Place.' + place.id]
+        self.assertEqual((new.name, new.max_guest), ('new', 4))
+        self.assertEqual(sorted(str(p.__dict__.get('amenity_ids'))
+                                for p in places.values()),
+                         ['None', 'None', "['a']"])
+        with self.assertRaises(ValueError):
+            self.storage.bulk_load(Place, [{}, {'latitude': 'x'}])
+        self.assertEqual(self.storage.count(), 3)
+
+    def test_bulk_load_in_batch(self):
+        """An invalid record only discards the import from the open batch"""
+        place = Place()
+        self.storage.save()
+        self.storage.begin()
+        place.name = "kept"
+        user = User()
+        with self.assertRaises(ValueError):
+            self.storage.bulk_load(Place, [{'id': place.id, 'name': 'new'},
+                                           {'max_guest': 'x'}], batch_size=1)
+        self.assertTrue(self.storage.in_batch())
+        self.assertIs(self.storage.all(Place)['Place.' + place.id], place)
+        self.assertEqual(place.name, "kept")
+        self.storage.commit()
+        self.storage.close()
+        self.storage = self.open()
+        self.assertEqual(self.storage.count(), 2)
+        self.assertEqual(self.storage.all(Place)['Place.' + place.id].name,
+                         "kept")
+        self.assertIn('User.' + user.id, self.storage.all(User))
+
+    def test_page(self):
+        """Pages are ordered by class name then id"""
+        places = sorted((Place() for _ in range(4)), key=lambda p: p.id)
+        city = City()
+        self.assertEqual(list(self.storage.page(Place, limit=2, offset=1)),
+                         places[1:3])
+        self.assertEqual(list(self.storage.page(
+            'Place', after='Place.' + places[1].id)), places[2:])
+        self.assertEqual(list(self.storage.page(limit=2, offset=0)),
+                         [city, places[0]])
+        self.assertEqual(list(self.storage.page(offset=4)), places[3:])
+
+    def test_top_k(self):
+        """SQLite orders the columns, the checks of every condition hold"""
+        places = [Place() for _ in range(5)]
+        for place, price in zip(places, (50, 10, 'free', None, 30)):
+            if price is not None:
+                place.price_by_night = price
+            place.pets = str(price)
+        self.assertEqual(list(self.storage.top_k(Place, 'price_by_night',
+                                                 2).values()),
+                         [places[3], places[1]])
+        self.assertEqual(list(self.storage.top_k(
+            'Place', 'price_by_night', 9, True,
+            [('pets', '!=', '50')]).values()),
+            [places[4], places[1], places[3]])
+        # the first row read is left out by a condition SQLite doesn't check
+        self.assertEqual(list(self.storage.top_k(
+            Place, 'price_by_night', 1, True,
+            [('pets', '!=', '50')]).values()), [places[4]])
+        self.assertEqual(list(self.storage.top_k(Place, 'pets', 1,
+                                                 True).values()),
+                         [places[2]])
+        self.assertEqual(list(self.storage.top_k(Place, 'created_at',
+                                                 1).values()),
+                         [places[0]])
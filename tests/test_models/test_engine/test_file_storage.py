@@ -1,8 +1,19 @@
 #!/usr/bin/python3
 """ Module for testing file storage"""
 import unittest
+from unittest.mock import patch
 from models.base_model import BaseModel
+from models.user import User
+from models.state import State
+from models.city import City
+from models.place import Place
+from models.review import Review
 from models import storage
+from models.engine.file_storage import FileStorage
+from models.engine.indexes import (
+    AggregateIndex, RangeIndex, TextIndex, TimeIndex
+)
+import json
 import os
 
 
@@ -108,3 +119,1205 @@ class test_fileStorage(unittest.TestCase):
 
         print(type(storage))
         self.assertEqual(type(storage), FileStorage)
+
+
+class test_journal(unittest.TestCase):
+    """Class to test the journal mode of the file storage"""
+
+    def setUp(self):
+        """Switch storage to journal mode on an empty store"""
+        storage._FileStorage__objects.clear()
+        storage._FileStorage__pending.clear()
+        self.mode = patch.object(
+            FileStorage, '_FileStorage__mode', 'journal'
+        )
+        self.mode.start()
+
+    def tearDown(self):
+        """Restore the mode and remove the storage files"""
+        self.mode.stop()
+        for path in ('hbnb.json', 'hbnb.json.journal'):
+            try:
+                os.remove(path)
+            except Exception:
+                pass
+
+    def test_save_appends_changes_only(self):
+        """Each save appends one record per changed object"""
+        first = BaseModel()
+        BaseModel()
+        storage.save()
+        with open('hbnb.json.journal') as f:
+            self.assertEqual(len(f.readlines()), 2)
+        first.save()
+        with open('hbnb.json.journal') as f:
+            lines = f.readlines()
+        self.assertEqual(len(lines), 3)
+        self.assertIn(first.id, lines[-1])
+        self.assertFalse(os.path.exists('hbnb.json'))
+
+    def test_reload_replays_journal(self):
+        """Snapshot plus journal are replayed on reload"""
+        kept = BaseModel()
+        gone = BaseModel()
+        storage.compact()
+        kept.name = "kept"
+        kept.save()
+        storage.delete(gone)
+        storage.save()
+        storage._FileStorage__objects.clear()
+        storage.reload()
+        self.assertEqual(list(storage.all()), ['BaseModel.' + kept.id])
+        self.assertEqual(storage.all()['BaseModel.' + kept.id].name, "kept")
+
+    def test_reload_ignores_torn_record(self):
+        """An interrupted append at the end of the journal is skipped"""
+        obj = BaseModel()
+        storage.save()
+        with open('hbnb.json.journal', 'a') as f:
+            f.write('{"put": {"BaseModel.x": {"id": "x"')
+        storage._FileStorage__objects.clear()
+        storage.reload()
+        self.assertEqual(list(storage.all()), ['BaseModel.' + obj.id])
+
+    def test_save_after_torn_record(self):
+        """The torn record is cut off, so later appends are read back"""
+        for lazy in (False, True):
+            storage._FileStorage__objects.clear()
+            if os.path.exists('hbnb.json.journal'):
+                os.remove('hbnb.json.journal')
+            with patch.object(FileStorage, '_FileStorage__lazy', lazy):
+                first = BaseModel()
+                storage.save()
+                with open('hbnb.json.journal', 'a') as f:
+                    f.write('{"put": {"BaseModel.x": {"id": "x"')
+                storage._FileStorage__objects.clear()
+                storage.reload()
+                second = BaseModel()
+                storage.save()
+                storage._FileStorage__objects.clear()
+                storage.reload()
+                self.assertEqual(sorted(storage.all()), sorted([
+                    'BaseModel.' + first.id, 'BaseModel.' + second.id
+                ]))
+
+    def test_compact(self):
+        """Compaction folds the journal into a fresh snapshot"""
+        obj = BaseModel()
+        storage.save()
+        storage.compact()
+        self.assertFalse(os.path.exists('hbnb.json.journal'))
+        with open('hbnb.json') as f:
+            self.assertIn('BaseModel.' + obj.id, json.load(f))
+
+    def test_size_triggered_compaction(self):
+        """The journal is compacted once it grows past the limit"""
+        with patch.object(FileStorage, '_FileStorage__journal_limit', 1):
+            BaseModel()
+            storage.save()
+        self.assertFalse(os.path.exists('hbnb.json.journal'))
+        self.assertTrue(os.path.exists('hbnb.json'))
+
+
+class test_dirty_tracking(unittest.TestCase):
+    """Class to test the incremental serialization of the file storage"""
+
+    def setUp(self):
+        """Start from an empty and clean store"""
+        storage._FileStorage__objects.clear()
+        storage._FileStorage__pending.clear()
+
+    def tearDown(self):
+        """Remove storage file at end of tests"""
+        try:
+            os.remove('hbnb.json')
+        except Exception:
+            pass
+
+    def test_changed_outside_storage(self):
+        """Keys popped or cleared from all() are gone after a save"""
+        kept = BaseModel()
+        gone = BaseModel()
+        storage.save()
+        storage.all().pop('BaseModel.' + gone.id)
+        storage.save()
+        with open('hbnb.json') as f:
+            self.assertEqual(list(json.load(f)), ['BaseModel.' + kept.id])
+        storage.all().clear()
+        storage.save()
+        with open('hbnb.json') as f:
+            self.assertEqual(json.load(f), {})
+
+    def test_new_marks_dirty(self):
+        """New objects are pending until the next save"""
+        new = BaseModel()
+        self.assertIn('BaseModel.' + new.id, storage._FileStorage__pending)
+        storage.save()
+        self.assertEqual(storage._FileStorage__pending, {})
+
+    def test_setattr_marks_dirty(self):
+        """Assigning an attribute marks a stored object as dirty"""
+        new = BaseModel()
+        storage.save()
+        new.name = "x"
+        self.assertIn('BaseModel.' + new.id, storage._FileStorage__pending)
+
+    def test_unstored_object_not_marked(self):
+        """Objects that aren't in storage are never marked as dirty"""
+        copy = BaseModel(**BaseModel().to_dict())
+        storage.save()
+        copy.name = "x"
+        self.assertEqual(storage._FileStorage__pending, {})
+
+    def test_save_reencodes_dirty_only(self):
+        """A save only calls to_dict() on the objects that changed"""
+        objs = [BaseModel() for _ in range(10)]
+        storage.save()
+        objs[3].name = "x"
+        with patch.object(
+            BaseModel, 'to_dict', autospec=True,
+            side_effect=BaseModel.to_dict
+        ) as to_dict:
+            storage.save()
+        self.assertEqual(to_dict.call_count, 1)
+        with open('hbnb.json') as f:
+            saved = json.load(f)
+        self.assertEqual(saved['BaseModel.' + objs[3].id]['name'], "x")
+        self.assertEqual(len(saved), 10)
+
+    def test_dict_update_then_save(self):
+        """Changes made through __dict__ are written by obj.save()"""
+        new = BaseModel()
+        storage.save()
+        new.__dict__.update({"name": "x"})
+        new.save()
+        with open('hbnb.json') as f:
+            self.assertEqual(json.load(f)['BaseModel.' + new.id]['name'], "x")
+
+
+class test_batch(unittest.TestCase):
+    """Class to test the batched writes of the file storage"""
+
+    def setUp(self):
+        """Start from an empty and clean store"""
+        storage._FileStorage__objects.clear()
+        storage._FileStorage__pending.clear()
+
+    def tearDown(self):
+        """Close any open batch and remove storage file"""
+        storage.rollback()
+        try:
+            os.remove('hbnb.json')
+        except Exception:
+            pass
+
+    def test_saves_deferred_until_commit(self):
+        """Nothing is written before the batch is committed"""
+        with storage.batch():
+            for _ in range(3):
+                BaseModel().save()
+            self.assertFalse(os.path.exists('hbnb.json'))
+        with open('hbnb.json') as f:
+            self.assertEqual(len(json.load(f)), 3)
+
+    def test_single_write_on_commit(self):
+        """The storage file is written once per batch"""
+        with patch.object(
+            FileStorage, '_FileStorage__write_snapshot'
+        ) as write_snapshot:
+            with storage.batch():
+                for _ in range(3):
+                    BaseModel().save()
+        write_snapshot.assert_called_once()
+
+    def test_nested_batches(self):
+        """Inner batches join the outermost one"""
+        with storage.batch():
+            with storage.batch():
+                BaseModel().save()
+            self.assertTrue(storage.in_batch())
+            self.assertFalse(os.path.exists('hbnb.json'))
+        self.assertFalse(storage.in_batch())
+        self.assertTrue(os.path.exists('hbnb.json'))
+
+    def test_rollback_on_exception(self):
+        """Objects added, changed or removed in the batch are restored"""
+        kept = BaseModel()
+        kept.name = "before"
+        gone = BaseModel()
+        storage.save()
+        with self.assertRaises(RuntimeError):
+            with storage.batch():
+                added = BaseModel()
+                kept.name = "after"
+                kept.save()
+                storage.delete(gone)
+                raise RuntimeError
+        self.assertFalse(storage.in_batch())
+        self.assertNotIn('BaseModel.' + added.id, storage.all())
+        self.assertIn('BaseModel.' + gone.id, storage.all())
+        self.assertEqual(kept.name, "before")
+        self.assertEqual(storage._FileStorage__pending, {})
+
+
+class test_class_index(unittest.TestCase):
+    """Class to test the per-class partitions of the file storage"""
+
+    def setUp(self):
+        """Start from an empty store"""
+        storage._FileStorage__objects.clear()
+
+    def tearDown(self):
+        """Remove storage file at end of tests"""
+        try:
+            os.remove('hbnb.json')
+        except Exception:
+            pass
+
+    def test_all_cls(self):
+        """all(cls) only returns the instances of cls"""
+        user = User()
+        BaseModel()
+        self.assertEqual(storage.all(User), {'User.' + user.id: user})
+        self.assertEqual(storage.all('User'), {'User.' + user.id: user})
+        self.assertEqual(storage.all(State), {})
+
+    def test_count(self):
+        """count() counts every instance or the instances of cls"""
+        User()
+        User()
+        BaseModel()
+        self.assertEqual(storage.count(), 3)
+        self.assertEqual(storage.count(User), 2)
+        self.assertEqual(storage.count('BaseModel'), 1)
+        self.assertEqual(storage.count(State), 0)
+
+    def test_delete(self):
+        """Deleted instances leave their class partition"""
+        user = User()
+        storage.delete(user)
+        self.assertEqual(storage.count(User), 0)
+        self.assertEqual(storage.all(User), {})
+
+    def test_reload(self):
+        """Reloaded instances are added to their class partition"""
+        user = User()
+        storage.save()
+        storage.all().clear()
+        storage.reload()
+        self.assertEqual(list(storage.all(User)), ['User.' + user.id])
+
+    def test_direct_change(self):
+        """The partitions follow changes made directly on __objects"""
+        user = User()
+        del storage.all()['User.' + user.id]
+        self.assertEqual(storage.count(User), 0)
+
+
+class test_lazy_reload(unittest.TestCase):
+    """Class to test the lazy reload of the file storage"""
+
+    def setUp(self):
+        """Save a few objects then lazily reload them"""
+        storage._FileStorage__objects.clear()
+        self.user = User()
+        self.state = State()
+        storage.save()
+        storage._FileStorage__objects.clear()
+        self.lazy = patch.object(FileStorage, '_FileStorage__lazy', True)
+        self.lazy.start()
+        storage.reload()
+
+    def tearDown(self):
+        """Load everything back and remove storage file"""
+        storage.all()
+        self.lazy.stop()
+        try:
+            os.remove('hbnb.json')
+        except Exception:
+            pass
+
+    def raw(self):
+        """Returns the stored values that aren't instances yet"""
+        objects = storage._FileStorage__objects
+        return [k for k, v in objects.items() if type(v) is dict]
+
+    def test_file_read_on_first_use(self):
+        """reload() doesn't read the file until the storage is used"""
+        self.assertEqual(storage._FileStorage__objects, {})
+        self.assertEqual(storage.count(), 2)
+        self.assertEqual(len(self.raw()), 2)
+
+    def test_count_keeps_entries_raw(self):
+        """Counting doesn't build any instance"""
+        self.assertEqual(storage.count(User), 1)
+        self.assertEqual(len(self.raw()), 2)
+
+    def test_get(self):
+        """get() only builds the requested instance"""
+        user = storage.get(User, self.user.id)
+        self.assertIsInstance(user, User)
+        self.assertEqual(user.id, self.user.id)
+        self.assertEqual(self.raw(), ['State.' + self.state.id])
+        self.assertIs(storage.get('User', self.user.id), user)
+        self.assertIsNone(storage.get(User, '123'))
+
+    def test_all_cls(self):
+        """all(cls) only builds the instances of cls"""
+        users = storage.all(User)
+        self.assertIsInstance(users['User.' + self.user.id], User)
+        self.assertEqual(self.raw(), ['State.' + self.state.id])
+
+    def test_all(self):
+        """all() builds every instance"""
+        objs = storage.all()
+        self.assertEqual(self.raw(), [])
+        self.assertIsInstance(objs['State.' + self.state.id], State)
+
+    def test_save_raw_entries(self):
+        """Unloaded entries are written back as they were read"""
+        with open('hbnb.json') as f:
+            before = json.load(f)
+        storage.get(User, self.user.id).save()
+        with open('hbnb.json') as f:
+            after = json.load(f)
+        key = 'State.' + self.state.id
+        self.assertEqual(after[key], before[key])
+        self.assertEqual(len(self.raw()), 1)
+
+
+class test_streaming_reload(unittest.TestCase):
+    """Class to test the chunked reading of the storage file"""
+
+    def setUp(self):
+        """Read the file in tiny chunks"""
+        storage._FileStorage__objects.clear()
+        self.chunk = patch.object(FileStorage, '_FileStorage__read_chunk', 7)
+        self.chunk.start()
+
+    def tearDown(self):
+        """Restore the chunk size and remove storage file"""
+        self.chunk.stop()
+        try:
+            os.remove('hbnb.json')
+        except Exception:
+            pass
+
+    def test_entries_across_chunks(self):
+        """Entries split over several chunks are reloaded"""
+        objs = [User() for _ in range(5)]
+        objs[0].first_name = "a, b: {c}"
+        storage.save()
+        storage.all().clear()
+        storage.reload()
+        self.assertEqual(
+            sorted(storage.all()), sorted('User.' + o.id for o in objs)
+        )
+        user = storage.get(User, objs[0].id)
+        self.assertEqual(user.first_name, "a, b: {c}")
+
+    def test_indented_file(self):
+        """Whitespace between the tokens is skipped"""
+        obj = User()
+        with open('hbnb.json', 'w') as f:
+            json.dump({'User.' + obj.id: obj.to_dict()}, f, indent=4)
+        storage.all().clear()
+        storage.reload()
+        self.assertEqual(list(storage.all()), ['User.' + obj.id])
+
+    def test_empty_object(self):
+        """An empty Json object loads nothing"""
+        with open('hbnb.json', 'w') as f:
+            f.write(' {} ')
+        storage.reload()
+        self.assertEqual(storage.all(), {})
+
+    def test_truncated_file(self):
+        """A truncated file raises a ValueError"""
+        User()
+        storage.save()
+        with open('hbnb.json') as f:
+            text = f.read()
+        with open('hbnb.json', 'w') as f:
+            f.write(text[:-20])
+        storage.all().clear()
+        with self.assertRaises(ValueError):
+            storage.reload()
+
+
+class test_sharded_layout(unittest.TestCase):
+    """Class to test the per-class files of the file storage"""
+
+    def setUp(self):
+        """Switch storage to the sharded layout on an empty store"""
+        storage._FileStorage__objects.clear()
+        storage._FileStorage__pending.clear()
+        self.layout = patch.object(
+            FileStorage, '_FileStorage__layout', 'sharded'
+        )
+        self.layout.start()
+
+    def tearDown(self):
+        """Restore the layout and remove the storage files"""
+        storage._FileStorage__unloaded.clear()
+        self.layout.stop()
+        for path in os.listdir('.'):
+            if path.startswith('hbnb.'):
+                os.remove(path)
+
+    def test_one_file_per_class(self):
+        """Each class is saved in its own file"""
+        user = User()
+        state = State()
+        storage.save()
+        with open('hbnb.User.json') as f:
+            self.assertEqual(list(json.load(f)), ['User.' + user.id])
+        with open('hbnb.State.json') as f:
+            self.assertEqual(list(json.load(f)), ['State.' + state.id])
+        self.assertFalse(os.path.exists('hbnb.json'))
+
+    def test_save_changed_shards_only(self):
+        """A save only rewrites the files of the classes that changed"""
+        user = User()
+        state = State()
+        storage.save()
+        os.remove('hbnb.User.json')
+        state.name = "CA"
+        state.save()
+        self.assertFalse(os.path.exists('hbnb.User.json'))
+        user.save()
+        self.assertTrue(os.path.exists('hbnb.User.json'))
+
+    def test_empty_shard_removed(self):
+        """The file of a class without instances is removed"""
+        user = User()
+        storage.save()
+        storage.delete(user)
+        storage.save()
+        self.assertFalse(os.path.exists('hbnb.User.json'))
+
+    def test_cleared_outside_storage(self):
+        """The files of every class are rewritten after all().clear()"""
+        User()
+        State()
+        storage.save()
+        storage.all().clear()
+        storage.save()
+        self.assertFalse(os.path.exists('hbnb.User.json'))
+        self.assertFalse(os.path.exists('hbnb.State.json'))
+
+    def test_reload_some_classes(self):
+        """reload() can read the files of some classes only"""
+        user = User()
+        State()
+        storage.save()
+        storage.all().clear()
+        storage.reload([User])
+        self.assertEqual(list(storage.all()), ['User.' + user.id])
+
+    def test_lazy_loads_used_shards(self):
+        """In lazy mode only the files of the classes used are read"""
+        user = User()
+        State()
+        storage.save()
+        storage.all().clear()
+        with patch.object(FileStorage, '_FileStorage__lazy', True):
+            storage.reload()
+            self.assertEqual(storage.count(User), 1)
+            self.assertEqual(
+                list(storage._FileStorage__objects), ['User.' + user.id]
+            )
+            self.assertEqual(storage.count(), 2)
+
+    def test_journal_per_shard(self):
+        """In journal mode each class appends to its own journal"""
+        with patch.object(FileStorage, '_FileStorage__mode', 'journal'):
+            User()
+            State()
+            storage.save()
+            self.assertTrue(os.path.exists('hbnb.User.json.journal'))
+            self.assertTrue(os.path.exists('hbnb.State.json.journal'))
+            storage.all().clear()
+            storage.reload()
+        self.assertEqual(storage.count(User), 1)
+        self.assertEqual(storage.count(State), 1)
+
+
+class test_related(unittest.TestCase):
+    """Class to test the reverse foreign key lookups"""
+
+    def setUp(self):
+        """Store a state with two cities"""
+        storage._FileStorage__objects.clear()
+        self.state = State()
+        self.cities = [City(), City()]
+        for city in self.cities:
+            city.state_id = self.state.id
+
+    def tearDown(self):
+        """Remove storage file at end of tests"""
+        try:
+            os.remove('hbnb.json')
+        except Exception:
+            pass
+
+    def ids(self, objs):
+        """Returns the sorted ids of objs"""
+        return sorted(obj.id for obj in objs.values())
+
+    def test_related(self):
+        """The instances referencing an object are listed"""
+        self.assertEqual(
+            self.ids(storage.related(self.state, City)),
+            sorted(city.id for city in self.cities)
+        )
+        self.assertEqual(storage.related(self.state, 'City'),
+                         storage.related(self.state, City))
+
+    def test_new_instance(self):
+        """New instances are added to the index"""
+        storage.related(self.state, City)
+        city = City(state_id=self.state.id, id='c', created_at='2024-01-01',
+                    updated_at='2024-01-01', __class__='City')
+        storage.new(city)
+        self.assertIn('City.c', storage.related(self.state, City))
+
+    def test_update(self):
+        """Changing the foreign key moves the instance"""
+        other = State()
+        storage.related(self.state, City)
+        self.cities[0].state_id = other.id
+        self.assertEqual(self.ids(storage.related(self.state, City)),
+                         [self.cities[1].id])
+        self.assertEqual(self.ids(storage.related(other, City)),
+                         [self.cities[0].id])
+
+    def test_delete(self):
+        """Deleted instances leave the index"""
+        storage.related(self.state, City)
+        storage.delete(self.cities[0])
+        self.assertEqual(self.ids(storage.related(self.state, City)),
+                         [self.cities[1].id])
+
+    def test_rollback(self):
+        """Rolled back changes are reflected by the index"""
+        storage.related(self.state, City)
+        with self.assertRaises(RuntimeError):
+            with storage.batch():
+                self.cities[0].state_id = 'other'
+                storage.delete(self.cities[1])
+                raise RuntimeError
+        self.assertEqual(len(storage.related(self.state, City)), 2)
+
+    def test_several_references(self):
+        """A class can reference several classes"""
+        user = User()
+        place = Place()
+        place.user_id = user.id
+        review = Review()
+        review.place_id = place.id
+        review.user_id = user.id
+        self.assertEqual(list(storage.related(user, Place)),
+                         ['Place.' + place.id])
+        self.assertEqual(list(storage.related(user, Review)),
+                         ['Review.' + review.id])
+        self.assertEqual(list(storage.related(place, Review)),
+                         ['Review.' + review.id])
+
+    def test_no_reference(self):
+        """A class without reference to the object raises ValueError"""
+        with self.assertRaises(ValueError):
+            storage.related(self.state, Place)
+        with self.assertRaises(ValueError):
+            storage.related(self.state, 'Nope')
+
+    def test_direct_change(self):
+        """The index follows changes made directly on __objects"""
+        storage.related(self.state, City)
+        del storage.all()['City.' + self.cities[0].id]
+        self.assertEqual(self.ids(storage.related(self.state, City)),
+                         [self.cities[1].id])
+
+    def test_lazy_reload(self):
+        """Unloaded entries are indexed and returned as instances"""
+        storage.save()
+        storage.all().clear()
+        with patch.object(FileStorage, '_FileStorage__lazy', True):
+            storage.reload()
+            cities = storage.related(self.state, City)
+            self.assertEqual(len(cities), 2)
+            for city in cities.values():
+                self.assertIs(type(city), City)
+            storage.all()
+
+
+class test_places_near(unittest.TestCase):
+    """Class to test the geospatial queries of the file storage"""
+
+    def setUp(self):
+        """Store a few places"""
+        storage._FileStorage__objects.clear()
+        self.sf = Place()
+        self.sf.latitude, self.sf.longitude = 37.7749, -122.4194
+        self.oak = Place()
+        self.oak.latitude, self.oak.longitude = 37.8044, -122.2712
+        self.unset = Place()
+
+    def test_places_near(self):
+        """The places within the radius are returned nearest first"""
+        places = storage.places_near(37.7749, -122.4194, 20)
+        self.assertEqual(list(places.values()), [self.sf, self.oak])
+        self.assertEqual(
+            list(storage.places_near(37.8044, -122.2712, 20, limit=1)),
+            ['Place.' + self.oak.id]
+        )
+        self.assertEqual(storage.places_near(0, 0, 100), {})
+
+    def test_moved_place(self):
+        """Updated coordinates are indexed again"""
+        storage.places_near(37.7749, -122.4194, 20)
+        self.oak.latitude = 40.0
+        self.assertEqual(list(storage.places_near(37.7749, -122.4194, 20)),
+                         ['Place.' + self.sf.id])
+
+    def test_deleted_place(self):
+        """Deleted places leave the index"""
+        storage.places_near(37.7749, -122.4194, 20)
+        storage.delete(self.sf)
+        self.assertEqual(list(storage.places_near(37.7749, -122.4194, 20)),
+                         ['Place.' + self.oak.id])
+
+
+class test_ids_in_range(unittest.TestCase):
+    """Class to test the range queries of the file storage"""
+
+    def setUp(self):
+        """Store a few places"""
+        storage._FileStorage__objects.clear()
+        self.places = [Place(), Place(), Place()]
+        for place, price in zip(self.places, (300, 100, 200)):
+            place.price_by_night = price
+
+    def test_range(self):
+        """The ids are returned ordered by the field"""
+        cheap, mid = self.places[1], self.places[2]
+        self.assertEqual(storage.ids_in_range(Place, 'price_by_night',
+                                              100, 200),
+                         [cheap.id, mid.id])
+        self.assertEqual(len(storage.ids_in_range('Place', 'price_by_night')),
+                         3)
+
+    def test_update(self):
+        """Updated values are indexed again"""
+        storage.ids_in_range(Place, 'price_by_night')
+        self.places[0].price_by_night = 50
+        storage.delete(self.places[1])
+        self.assertEqual(storage.ids_in_range(Place, 'price_by_night',
+                                              high=250),
+                         [self.places[0].id, self.places[2].id])
+
+    def test_invalid_field(self):
+        """Non-numeric fields raise a ValueError"""
+        with self.assertRaises(ValueError):
+            storage.ids_in_range(Place, 'name', 1, 2)
+        with self.assertRaises(ValueError):
+            storage.ids_in_range('Nope', 'price_by_night')
+
+    def test_lazy_entries(self):
+        """Unloaded entries are ranged without being built"""
+        storage.save()
+        storage.all().clear()
+        with patch.object(FileStorage, '_FileStorage__lazy', True):
+            storage.reload()
+            ids = storage.ids_in_range(Place, 'price_by_night', 150)
+            self.assertEqual(ids, [self.places[2].id, self.places[0].id])
+            self.assertEqual(len(storage._FileStorage__raw_keys), 3)
+            storage.all()
+        os.remove('hbnb.json')
+
+
+class test_places_with_amenities(unittest.TestCase):
+    """Class to test the amenity queries of the file storage"""
+
+    def setUp(self):
+        """Store a few places"""
+        storage._FileStorage__objects.clear()
+        self.places = [Place(), Place(), Place()]
+        self.places[0].amenity_ids = ['wifi', 'tv']
+        self.places[1].amenity_ids = ['wifi']
+
+    def test_places_with_amenities(self):
+        """The places offering every amenity are returned"""
+        self.assertEqual(
+            list(storage.places_with_amenities(['wifi']).values()),
+            self.places[:2]
+        )
+        self.assertEqual(
+            list(storage.places_with_amenities(['tv', 'wifi']).values()),
+            self.places[:1]
+        )
+        self.assertEqual(storage.places_with_amenities(['pool']), {})
+        self.assertEqual(len(storage.places_with_amenities([])), 3)
+
+    def test_update(self):
+        """Changed amenities are indexed again"""
+        storage.places_with_amenities(['wifi'])
+        self.places[0].amenity_ids = ['tv']
+        self.places[2].amenity_ids = ['wifi', 'pool']
+        storage.delete(self.places[1])
+        self.assertEqual(
+            list(storage.places_with_amenities(['wifi']).values()),
+            self.places[2:]
+        )
+
+
+class test_search(unittest.TestCase):
+    """Class to test the text search of the file storage"""
+
+    def setUp(self):
+        """Store a few places and reviews"""
+        storage._FileStorage__objects.clear()
+        self.beach = Place()
+        self.beach.name = "Beach house"
+        self.beach.description = "Sea view, sea breeze"
+        self.loft = Place()
+        self.loft.name = "Loft"
+        self.loft.description = "City view"
+        self.review = Review()
+        self.review.text = "Lovely sea view"
+
+    def tearDown(self):
+        """Drop the indexes and remove the storage files"""
+        storage._FileStorage__indexes.clear()
+        for path in ('hbnb.json', 'hbnb.Place.search.json',
+                     'hbnb.Place.json', 'hbnb.Review.json'):
+            try:
+                os.remove(path)
+            except Exception:
+                pass
+
+    def test_search(self):
+        """Instances are ranked by the frequency of the words"""
+        self.assertEqual(sorted(storage.search(Place, 'view')),
+                         sorted(['Place.' + self.beach.id,
+                                 'Place.' + self.loft.id]))
+        self.assertEqual(list(storage.search(Place, 'sea view')),
+                         ['Place.' + self.beach.id])
+        self.assertEqual(list(storage.search('Review', 'sea')),
+                         ['Review.' + self.review.id])
+        self.assertEqual(list(storage.search(Place, 'city sea', 'or')),
+                         ['Place.' + self.beach.id, 'Place.' + self.loft.id])
+        self.assertEqual(len(storage.search(Place, 'view', limit=1)), 1)
+
+    def test_update(self):
+        """Changed and deleted instances are indexed again"""
+        storage.search(Place, 'view')
+        self.loft.description = "Quiet street"
+        storage.delete(self.beach)
+        self.assertEqual(storage.search(Place, 'view'), {})
+        self.assertEqual(list(storage.search(Place, 'quiet')),
+                         ['Place.' + self.loft.id])
+
+    def test_invalid(self):
+        """Classes without text and unknown modes raise a ValueError"""
+        with self.assertRaises(ValueError):
+            storage.search(User, 'view')
+        with self.assertRaises(ValueError):
+            storage.search(Place, 'view', 'xor')
+
+    def test_persisted(self):
+        """The index is saved with the snapshot and reused on reload"""
+        storage.search(Place, 'view')
+        storage.save()
+        self.assertTrue(os.path.exists('hbnb.Place.search.json'))
+        storage._FileStorage__indexes.clear()
+        storage.all().clear()
+        storage.reload()
+        index = storage._FileStorage__indexes['Place'][
+            (TextIndex, ('name', 'description'))
+        ]
+        self.assertTrue(index.built)
+        self.assertEqual(len(storage.search(Place, 'view')), 2)
+
+    def test_persisted_with_journal(self):
+        """Journaled changes are indexed again after a reload"""
+        storage.search(Place, 'view')
+        storage.save()
+        with patch.object(FileStorage, '_FileStorage__mode', 'journal'):
+            self.loft.description = "Quiet street"
+            storage.save()
+            storage._FileStorage__indexes.clear()
+            storage.all().clear()
+            storage.reload()
+            self.assertEqual(list(storage.search(Place, 'quiet')),
+                             ['Place.' + self.loft.id])
+            self.assertEqual(len(storage.search(Place, 'view')), 1)
+        os.remove('hbnb.json.journal')
+
+    def test_outdated_index(self):
+        """An index saved with another snapshot is ignored"""
+        storage.search(Place, 'view')
+        storage.save()
+        storage._FileStorage__indexes.clear()
+        self.loft.name = "Sea loft"
+        storage.save()
+        storage.all().clear()
+        storage.reload()
+        self.assertNotIn('Place', storage._FileStorage__indexes)
+        self.assertEqual(len(storage.search(Place, 'sea')), 2)
+
+
+class test_where(unittest.TestCase):
+    """Class to test the filtered queries of the file storage"""
+
+    def setUp(self):
+        """Store a few places in two cities"""
+        storage._FileStorage__objects.clear()
+        self.places = [Place() for _ in range(4)]
+        for place, city, guests in zip(self.places, 'aabb', (2, 4, 6, 8)):
+            place.city_id = city
+            place.max_guest = guests
+
+    def test_where(self):
+        """The instances meeting every condition are returned"""
+        self.assertEqual(
+            list(storage.where(Place, [('city_id', '==', 'a'),
+                                       ('max_guest', '>', 2)]).values()),
+            self.places[1:2]
+        )
+        self.assertEqual(
+            len(storage.where('Place', [('max_guest', 'in', [2, 8, 9])])), 2
+        )
+        self.assertEqual(len(storage.where(Place, [('name', '!=', 'x')])), 4)
+        self.assertEqual(storage.where(Place, [('max_guest', '<', 'x')]), {})
+
+    def test_plan(self):
+        """The most selective index is picked"""
+        plan = storage.explain(Place, [('city_id', 'in', ['a', 'b']),
+                                       ('max_guest', '>=', 8)])
+        self.assertEqual((plan.access, plan.field, plan.estimate, plan.total),
+                         ('range index', 'max_guest', 1, 4))
+        plan = storage.explain(Place, [('city_id', '==', 'a'),
+                                       ('max_guest', '!=', 8)])
+        self.assertEqual((plan.access, plan.field, plan.estimate),
+                         ('hash index', 'city_id', 2))
+        plan = storage.explain(Place, [('name', '==', 'x'),
+                                       ('max_guest', '>=', 0)])
+        self.assertEqual((plan.access, plan.estimate), ('scan', 4))
+
+    def test_has(self):
+        """The amenity bitmap is intersected with the other indexes"""
+        for place, ids in zip(self.places, (['w'], ['w', 't'], ['t'],
+                                            ['w', 't'])):
+            place.amenity_ids = ids
+        self.assertEqual(
+            list(storage.where(Place, [('amenity_ids', 'has', ['t', 'w'])])),
+            ['Place.' + self.places[1].id, 'Place.' + self.places[3].id]
+        )
+        conditions = [('amenity_ids', 'has', ['w']), ('max_guest', '>=', 6)]
+        self.assertEqual(list(storage.where(Place, conditions)),
+                         ['Place.' + self.places[3].id])
+        plan = storage.explain(Place, conditions)
+        self.assertEqual(
+            (plan.access, plan.field, plan.estimate),
+            ('range index on max_guest and bitmap index', 'amenity_ids', 2)
+        )
+        plan = storage.explain(Place, [('amenity_ids', 'has', ['t', 'w']),
+                                       ('city_id', 'in', ['a', 'b'])])
+        self.assertEqual((plan.access, plan.field, plan.estimate),
+                         ('bitmap index', 'amenity_ids', 2))
+        self.assertEqual(
+            storage.where(Place, [('amenity_ids', 'has', ['x'])]), {}
+        )
+
+    def test_update(self):
+        """Changed instances are found with their new values"""
+        storage.where(Place, [('city_id', '==', 'a'), ('max_guest', '>', 0)])
+        self.places[3].city_id = 'a'
+        self.places[0].max_guest = 10
+        self.assertEqual(
+            list(storage.where(Place, [('city_id', '==', 'a'),
+                                       ('max_guest', '>=', 8)])),
+            ['Place.' + self.places[3].id, 'Place.' + self.places[0].id]
+        )
+
+    def test_invalid(self):
+        """Unknown classes and operators raise a ValueError"""
+        with self.assertRaises(ValueError):
+            storage.where('Nope', [])
+        with self.assertRaises(ValueError):
+            storage.explain(Place, [('max_guest', '=', 1)])
+
+
+class test_place_columns(unittest.TestCase):
+    """Class to test the columnar mirror of the places"""
+
+    def setUp(self):
+        """Store a few places in two cities"""
+        storage._FileStorage__objects.clear()
+        self.places = [Place() for _ in range(3)]
+        for place, city, price in zip(self.places, 'aab', (10, 30, 50)):
+            place.city_id = city
+            place.price_by_night = price
+
+    def test_aggregate(self):
+        """The columns are built from the stored places"""
+        columns = storage.place_columns()
+        self.assertEqual(columns.aggregate('price_by_night', 'mean',
+                                           by_group=True),
+                         {'a': 20, 'b': 50})
+        self.assertEqual(columns.histogram('price_by_night', 2),
+                         ([10, 30, 50], [1, 2]))
+
+    def test_update(self):
+        """The columns follow the changes of the storage"""
+        storage.place_columns()
+        self.places[0].city_id = 'b'
+        storage.delete(self.places[2])
+        Place().price_by_night = 5
+        self.assertEqual(
+            storage.place_columns().aggregate('price_by_night', 'sum',
+                                              by_group=True),
+            {'a': 30, 'b': 10, '': 5}
+        )
+
+
+class test_aggregate(unittest.TestCase):
+    """Class to test the aggregate views of the file storage"""
+
+    def setUp(self):
+        """Store a few places in two cities of a state"""
+        storage._FileStorage__objects.clear()
+        self.state = State()
+        self.cities = [City(), City()]
+        for city in self.cities:
+            city.state_id = self.state.id
+        self.places = [Place() for _ in range(3)]
+        for place, city, price in zip(self.places, 'aab', (10, 30, 50)):
+            place.city_id = self.cities[city == 'b'].id
+            place.price_by_night = price
+
+    def tearDown(self):
+        """Drop the indexes and remove the storage file"""
+        storage._FileStorage__indexes.clear()
+        try:
+            os.remove('hbnb.json')
+        except Exception:
+            pass
+
+    def test_aggregate(self):
+        """The views are computed from the stored instances"""
+        a, b = (city.id for city in self.cities)
+        self.assertEqual(storage.aggregate('places_per_city'), {a: 2, b: 1})
+        self.assertEqual(storage.aggregate('price_per_city'), {a: 20, b: 50})
+        self.assertEqual(storage.aggregate('price_per_state'),
+                         {self.state.id: 30})
+        self.assertEqual(storage.aggregate('reviews_per_place'), {})
+        with self.assertRaises(ValueError):
+            storage.aggregate('nope')
+
+    def test_update(self):
+        """The views follow the changes of the storage"""
+        a, b = (city.id for city in self.cities)
+        storage.aggregate('price_per_state')
+        self.places[0].city_id = b
+        storage.delete(self.places[1])
+        self.cities[1].state_id = 'other'
+        self.assertEqual(storage.aggregate('places_per_city'), {b: 2})
+        self.assertEqual(storage.aggregate('price_per_city'), {b: 30})
+        self.assertEqual(storage.aggregate('price_per_state'),
+                         {'other': 30})
+
+    def test_reload(self):
+        """A reload drops the views, which are built again"""
+        storage.aggregate('places_per_city')
+        storage.save()
+        index = storage._FileStorage__indexes['Place'][
+            (AggregateIndex, ('city_id',))
+        ]
+        storage.all().clear()
+        storage.reload()
+        self.assertFalse(index.built)
+        self.assertEqual(sum(storage.aggregate('places_per_city').values()),
+                         3)
+
+
+class test_bulk_load(unittest.TestCase):
+    """Class to test the bulk imports of the file storage"""
+
+    def setUp(self):
+        """Start from an empty store"""
+        storage._FileStorage__objects.clear()
+
+    def tearDown(self):
+        """Remove storage file"""
+        try:
+            os.remove('hbnb.json')
+        except Exception:
+            pass
+
+    def test_bulk_load(self):
+        """The records are added and saved once"""
+        records = [{'name': str(i), 'price_by_night': str(i)}
+                   for i in range(5)]
+        with patch.object(
+            FileStorage, '_FileStorage__write_snapshot'
+        ) as write_snapshot:
+            self.assertEqual(storage.bulk_load('Place', records,
+                                               batch_size=2), 5)
+        write_snapshot.assert_called_once()
+        places = storage.all(Place).values()
+        self.assertEqual(sorted(p.price_by_night for p in places),
+                         [0, 1, 2, 3, 4])
+        self.assertEqual(
+            list(storage.where('Place', [('name', '==', '3')]).values()),
+            [p for p in places if p.name == '3']
+        )
+
+    def test_replace(self):
+        """A record with the id of a stored instance replaces it"""
+        place = Place()
+        storage.bulk_load(Place, [{'id': place.id, 'name': 'new'}])
+        self.assertEqual(storage.all(Place)['Place.' + place.id].name,
+                         'new')
+        self.assertEqual(storage.count(Place), 1)
+
+    def test_invalid_record(self):
+        """Nothing is added if a record is invalid"""
+        with self.assertRaises(ValueError):
+            storage.bulk_load(Place, [{'name': 'a'}, {'max_guest': 'x'}],
+                              batch_size=1)
+        self.assertEqual(storage.all(), {})
+        with self.assertRaises(ValueError):
+            storage.bulk_load('Nope', [])
+
+    def test_invalid_record_in_batch(self):
+        """An invalid record only discards the import from the open batch"""
+        user = User()
+        place = Place()
+        storage.begin()
+        place.name = 'kept'
+        other = Place()
+        with self.assertRaises(ValueError):
+            storage.bulk_load(Place, [{'id': place.id, 'name': 'new'},
+                                      {'max_guest': 'x'}], batch_size=1)
+        self.assertTrue(storage.in_batch())
+        self.assertEqual(place.name, 'kept')
+        self.assertIs(storage.all(Place)['Place.' + place.id], place)
+        self.assertEqual(storage.count(Place), 2)
+        storage.rollback()
+        self.assertNotIn('name', place.__dict__)
+        self.assertEqual(list(storage.all()),
+                         ['User.' + user.id, 'Place.' + place.id])
+        self.assertNotIn('Place.' + other.id, storage.all())
+
+
+class test_page(unittest.TestCase):
+    """Class to test the pages of instances of the file storage"""
+
+    def setUp(self):
+        """Store a few places and a city"""
+        storage._FileStorage__objects.clear()
+        storage._FileStorage__indexes.clear()
+        self.places = sorted((Place() for _ in range(5)),
+                             key=lambda obj: obj.id)
+        self.city = City()
+
+    def tearDown(self):
+        """Drop the indexes and remove the storage file"""
+        storage._FileStorage__indexes.clear()
+        try:
+            os.remove('hbnb.json')
+        except Exception:
+            pass
+
+    def test_page(self):
+        """Pages are ordered by id, from an offset or after a key"""
+        self.assertEqual(list(storage.page(Place)), self.places)
+        self.assertEqual(list(storage.page('Place', limit=2, offset=1)),
+                         self.places[1:3])
+        after = 'Place.' + self.places[2].id
+        self.assertEqual(list(storage.page(Place, limit=5, after=after)),
+                         self.places[3:])
+        self.assertEqual(list(storage.page(Place, offset=9)), [])
+        with self.assertRaises(ValueError):
+            list(storage.page('Nope'))
+
+    def test_every_class(self):
+        """Without a class, pages follow the class names then the ids"""
+        objs = [self.city] + self.places
+        self.assertEqual(list(storage.page()), objs)
+        self.assertEqual(list(storage.page(limit=3, offset=1)), objs[1:4])
+        after = 'City.' + self.city.id
+        self.assertEqual(list(storage.page(limit=1, after=after)),
+                         objs[1:2])
+
+    def test_update(self):
+        """The pages follow the changes of the storage"""
+        list(storage.page(Place))
+        storage.delete(self.places[0])
+        self.places[1].name = "changed"
+        added = Place()
+        self.assertEqual(list(storage.page(Place)),
+                         sorted(self.places[1:] + [added],
+                                key=lambda obj: obj.id))
+
+
+class test_top_k(unittest.TestCase):
+    """Class to test the ordered queries of the file storage"""
+
+    def setUp(self):
+        """Store a few places in two cities"""
+        storage._FileStorage__objects.clear()
+        storage._FileStorage__indexes.clear()
+        self.places = [Place() for _ in range(5)]
+        for place, city, price in zip(self.places, 'aabba',
+                                      (50, 10, 40, 20, 30)):
+            place.city_id = city
+            place.price_by_night = price
+            place.name = str(price)
+
+    def tearDown(self):
+        """Drop the indexes and remove the storage file"""
+        storage._FileStorage__indexes.clear()
+        try:
+            os.remove('hbnb.json')
+        except Exception:
+            pass
+
+    def test_index(self):
+        """Numbers and timestamps are read in order from sorted indexes"""
+        p = self.places
+        self.assertEqual(list(storage.top_k(Place, 'price_by_night', 2)
+                              .values()), [p[1], p[3]])
+        self.assertEqual(list(storage.top_k('Place', 'price_by_night', 2,
+                                            descending=True).values()),
+                         [p[0], p[2]])
+        self.assertEqual(
+            list(storage.top_k(Place, 'price_by_night', 9,
+                               conditions=[('name', '!=', '10')]).values()),
+            [p[3], p[4], p[2], p[0]]
+        )
+        self.assertEqual(list(storage.top_k(Place, 'created_at', 1,
+                                            True).values()), [p[4]])
+        indexes = storage._FileStorage__indexes['Place']
+        self.assertIn((RangeIndex, 'price_by_night'), indexes)
+        self.assertIn((TimeIndex, 'created_at'), indexes)
+
+    def test_heap(self):
+        """Other fields, and indexed conditions, go through a heap"""
+        p = self.places
+        self.assertEqual(list(storage.top_k(Place, 'name', 3).values()),
+                         [p[1], p[3], p[4]])
+        self.assertEqual(
+            list(storage.top_k(Place, 'price_by_night', 2, True,
+                               [('city_id', '==', 'a')]).values()),
+            [p[0], p[4]]
+        )
+
+    def test_update(self):
+        """The order follows the changes of the storage"""
+        storage.top_k(Place, 'price_by_night', 1)
+        self.places[0].price_by_night = 5
+        self.assertEqual(list(storage.top_k(Place, 'price_by_night', 1)
+                              .values()), [self.places[0]])
@@ -0,0 +1,90 @@
+#!/usr/bin/python3
+""" Module for testing the readers of the bulk imports"""
+import unittest
+from io import StringIO
+from datetime import datetime
+from models.place import Place
+from models.engine.importers import (
+    batches, cast, file_format, prepare, read_records
+)
+
+
+class test_read_records(unittest.TestCase):
+    """Class to test the file readers"""
+
+    def test_file_format(self):
+        """The format is picked by the file extension"""
+        self.assertEqual(file_format('places.jsonl'), 'jsonl')
+        self.assertEqual(file_format('places.NDJSON'), 'jsonl')
+        self.assertEqual(file_format('dir.d/places.csv'), 'csv')
+        with self.assertRaises(ValueError):
+            file_format('places.json')
+
+    def test_jsonl(self):
+        """Each line is a record, blank lines are skipped"""
+        f = StringIO('{"name": "a"}\n\n{"price_by_night": 3}\n')
+        self.assertEqual(list(read_records(f, 'jsonl')),
+                         [{'name': 'a'}, {'price_by_night': 3}])
+
+    def test_jsonl_errors(self):
+        """Invalid lines are reported with their number"""
+        for text in ('{"name": "a"}\n{"name"\n', '{}\n[1, 2]\n'):
+            with self.assertRaisesRegex(ValueError, '^Line 2: '):
+                list(read_records(StringIO(text), 'jsonl'))
+
+    def test_csv(self):
+        """The header names the attributes, empty cells are unset"""
+        f = StringIO('name,price_by_night\na,3\n,\n')
+        self.assertEqual(list(read_records(f, 'csv')),
+                         [{'name': 'a', 'price_by_night': '3'}, {}])
+
+
+class test_prepare(unittest.TestCase):
+    """Class to test the checks of the imported records"""
+
+    def test_cast(self):
+        """The typed attributes are cast like the update command does"""
+        self.assertEqual(cast('number_rooms', '3'), 3)
+        self.assertEqual(cast('latitude', 2), 2.0)
+        self.assertEqual(cast('name', '3'), '3')
+        for value in ('three', True, [3]):
+            with self.assertRaises(ValueError):
+                cast('max_guest', value)
+
+    def test_completed(self):
+        """Missing ids and timestamps are set, lists are decoded"""
+        record, = prepare(Place, [{'max_guest': '2',
+                                   'amenity_ids': '["a"]'}])
+        self.assertEqual(record['max_guest'], 2)
+        self.assertEqual(record['amenity_ids'], ['a'])
+        self.assertIsInstance(record['id'], str)
+        self.assertIsInstance(record['created_at'], datetime)
+        self.assertIs(record['updated_at'], record['created_at'])
+
+    def test_kept(self):
+        """The ids and timestamps of a record are kept"""
+        record, = prepare(Place, [{
+            '__class__': 'Place', 'id': 'p1',
+            'created_at': '2024-01-01T00:00:00',
+            'updated_at': '2024-01-02T00:00:00',
+        }])
+        self.assertNotIn('__class__', record)
+        self.assertEqual(record['id'], 'p1')
+        self.assertEqual(record['updated_at'], datetime(2024, 1, 2))
+
+    def test_errors(self):
+        """Invalid records are reported with their number"""
+        for record in ({'__class__': 'City'}, {'id': 3},
+                       {'created_at': 'today'}, {'price_by_night': 'x'},
+                       {'amenity_ids': '"a"'}, {'not valid': 1}):
+            with self.assertRaisesRegex(ValueError, '^Record 2: '):
+                list(prepare(Place, [{}, record]))
+
+    def test_batches(self):
+        """The items are grouped in lists of at most size items"""
+        self.assertEqual(list(batches(range(5), 2)), [[0, 1], [2, 3], [4]])
+        self.assertEqual(list(batches([], 2)), [])
+
+
+if __name__ == '__main__':
+    unittest.main()
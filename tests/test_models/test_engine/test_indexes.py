@@ -0,0 +1,466 @@
+#!/usr/bin/python3
+""" Module for testing the storage indexes"""
+import random
+import unittest
+from datetime import datetime
+from models.engine.indexes import (
+    AGGREGATES, PLACE_COLUMNS, AggregateIndex, BitmapIndex, ColumnIndex,
+    GridIndex, HashIndex, KeyIndex, RangeIndex, TextIndex, TimeIndex,
+    aggregate_view, bounding_box, foreign_key, haversine, numeric_field,
+    register_aggregate, tokenize
+)
+from models.city import City
+from models.place import Place
+from models.state import State
+
+
+class test_hashIndex(unittest.TestCase):
+    """Class to test the hash index"""
+
+    def setUp(self):
+        """Index the state_id of a few raw entries"""
+        self.index = HashIndex(City, 'state_id')
+        self.index.sync({
+            'City.1': {'state_id': 'a'},
+            'City.2': {'state_id': 'a'},
+            'City.3': {},
+        })
+
+    def test_lookup(self):
+        """Keys are found by value, unset values aren't indexed"""
+        self.assertEqual(self.index.lookup('a'), ['City.1', 'City.2'])
+        self.assertEqual(self.index.lookup(''), [])
+        self.assertEqual(self.index.lookup('b'), [])
+
+    def test_stale_keys(self):
+        """Stale keys are indexed again on sync"""
+        self.index.mark('City.1')
+        self.index.mark('City.2')
+        self.index.sync({'City.1': {'state_id': 'b'}, 'City.3': {}})
+        self.assertEqual(self.index.lookup('a'), [])
+        self.assertEqual(self.index.lookup('b'), ['City.1'])
+
+    def test_reset(self):
+        """A reset index is built again"""
+        self.index.reset()
+        self.index.sync({'City.4': {'state_id': 'a'}})
+        self.assertEqual(self.index.lookup('a'), ['City.4'])
+
+    def test_foreign_key(self):
+        """The foreign key attribute is named after the target class"""
+        self.assertEqual(foreign_key(City, State), 'state_id')
+        self.assertEqual(foreign_key(Place, City), 'city_id')
+        with self.assertRaises(ValueError):
+            foreign_key(State, City)
+
+
+class test_gridIndex(unittest.TestCase):
+    """Class to test the geospatial grid index"""
+
+    def setUp(self):
+        """Index a few points"""
+        self.points = {
+            'Place.sf': {'latitude': 37.7749, 'longitude': -122.4194},
+            'Place.oak': {'latitude': 37.8044, 'longitude': -122.2712},
+            'Place.la': {'latitude': 34.0522, 'longitude': -118.2437},
+            'Place.fiji': {'latitude': -17.0, 'longitude': 179.99},
+            'Place.samoa': {'latitude': -17.0, 'longitude': -179.99},
+            'Place.unset': {},
+            'Place.text': {'latitude': 'x', 'longitude': 1.0},
+        }
+        self.index = GridIndex(Place, ('latitude', 'longitude'))
+        self.index.sync(self.points)
+
+    def test_haversine(self):
+        """Distances are great-circle distances in km"""
+        self.assertAlmostEqual(haversine(0, 0, 0, 1), 111.195, places=2)
+        self.assertAlmostEqual(
+            haversine(37.7749, -122.4194, 34.0522, -118.2437), 559, delta=1
+        )
+
+    def test_bounding_box(self):
+        """The box crosses the antimeridian or covers every longitude"""
+        south, north, west, east = bounding_box(0, 179.9, 50)
+        self.assertGreater(west, east)
+        self.assertEqual(bounding_box(89.9, 0, 50)[2:], (-180.0, 180.0))
+        # the circle reaches further east than dlat / cos(lat) up north
+        west, east = bounding_box(70, 0, 1000)[2:]
+        self.assertAlmostEqual(min(haversine(70, 0, lat / 10, east)
+                                   for lat in range(600, 900)),
+                               1000, delta=0.5)
+
+    def test_near_high_latitudes(self):
+        """Far north, large radii find what a full scan finds"""
+        rand = random.Random(7)
+        points = {
+            f'Place.{i}': {'latitude': rand.uniform(55, 85),
+                           'longitude': rand.uniform(-180, 180)}
+            for i in range(3000)
+        }
+        index = GridIndex(Place, ('latitude', 'longitude'))
+        index.sync(points)
+        for _ in range(100):
+            lat, lon = rand.uniform(60, 80), rand.uniform(-180, 180)
+            radius = rand.uniform(500, 1500)
+            expected = {
+                key for key, p in points.items()
+                if haversine(lat, lon, p['latitude'],
+                             p['longitude']) <= radius
+            }
+            self.assertEqual(set(index.near(lat, lon, radius)), expected)
+
+    def test_near(self):
+        """Points are returned nearest first, within the radius"""
+        self.assertEqual(self.index.near(37.7749, -122.4194, 20),
+                         ['Place.sf', 'Place.oak'])
+        self.assertEqual(self.index.near(37.7749, -122.4194, 600, 1),
+                         ['Place.sf'])
+        self.assertEqual(len(self.index.near(37.7749, -122.4194, 600)), 3)
+
+    def test_antimeridian(self):
+        """Points on both sides of the antimeridian are found"""
+        self.assertEqual(sorted(self.index.near(-17, 180, 10)),
+                         ['Place.fiji', 'Place.samoa'])
+
+    def test_unindexed(self):
+        """Unset and non-numeric coordinates aren't indexed"""
+        self.assertNotIn('Place.unset', self.index.points)
+        self.assertNotIn('Place.text', self.index.points)
+
+    def test_move(self):
+        """A moved point is found at its new location"""
+        self.index.mark('Place.la')
+        self.points['Place.la'] = {'latitude': 37.78, 'longitude': -122.42}
+        self.index.sync(self.points)
+        self.assertIn('Place.la', self.index.near(37.7749, -122.4194, 5))
+
+
+class test_rangeIndex(unittest.TestCase):
+    """Class to test the sorted range index"""
+
+    def setUp(self):
+        """Index the price of a few raw entries"""
+        self.objs = {
+            'Place.a': {'price_by_night': 100},
+            'Place.b': {'price_by_night': 50},
+            'Place.c': {'price_by_night': 100},
+            'Place.d': {},
+            'Place.e': {'price_by_night': '75'},
+            'Place.f': {'price_by_night': 80.5},
+        }
+        self.index = RangeIndex(Place, 'price_by_night')
+        self.index.sync(self.objs)
+
+    def test_range(self):
+        """Keys are returned by value then key, bounds are inclusive"""
+        self.assertEqual(self.index.range(50, 100),
+                         ['Place.b', 'Place.f', 'Place.a', 'Place.c'])
+        self.assertEqual(self.index.range(60), ['Place.f', 'Place.a',
+                                                'Place.c'])
+        self.assertEqual(self.index.range(high=0), ['Place.d'])
+        self.assertEqual(self.index.range(101), [])
+        self.assertEqual(self.index.range(90, 60), [])
+
+    def test_non_numeric(self):
+        """Non-numeric values aren't indexed"""
+        self.assertNotIn('Place.e', self.index.values)
+
+    def test_update(self):
+        """Changed values move in the index"""
+        for key in ('Place.a', 'Place.b', 'Place.e'):
+            self.index.mark(key)
+        self.objs['Place.a'] = {'price_by_night': 10}
+        del self.objs['Place.b']
+        self.objs['Place.e'] = {'price_by_night': 75}
+        self.index.sync(self.objs)
+        self.assertEqual(self.index.range(),
+                         ['Place.d', 'Place.a', 'Place.e', 'Place.f',
+                          'Place.c'])
+        self.assertEqual(self.index.sorted_values, [0, 10, 75, 80.5, 100])
+
+    def test_numeric_field(self):
+        """Only numeric attributes can be ranged over"""
+        self.assertEqual(numeric_field(Place, 'max_guest'), 'max_guest')
+        self.assertEqual(numeric_field(Place, 'latitude'), 'latitude')
+        with self.assertRaises(ValueError):
+            numeric_field(Place, 'name')
+
+
+class test_timeIndex(unittest.TestCase):
+    """Class to test the sorted index of a timestamp"""
+
+    def test_range(self):
+        """Timestamps are sorted, unloaded ones parsed, invalid ones left"""
+        objs = {
+            'Place.a': {'created_at': '2024-03-01T00:00:00'},
+            'Place.b': Place.from_record({
+                'created_at': '2024-01-01T00:00:00',
+                'updated_at': '2024-01-01T00:00:00'}),
+            'Place.c': {'created_at': 'yesterday'},
+            'Place.d': {'created_at': '2024-02-01T12:00:00.5'},
+        }
+        index = TimeIndex(Place, 'created_at')
+        index.sync(objs)
+        self.assertEqual(index.sorted_keys, ['Place.b', 'Place.d', 'Place.a'])
+        self.assertEqual(index.range(datetime(2024, 2, 1)),
+                         ['Place.d', 'Place.a'])
+
+
+class test_keyIndex(unittest.TestCase):
+    """Class to test the sorted index of the keys"""
+
+    def setUp(self):
+        """Index the keys of a few raw entries"""
+        self.objs = {'Place.c': {}, 'Place.a': {}, 'Place.b': {}}
+        self.index = KeyIndex(Place, 'id')
+        self.index.sync(self.objs)
+
+    def test_after(self):
+        """The keys are sorted, a page starts after a key"""
+        self.assertEqual(self.index.sorted_keys,
+                         ['Place.a', 'Place.b', 'Place.c'])
+        self.assertEqual(self.index.after(), 0)
+        self.assertEqual(self.index.after('Place.a'), 1)
+        self.assertEqual(self.index.after('Place.bb'), 2)
+
+    def test_update(self):
+        """Added and removed keys move, changed ones stay"""
+        for key in ('Place.a', 'Place.b', 'Place.d'):
+            self.index.mark(key)
+        del self.objs['Place.a']
+        self.objs['Place.b'] = {'name': 'changed'}
+        self.objs['Place.d'] = {}
+        self.index.sync(self.objs)
+        self.assertEqual(self.index.sorted_keys,
+                         ['Place.b', 'Place.c', 'Place.d'])
+
+
+class test_bitmapIndex(unittest.TestCase):
+    """Class to test the bitmap index"""
+
+    def setUp(self):
+        """Index the amenities of a few raw entries"""
+        self.objs = {
+            'Place.a': {'amenity_ids': ['wifi', 'tv']},
+            'Place.b': {'amenity_ids': ['wifi']},
+            'Place.c': {},
+            'Place.d': {'amenity_ids': ['tv', 'wifi', 'pets']},
+            'Place.e': {'amenity_ids': 'wifi'},
+        }
+        self.index = BitmapIndex(Place, 'amenity_ids')
+        self.index.sync(self.objs)
+
+    def test_all_of(self):
+        """Keys holding every element are found by ordinal"""
+        self.assertEqual(self.index.lookup(self.index.all_of(['wifi'])),
+                         ['Place.a', 'Place.b', 'Place.d'])
+        self.assertEqual(
+            self.index.lookup(self.index.all_of(['wifi', 'tv', 'pets'])),
+            ['Place.d']
+        )
+        self.assertEqual(self.index.all_of(['wifi', 'pool']), 0)
+        self.assertEqual(self.index.all_of([]), 0)
+
+    def test_bits(self):
+        """Keys of other indexes combine with the bitsets"""
+        bits = self.index.bits(['Place.b', 'Place.c', 'Place.d'])
+        self.assertEqual(
+            self.index.lookup(self.index.all_of(['wifi']) & bits),
+            ['Place.b', 'Place.d']
+        )
+
+    def test_update(self):
+        """Changed lists move the key between the bitsets"""
+        for key in ('Place.a', 'Place.b', 'Place.c'):
+            self.index.mark(key)
+        self.objs['Place.a'] = {'amenity_ids': ['pets']}
+        del self.objs['Place.b']
+        self.objs['Place.c'] = {'amenity_ids': ['tv']}
+        self.index.sync(self.objs)
+        self.assertEqual(self.index.lookup(self.index.all_of(['tv'])),
+                         ['Place.d', 'Place.c'])
+        self.assertEqual(self.index.lookup(self.index.all_of(['wifi'])),
+                         ['Place.d'])
+        self.assertEqual(self.index.lookup(self.index.all_of(['pets'])),
+                         ['Place.a', 'Place.d'])
+
+
+class test_textIndex(unittest.TestCase):
+    """Class to test the inverted text index"""
+
+    def setUp(self):
+        """Index the text of a few raw entries"""
+        self.objs = {
+            'Place.a': {'name': 'Beach house', 'description': 'Sea view'},
+            'Place.b': {'name': 'Loft', 'description': 'View, view, VIEW!'},
+            'Place.c': {'name': 'Beach hut'},
+            'Place.d': {},
+        }
+        self.index = TextIndex(Place, ('name', 'description'))
+        self.index.sync(self.objs)
+
+    def test_tokenize(self):
+        """Words are lowercased and split on punctuation"""
+        self.assertEqual(tokenize("Sea-view, 2 rooms!"),
+                         ['sea', 'view', '2', 'rooms'])
+
+    def test_and(self):
+        """Keys holding every word are ranked by frequency"""
+        self.assertEqual(self.index.search('view'), ['Place.b', 'Place.a'])
+        self.assertEqual(self.index.search('beach VIEW'), ['Place.a'])
+        self.assertEqual(self.index.search('beach pool'), [])
+        self.assertEqual(self.index.search(''), [])
+
+    def test_or(self):
+        """Keys holding any word are ranked by frequency"""
+        self.assertEqual(self.index.search('beach view', 'or'),
+                         ['Place.b', 'Place.a', 'Place.c'])
+
+    def test_update(self):
+        """Changed text is indexed again"""
+        self.index.mark('Place.b')
+        self.index.mark('Place.c')
+        self.objs['Place.b'] = {'name': 'Beach loft'}
+        del self.objs['Place.c']
+        self.index.sync(self.objs)
+        self.assertEqual(self.index.search('beach'), ['Place.a', 'Place.b'])
+        self.assertEqual(self.index.search('hut'), [])
+
+    def test_dump_load(self):
+        """A dumped index loads back"""
+        index = TextIndex(Place, ('name', 'description'))
+        index.load(self.index.dump())
+        self.assertTrue(index.built)
+        self.assertEqual(index.postings, self.index.postings)
+        index.mark('Place.a')
+        self.objs['Place.a'] = {'name': 'Chalet'}
+        index.sync(self.objs)
+        self.assertEqual(index.search('beach'), ['Place.c'])
+        self.assertEqual(index.search('chalet'), ['Place.a'])
+        with self.assertRaises(ValueError):
+            TextIndex(Place, ('name',)).load(self.index.dump())
+
+
+class test_columnIndex(unittest.TestCase):
+    """Class to test the columnar index"""
+
+    def setUp(self):
+        """Index the numbers of a few raw entries in two cities"""
+        self.objs = {
+            'Place.a': {'city_id': 'x', 'price_by_night': 100,
+                        'max_guest': 2},
+            'Place.b': {'city_id': 'x', 'price_by_night': 300,
+                        'max_guest': 4},
+            'Place.c': {'city_id': 'y', 'price_by_night': 50},
+        }
+        self.index = ColumnIndex(Place, PLACE_COLUMNS)
+        self.index.sync(self.objs)
+
+    def test_aggregate(self):
+        """Aggregates are computed over every row or by group"""
+        index = self.index
+        self.assertEqual(index.aggregate('price_by_night'), 450)
+        self.assertEqual(index.aggregate('price_by_night', 'mean'), 150)
+        self.assertEqual(index.aggregate('max_guest', 'min'), 0)
+        self.assertEqual(
+            index.aggregate('price_by_night', 'max', by_group=True),
+            {'x': 300, 'y': 50})
+        self.assertEqual(
+            index.aggregate('max_guest', 'count', by_group=True),
+            {'x': 2, 'y': 1})
+        with self.assertRaises(ValueError):
+            index.aggregate('name')
+        with self.assertRaises(ValueError):
+            index.aggregate('max_guest', 'median')
+
+    def test_histogram(self):
+        """Values are counted in bins of equal width"""
+        self.assertEqual(self.index.histogram('price_by_night', 5),
+                         ([50, 100, 150, 200, 250, 300], [1, 1, 0, 0, 1]))
+        self.assertEqual(self.index.histogram('max_guest', 2, 1, 4),
+                         ([1, 2.5, 4], [1, 1]))
+        self.assertEqual(ColumnIndex(Place, PLACE_COLUMNS).histogram(
+            'max_guest', 2), ([0.0, 0.0, 0.0], [0, 0]))
+
+    def test_update(self):
+        """Changed, removed and non-numeric rows are indexed again"""
+        for key in ('Place.a', 'Place.c'):
+            self.index.mark(key)
+        self.objs['Place.a'] = {'city_id': 'y', 'price_by_night': 'free'}
+        del self.objs['Place.c']
+        self.index.sync(self.objs)
+        self.assertEqual(
+            self.index.aggregate('price_by_night', 'sum', by_group=True),
+            {'x': 300, 'y': 0})
+        self.assertEqual(
+            self.index.aggregate('price_by_night', 'mean', by_group=True),
+            {'x': 300, 'y': None})
+        self.assertEqual(self.index.aggregate('max_guest', 'count'), 2)
+        self.assertEqual(self.index.rows['Place.a'], ('y', 0))
+
+    def test_typecodes(self):
+        """Integer columns hold 64-bit integers until a float comes"""
+        columns = self.index.groups['x'].columns
+        guests = self.index.column('max_guest')
+        self.assertEqual(columns[guests].typecode, 'q')
+        self.assertEqual(columns[self.index.column('latitude')].typecode,
+                         'd')
+        self.index.mark('Place.a')
+        self.objs['Place.a']['max_guest'] = 2.5
+        self.index.sync(self.objs)
+        self.assertEqual(columns[guests].typecode, 'd')
+        self.assertEqual(self.index.aggregate('max_guest'), 6.5)
+
+
+class test_aggregateIndex(unittest.TestCase):
+    """Class to test the running aggregates"""
+
+    def setUp(self):
+        """Aggregate the prices of a few raw entries in two cities"""
+        self.objs = {
+            'Place.a': {'city_id': 'x', 'price_by_night': 100},
+            'Place.b': {'city_id': 'x', 'price_by_night': 300},
+            'Place.c': {'city_id': 'y', 'price_by_night': 'free'},
+            'Place.d': {'price_by_night': 50},
+        }
+        self.index = AggregateIndex(Place, ('city_id', 'price_by_night'))
+        self.index.sync(self.objs)
+
+    def test_result(self):
+        """Groups are counted, summed and averaged, empty ones left out"""
+        self.assertEqual(self.index.result('count'), {'x': 2, 'y': 1})
+        self.assertEqual(self.index.result('sum'), {'x': 400, 'y': 0})
+        self.assertEqual(self.index.result('mean'), {'x': 200, 'y': None})
+
+    def test_roll_up(self):
+        """Groups are combined into their parents"""
+        parents = {'x': 's1', 'y': 's1'}
+        self.assertEqual(self.index.result('count', parents), {'s1': 3})
+        self.assertEqual(self.index.result('mean', parents), {'s1': 200})
+        self.assertEqual(self.index.result('count', {}), {})
+
+    def test_update(self):
+        """Changed and removed rows move between groups"""
+        for key in ('Place.a', 'Place.b', 'Place.c'):
+            self.index.mark(key)
+        self.objs['Place.a']['city_id'] = 'y'
+        self.objs['Place.c']['price_by_night'] = 10.5
+        del self.objs['Place.b']
+        self.index.sync(self.objs)
+        self.assertEqual(self.index.result('mean'), {'y': 55.25})
+        self.assertEqual(self.index.sums, {'y': 110.5})
+        self.assertNotIn('x', self.index.numbers)
+
+    def test_register(self):
+        """Views are registered by name, invalid ones are rejected"""
+        register_aggregate('rooms', 'Place', 'city_id', 'sum',
+                           'number_rooms')
+        self.addCleanup(AGGREGATES.pop, 'rooms')
+        self.assertEqual(aggregate_view('rooms'),
+                         ('Place', 'city_id', 'sum', 'number_rooms', None))
+        with self.assertRaises(ValueError):
+            aggregate_view('nope')
+        with self.assertRaises(ValueError):
+            register_aggregate('x', 'Place', 'city_id', 'median', 'price')
+        with self.assertRaises(ValueError):
+            register_aggregate('x', 'Place', 'city_id', 'mean')
@@ -0,0 +1,121 @@
+#!/usr/bin/python3
+""" Module for testing the storage filters"""
+import unittest
+from models.engine.query import (
+    Plan, check_conditions, equal_values, interval, matches, parse_conditions,
+    parse_order, top_k
+)
+from models.place import Place
+
+
+class test_parseConditions(unittest.TestCase):
+    """Class to test the parsing of filters"""
+
+    def test_literals(self):
+        """Values are read as literals, or as unquoted strings"""
+        self.assertEqual(
+            parse_conditions('max_guest >= 4, name == "a, b", city_id != x1'),
+            [('max_guest', '>=', 4), ('name', '==', 'a, b'),
+             ('city_id', '!=', 'x1')]
+        )
+        self.assertEqual(parse_conditions(''), [])
+
+    def test_in(self):
+        """The value of an "in" condition is read as a list"""
+        self.assertEqual(parse_conditions('city_id in [a-1, "b"]'),
+                         [('city_id', 'in', ['a-1', 'b'])])
+        self.assertEqual(parse_conditions('max_guest in (1, 2)'),
+                         [('max_guest', 'in', [1, 2])])
+
+    def test_has(self):
+        """The value of a "has" condition is read as a list"""
+        self.assertEqual(parse_conditions('amenity_ids has [a-1, b]'),
+                         [('amenity_ids', 'has', ['a-1', 'b'])])
+        self.assertEqual(parse_conditions('amenity_ids has a-1'),
+                         [('amenity_ids', 'has', ['a-1'])])
+
+    def test_invalid(self):
+        """Invalid conditions raise a ValueError"""
+        for text in ('max_guest >', 'max_guest = 4', 'name in 4', '== 4',
+                     'nameinx'):
+            with self.assertRaises(ValueError):
+                parse_conditions(text)
+        with self.assertRaises(ValueError):
+            check_conditions([('name', '~', 'a')])
+
+
+class test_order(unittest.TestCase):
+    """Class to test the ordered selections"""
+
+    def test_parse_order(self):
+        """The order clause is split off the end of the filter"""
+        self.assertEqual(
+            parse_order('city_id == a1, order by price_by_night limit 10'),
+            ('city_id == a1', ('price_by_night', False, 10))
+        )
+        self.assertEqual(parse_order('ORDER BY created_at DESC LIMIT 5'),
+                         ('', ('created_at', True, 5)))
+        self.assertEqual(parse_order('name == "order by a limit 1"'),
+                         ('name == "order by a limit 1"', None))
+        self.assertEqual(parse_order('order by a'), ('order by a', None))
+
+    def test_top_k(self):
+        """The k smallest (or largest) values are kept, ties by key"""
+        objs = {}
+        for key, price in zip('edcba', (30, 10, 20, 10, 'x')):
+            objs[key] = Place()
+            objs[key].price_by_night = price
+        top = top_k(objs.items(), 'price_by_night', 3, numeric=True)
+        self.assertEqual([key for key, _ in top], ['b', 'd', 'c'])
+        top = top_k(objs.items(), 'price_by_night', 2, descending=True,
+                    numeric=True)
+        self.assertEqual([key for key, _ in top], ['e', 'c'])
+        with self.assertRaises(ValueError):
+            top_k(objs.items(), 'price_by_night', 2)
+
+
+class test_matches(unittest.TestCase):
+    """Class to test the evaluation of filters"""
+
+    def test_matches(self):
+        """Unset attributes are compared through the class default"""
+        place = Place()
+        place.max_guest = 4
+        self.assertTrue(matches(place, [('max_guest', '>', 3),
+                                        ('price_by_night', '==', 0)]))
+        self.assertFalse(matches(place, [('max_guest', 'in', [1, 2])]))
+        self.assertFalse(matches(place, [('nope', '==', 1)]))
+        place.amenity_ids = ['a', 'b']
+        self.assertTrue(matches(place, [('amenity_ids', 'has', ['b', 'a'])]))
+        self.assertFalse(matches(place, [('amenity_ids', 'has', ['c'])]))
+        self.assertFalse(matches(place, [('max_guest', 'has', [4])]))
+
+    def test_incomparable(self):
+        """Values that can't be compared don't match"""
+        place = Place()
+        place.max_guest = "4"
+        self.assertFalse(matches(place, [('max_guest', '>', 3)]))
+
+    def test_equal_values(self):
+        """The values allowed by every equality are kept in order"""
+        self.assertEqual(equal_values([('a', 'in', [3, 1, 2, 1]),
+                                       ('a', '==', 1), ('a', '>', 0)]),
+                         [1])
+        self.assertEqual(equal_values([('a', 'in', [3, 1, 2, 1])]),
+                         [3, 1, 2])
+        self.assertIsNone(equal_values([('a', '<', 1)]))
+        self.assertIsNone(equal_values([('a', '==', [1])]))
+
+    def test_interval(self):
+        """The tightest numeric bounds are kept"""
+        self.assertEqual(interval([('a', '>', 1), ('a', '>=', 3),
+                                   ('a', '<', 9), ('a', '<=', 'x')]),
+                         (3, 9))
+        self.assertEqual(interval([('a', '!=', 1)]), (None, None))
+
+    def test_plan(self):
+        """Plans are printed on one line"""
+        plan = Plan('Place', 'range index', 'max_guest', 2, 10,
+                    [('max_guest', '>=', 4)])
+        self.assertEqual(str(plan), "Place: range index on max_guest "
+                                    "(~2 of 10 rows), filter: max_guest >= 4")
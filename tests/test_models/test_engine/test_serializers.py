@@ -0,0 +1,138 @@
+#!/usr/bin/python3
+""" Module for testing the storage serializers"""
+import unittest
+from unittest.mock import patch
+from datetime import datetime
+from models import storage
+from models.base_model import BaseModel
+from models.place import Place
+from models.engine.file_storage import FileStorage
+from models.engine.serializers import get_serializer
+import json
+import os
+
+
+class test_serializers(unittest.TestCase):
+    """Class to test the serializer registry"""
+
+    def test_get_serializer(self):
+        """Serializers are found by name"""
+        self.assertEqual(get_serializer('json').name, 'json')
+        self.assertEqual(get_serializer('binary').name, 'binary')
+
+    def test_unknown_serializer(self):
+        """An unknown format raises a ValueError"""
+        with self.assertRaises(ValueError):
+            get_serializer('xml')
+
+    def test_json_entry(self):
+        """The Json entry holds the to_dict() of the object"""
+        obj = BaseModel()
+        entry = get_serializer('json').encode('BaseModel.' + obj.id, obj)
+        self.assertEqual(
+            json.loads('{' + entry + '}'),
+            {'BaseModel.' + obj.id: obj.to_dict()}
+        )
+
+
+class test_binary_format(unittest.TestCase):
+    """Class to test the binary storage format"""
+
+    def setUp(self):
+        """Switch storage to the binary format on an empty store"""
+        storage._FileStorage__objects.clear()
+        storage._FileStorage__pending.clear()
+        self.format = patch.object(
+            FileStorage, '_FileStorage__serializer', get_serializer('binary')
+        )
+        self.format.start()
+
+    def tearDown(self):
+        """Restore the format and remove the storage files"""
+        self.format.stop()
+        for path in ('hbnb.bin', 'hbnb.bin.journal', 'hbnb.json'):
+            try:
+                os.remove(path)
+            except Exception:
+                pass
+
+    def test_file_name(self):
+        """The binary snapshot replaces the extension of the Json file"""
+        BaseModel()
+        storage.save()
+        self.assertTrue(os.path.exists('hbnb.bin'))
+        self.assertFalse(os.path.exists('hbnb.json'))
+        with open('hbnb.bin', 'rb') as f:
+            self.assertEqual(f.read(4), b'HBNB')
+
+    def test_round_trip(self):
+        """Typed values and timestamps come back unchanged"""
+        place = Place()
+        place.max_guest = 4
+        place.latitude = 37.7
+        place.amenity_ids = ['a', 'b']
+        place.name = "Home"
+        storage.save()
+        storage.all().clear()
+        storage.reload()
+        loaded = storage.get(Place, place.id)
+        self.assertIsNot(loaded, place)
+        self.assertEqual(loaded.to_dict(), place.to_dict())
+        self.assertIs(type(loaded.max_guest), int)
+        self.assertIs(type(loaded.created_at), datetime)
+
+    def test_smaller_than_json(self):
+        """The binary snapshot is smaller than the Json one"""
+        for _ in range(20):
+            Place()
+        storage.save()
+        with patch.object(
+            FileStorage, '_FileStorage__serializer', get_serializer('json')
+        ):
+            storage.compact()
+        self.assertLess(
+            os.path.getsize('hbnb.bin'), os.path.getsize('hbnb.json')
+        )
+
+    def test_journal(self):
+        """Binary journal records are replayed and torn ones ignored"""
+        with patch.object(FileStorage, '_FileStorage__mode', 'journal'):
+            kept = BaseModel()
+            gone = BaseModel()
+            storage.save()
+            storage.delete(gone)
+            storage.save()
+        with open('hbnb.bin.journal', 'ab') as f:
+            f.write(b'P\x10\x00')
+        storage.all().clear()
+        storage.reload()
+        self.assertEqual(list(storage.all()), ['BaseModel.' + kept.id])
+
+    def test_save_after_torn_record(self):
+        """The torn record is cut off, so later appends are read back"""
+        with patch.object(FileStorage, '_FileStorage__mode', 'journal'):
+            first = BaseModel()
+            storage.save()
+            with open('hbnb.bin.journal', 'ab') as f:
+                f.write(b'P\x10\x00')
+            storage.all().clear()
+            storage.reload()
+            second = BaseModel()
+            storage.save()
+        storage.all().clear()
+        storage.reload()
+        self.assertEqual(sorted(storage.all()), sorted([
+            'BaseModel.' + first.id, 'BaseModel.' + second.id
+        ]))
+
+    def test_truncated_file(self):
+        """A truncated snapshot raises a ValueError"""
+        BaseModel()
+        storage.save()
+        with open('hbnb.bin', 'rb') as f:
+            data = f.read()
+        with open('hbnb.bin', 'wb') as f:
+            f.write(data[:-5])
+        storage.all().clear()
+        with self.assertRaises(ValueError):
+            storage.reload()
@@ -0,0 +1,77 @@
+#!/usr/bin/python3
+""" Module for testing the id generators"""
+import unittest
+import uuid
+from unittest.mock import patch
+from models import ids, storage
+from models.base_model import BaseModel
+
+
+class test_uuid7(unittest.TestCase):
+    """Class to test the time-ordered ids"""
+
+    def setUp(self):
+        """Creates a generator reading a fake clock (in ns)"""
+        self.now = 1700000000000 * 1000000
+        self.generate = ids.UUID7(pool_size=40, clock=lambda: self.now)
+
+    def test_format(self):
+        """Ids are version 7 UUIDs starting with the time in ms"""
+        value = uuid.UUID(self.generate())
+        self.assertEqual(value.version, 7)
+        self.assertEqual(value.variant, uuid.RFC_4122)
+        self.assertEqual(value.int >> 80, 1700000000000)
+
+    def test_ordered(self):
+        """Ids increase within a millisecond and across them"""
+        generated = [self.generate() for _ in range(10)]
+        self.now += 5000000
+        generated += [self.generate() for _ in range(10)]
+        self.assertEqual(sorted(generated), generated)
+        self.assertEqual(len(set(generated)), 20)
+        self.assertEqual(uuid.UUID(generated[-1]).int >> 80, 1700000000005)
+
+    def test_clock_back(self):
+        """Ids keep increasing when the clock goes back"""
+        first = self.generate()
+        self.now -= 10000000
+        self.assertGreater(self.generate(), first)
+
+    def test_counter_overflow(self):
+        """A full counter moves on to the next millisecond"""
+        self.generate()
+        self.generate.last_tail = (1 << 74) - 1
+        self.assertEqual(uuid.UUID(self.generate()).int >> 80,
+                         1700000000001)
+
+    def test_pool(self):
+        """The entropy is read a pool at a time"""
+        with patch('os.urandom', return_value=bytes(range(40))) as urandom:
+            for _ in range(4):
+                self.now += 1000000
+                self.generate()
+            self.assertEqual(urandom.call_count, 1)
+            self.now += 1000000
+            self.generate()
+            self.assertEqual(urandom.call_count, 2)
+
+
+class test_new_id(unittest.TestCase):
+    """Class to test the generator of the instances"""
+
+    def test_generators(self):
+        """Generators are found by name"""
+        self.assertIs(ids.get_generator('uuid7'), ids.uuid7)
+        self.assertEqual(uuid.UUID(ids.get_generator('uuid4')()).version, 4)
+        with self.assertRaises(ValueError):
+            ids.get_generator('uuid1')
+
+    def test_instances(self):
+        """New instances take their id from the configured generator"""
+        with patch.object(ids, 'new_id', ids.uuid7):
+            first, second = BaseModel(), BaseModel()
+        self.addCleanup(storage.delete, first)
+        self.addCleanup(storage.delete, second)
+        self.assertEqual(uuid.UUID(first.id).version, 7)
+        self.assertLess(first.id, second.id)
+        self.assertIs(storage.get(BaseModel, second.id), second)